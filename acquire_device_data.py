@@ -1,183 +1,337 @@
-import requests
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+import asyncio
+import httpx
+from influxdb_client import Point, WritePrecision
+from influxdb_client.rest import ApiException
 import time
 import os # Untuk membaca variabel environment jika diperlukan
-import csv
-import threading
+
+from utils import device_registry, influxdb_pool
+from utils.payload_parser import PayloadParseError, parse_payload
+from utils.tick_scheduler import TickScheduler, spread_offsets
+from utils.write_buffer import SegmentedWriteBuffer
 
 # --- Konfigurasi InfluxDB ---
-INFLUX_URL = os.getenv("INFLUXDB_URL", "http://localhost:8086")
-INFLUX_TOKEN = os.getenv("INFLUXDB_TOKEN", "th1s_1s_a_v3ry_s3cur3_4nd_l0ng_4dm1n_t0k3n_f0r_d3v")
-INFLUX_ORG = os.getenv("INFLUXDB_ORG", "iot_project_alpha")
+# URL, token, dan org dikelola oleh pool bersama di utils/influxdb_pool.py
+INFLUX_ORG = influxdb_pool.INFLUXDB_ORG
 INFLUX_BUCKET = os.getenv("INFLUXDB_BUCKET", "sensor_data_primary")
+WRITE_GZIP = os.getenv("ACQUISITION_WRITE_GZIP", "true").lower() == "true" # Kompresi gzip untuk batch line protocol
 
 # --- Konfigurasi Umum ---
-DEVICE_CSV_PATH = "/home/lambda_one/project/digitalTwin/device_list.csv" # Path ke file CSV perangkat
+DEVICE_CSV_PATH = device_registry.DEVICE_LIST_PATH # Path ke file CSV perangkat (env DEVICE_LIST_PATH)
 POLL_INTERVAL_SECONDS = 10 # Seberapa sering mengambil data dari SEMUA perangkat (dalam detik)
 REQUEST_TIMEOUT_SECONDS = 5 # Timeout untuk permintaan HTTP ke perangkat
+MAX_CONCURRENT_REQUESTS = int(os.getenv("ACQUISITION_MAX_CONCURRENT_REQUESTS", "64")) # Koneksi HTTP paralel maksimum ke perangkat
+BACKOFF_MAX_SECONDS = int(os.getenv("ACQUISITION_BACKOFF_MAX_SECONDS", "300")) # Jeda maksimum untuk perangkat yang terus gagal
+SPREAD_FRACTION = float(os.getenv("ACQUISITION_SPREAD_FRACTION", "0.3")) # Bagian awal tick tempat permintaan perangkat disebar
+TICK_WRITE_MARGIN_SECONDS = 1.0 # Sisa waktu tick yang dicadangkan untuk write batch
+
+# --- Konfigurasi Buffer Tulis Lokal (saat InfluxDB tidak tersedia) ---
+BUFFER_DIR = os.getenv("ACQUISITION_BUFFER_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "write_buffer"))
+BUFFER_MAX_MB = int(os.getenv("ACQUISITION_BUFFER_MAX_MB", "256")) # Batas ukuran buffer di disk; data tertua dibuang jika penuh
+REPLAY_BATCH_LINES = int(os.getenv("ACQUISITION_REPLAY_BATCH_LINES", "5000")) # Jumlah baris per batch saat replay
+PERMANENT_WRITE_ERROR_STATUSES = (400, 413, 422) # Batch yang ditolak karena isinya tidak akan berhasil jika diulang
 
 # --- Inisialisasi Klien InfluxDB ---
 client = None # Akan diinisialisasi di blok try utama
 write_api = None # Akan diinisialisasi di blok try utama
 
+
+def log(message, device_ip=None):
+    """Mencetak pesan dengan timestamp (dan IP perangkat jika ada)."""
+    device_part = f" [Device: {device_ip}]" if device_ip else ""
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}]{device_part} {message}")
+
+
 def load_devices(csv_path):
-    """Membaca daftar perangkat dari file CSV."""
-    devices = []
+    """
+    Membaca daftar perangkat dari registry device_list.csv (utils/device_registry.py),
+    sumber yang sama dengan bagian [[inputs.http]] di telegraf.conf.
+    """
+    return device_registry.load_registry(csv_path).poller_devices()
+
+
+class DeviceBackoff:
+    """
+    Status backoff per perangkat: perangkat yang gagal dilewati selama jeda yang berlipat
+    dua setiap kegagalan berturut-turut (maksimum BACKOFF_MAX_SECONDS), agar perangkat mati
+    tidak menghabiskan koneksi dan timeout di setiap siklus.
+    """
+
+    def __init__(self, base_seconds=POLL_INTERVAL_SECONDS, max_seconds=BACKOFF_MAX_SECONDS):
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self._failures = {}
+        self._retry_at = {}
+
+    def ready(self, device_ip, now):
+        """True jika perangkat boleh di-poll pada waktu monotonic `now`."""
+        return now >= self._retry_at.get(device_ip, 0.0)
+
+    def record_success(self, device_ip):
+        self._failures.pop(device_ip, None)
+        self._retry_at.pop(device_ip, None)
+
+    def record_failure(self, device_ip, now):
+        """Mencatat kegagalan dan mengembalikan jeda (detik) sebelum perangkat dicoba lagi."""
+        failures = self._failures.get(device_ip, 0) + 1
+        self._failures[device_ip] = failures
+        # Kegagalan pertama dicoba lagi di siklus berikutnya; selanjutnya jeda berlipat dua
+        delay = 0.0 if failures == 1 else min(self.base_seconds * 2 ** (failures - 2), self.max_seconds)
+        self._retry_at[device_ip] = now + delay
+        return delay
+
+
+def parse_device_payload(raw_data):
+    """
+    Mem-parsing isi respons perangkat langsung dari bytes (lihat utils/payload_parser.py).
+    Contoh data: b"46#22.20#2D303D" atau HTML seperti b"<meta...><body>46#22.20#2D303D</body>"
+    Mengembalikan dictionary: {"humidity": float, "temperature": float, "hex_value": str}.
+    Melempar PayloadParseError (turunan ValueError) jika format atau nilai numerik tidak valid.
+    """
+    if isinstance(raw_data, str):
+        raw_data = raw_data.encode("utf-8")
+    return parse_payload(raw_data)
+
+
+async def fetch_device_reading(http_client, device):
+    """
+    Mengambil dan mem-parsing data satu perangkat melalui connection pool bersama.
+    Mengembalikan dictionary hasil parse_device_payload ditambah "timestamp_ns" (waktu respons
+    diterima), atau None jika gagal. Batas waktu per perangkat diatur oleh timeout http_client.
+    """
+    url = device["url"]
+    device_ip = device["ip_address"]
     try:
-        with open(csv_path, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            if not reader.fieldnames: # Tambahkan pengecekan ini
-                print(f"Error: Tidak dapat membaca header dari file CSV '{csv_path}'. Pastikan file tidak kosong, memiliki header yang valid, dan menggunakan encoding UTF-8.")
-                return []
-
-            required_columns = ['IP ADDRESS', 'ID LOGGER', 'LOKASI']
-            # Memastikan kolom yang dibutuhkan ada
-            if not all(col in reader.fieldnames for col in required_columns):
-                missing_cols = [col for col in required_columns if col not in reader.fieldnames]
-                present_cols = list(reader.fieldnames) if reader.fieldnames else []
-                print(f"Error: File CSV '{csv_path}' kekurangan kolom yang dibutuhkan: {', '.join(missing_cols)}. Kolom yang terdeteksi: {', '.join(present_cols)}.")
-                return []
-                
-            for row_number, row in enumerate(reader, 1): # Mulai dari baris 1 untuk data (setelah header)
-                # Validasi dasar bahwa kolom yang diharapkan ada di baris tersebut (meskipun DictReader seharusnya menanganinya)
-                if not all(col in row for col in required_columns):
-                    print(f"Warning: Baris {row_number + 1} di '{csv_path}' mungkin kekurangan beberapa kolom yang diharapkan. Baris dilewati: {row}")
-                    continue
-
-                ip_address = row.get('IP ADDRESS', '').strip() # Gunakan .get() untuk keamanan
-                id_logger = row.get('ID LOGGER', '').strip()
-                lokasi = row.get('LOKASI', '').strip()
-                
-                if ip_address and id_logger and lokasi: # Hanya proses jika semua field penting ada
-                    devices.append({
-                        "id_logger": id_logger,
-                        "lokasi": lokasi,
-                        "ip_address": ip_address,
-                        "url": f"http://{ip_address}/"
-                    })
-                elif ip_address: # Jika hanya IP yang ada, mungkin masih berguna untuk log error, tapi tidak untuk diproses penuh
-                    print(f"Warning: Baris {row_number + 1} di '{csv_path}' dengan IP '{ip_address}' kekurangan ID Logger atau Lokasi. Baris tidak diproses sepenuhnya.")
-                # Jika IP address kosong, baris akan dilewati secara diam-diam oleh logika 'if ip_address' sebelumnya.
-
-    except FileNotFoundError:
-        print(f"Error: File CSV perangkat tidak ditemukan di '{csv_path}'")
-        return []
+        response = await http_client.get(url)
+        timestamp_ns = time.time_ns()
+        response.raise_for_status()
+        reading = parse_device_payload(response.content)
+        reading["timestamp_ns"] = timestamp_ns
+        return reading
+    except httpx.TimeoutException:
+        log(f"Error: Timeout mengambil data dari {url}", device_ip)
+    except httpx.HTTPError as e:
+        log(f"Error mengambil data dari {url}: {e}", device_ip)
+    except PayloadParseError as e:
+        log(f"Error: {e}", device_ip)
     except Exception as e:
-        print(f"Error saat membaca file CSV perangkat '{csv_path}': {e}")
-        return []
-    if not devices:
-        print(f"Tidak ada perangkat yang dimuat dari '{csv_path}'. Pastikan file tidak kosong dan formatnya benar.")
-    return devices
+        log(f"Error tidak diketahui saat memproses data dari {url}: {e}", device_ip)
+    return None
+
+
+def build_point(device_info, reading):
+    """Membuat Point InfluxDB dari satu pembacaan perangkat."""
+    return Point("device_readings") \
+        .tag("device_ip", device_info["ip_address"]) \
+        .tag("id_logger", device_info["id_logger"]) \
+        .tag("lokasi", device_info["lokasi"]) \
+        .tag("source_url", device_info["url"]) \
+        .field("humidity", reading["humidity"]) \
+        .field("temperature", reading["temperature"]) \
+        .field("status_hex", reading["hex_value"]) \
+        .time(reading["timestamp_ns"], WritePrecision.NS)
 
-def fetch_and_parse_device_data(url, device_ip_for_log): # device_ip_for_log ditambahkan untuk logging yang lebih baik
+
+async def _poll_device(http_client, device, start_delay, deadline):
     """
-    Mengambil data dari URL perangkat dan mem-parsingnya.
-    Contoh data: "46#22.20#2D303D" atau HTML seperti "<meta...><body>46#22.20#2D303D</body>"
-    Mengembalikan dictionary: {"humidity": float, "temperature": float, "hex_value": str} atau None jika error.
+    Menunggu giliran perangkat dalam tick lalu mengambil datanya sebelum deadline (monotonic).
+    Mengembalikan (reading, overrun).
     """
+    if start_delay > 0:
+        await asyncio.sleep(start_delay)
+    if deadline is None:
+        return await fetch_device_reading(http_client, device), False
+    remaining = deadline - time.monotonic()
     try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
-        response.raise_for_status()
-        
-        raw_data = response.text.strip()
-        data_to_parse = raw_data
-
-        body_start_tag = "<body>"
-        body_end_tag = "</body>"
-        
-        idx_body_start = raw_data.find(body_start_tag)
-        if idx_body_start != -1:
-            idx_body_end = raw_data.find(body_end_tag, idx_body_start + len(body_start_tag))
-            if idx_body_end != -1:
-                data_to_parse = raw_data[idx_body_start + len(body_start_tag):idx_body_end].strip()
-        
-        parts = data_to_parse.split('#')
-        
-        if len(parts) == 3:
-            humidity = float(parts[0])
-            temperature = float(parts[1])
-            hex_value = parts[2]
-            return {"humidity": humidity, "temperature": temperature, "hex_value": hex_value}
-        else:
-            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip_for_log}] Error: Format data tidak sesuai. Diterima (setelah potensi ekstraksi HTML): '{data_to_parse}'")
-            return None
-    except requests.exceptions.Timeout:
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip_for_log}] Error: Timeout mengambil data dari {url}")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip_for_log}] Error mengambil data dari {url}: {e}")
-        return None
-    except ValueError as e:
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip_for_log}] Error mem-parsing nilai numerik dari data '{data_to_parse if 'data_to_parse' in locals() else raw_data}': {e}")
-        return None
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+        return await asyncio.wait_for(fetch_device_reading(http_client, device), timeout=remaining), False
+    except asyncio.TimeoutError:
+        log("Melewati batas tick, pembacaan dilewati", device["ip_address"])
+        return None, True
+
+
+async def poll_cycle(http_client, devices, backoff, spread_seconds=0.0, deadline=None):
+    """
+    Mengambil data dari semua perangkat yang tidak sedang dalam backoff secara bersamaan.
+    Permintaan disebar rata dalam `spread_seconds` pertama, dan perangkat yang belum selesai
+    pada `deadline` (jam monotonic) dilewati agar tidak menunda seluruh armada.
+    Mengembalikan (daftar Point untuk ditulis sebagai satu batch, ringkasan jumlah perangkat).
+    """
+    now = time.monotonic()
+    ready_devices = [device for device in devices if backoff.ready(device["ip_address"], now)]
+    summary = {"ok": 0, "failed": 0, "overrun": 0, "backoff": len(devices) - len(ready_devices)}
+    if summary["backoff"]:
+        log(f"{summary['backoff']} perangkat dilewati karena backoff")
+
+    offsets = spread_offsets(len(ready_devices), spread_seconds)
+    results = await asyncio.gather(*(
+        _poll_device(http_client, device, offset, deadline)
+        for device, offset in zip(ready_devices, offsets)
+    ))
+
+    points = []
+    now = time.monotonic()
+    for device, (reading, overrun) in zip(ready_devices, results):
+        if reading is None:
+            summary["overrun" if overrun else "failed"] += 1
+            delay = backoff.record_failure(device["ip_address"], now)
+            if delay:
+                log(f"Perangkat akan dicoba lagi dalam {delay:.0f} detik", device["ip_address"])
+            continue
+        summary["ok"] += 1
+        backoff.record_success(device["ip_address"])
+        points.append(build_point(device, reading))
+    return points, summary
+
+
+def build_tick_point(tick, summary):
+    """Membuat Point metrik satu tick (keterlambatan dan hasil polling) untuk pemantauan collector."""
+    point = Point("acquisition_ticks") \
+        .field("lateness_ms", round(tick.lateness * 1000, 3)) \
+        .field("skipped_ticks", tick.skipped)
+    for key, count in summary.items():
+        point = point.field(f"devices_{key}", count)
+    return point.time(int(tick.wall_time * 1_000_000_000), WritePrecision.NS)
+
+
+def _is_permanent_write_error(error):
+    """True jika InfluxDB menolak isi batch (cth: line protocol tidak valid), sehingga batch tidak perlu diulang."""
+    return isinstance(error, ApiException) and error.status in PERMANENT_WRITE_ERROR_STATUSES
+
+
+async def write_points(local_write_api, points, bucket, org, buffer=None):
+    """
+    Menulis semua Point satu siklus dalam satu request line protocol (batch) ke InfluxDB.
+    Write SYNCHRONOUS dijalankan di thread terpisah agar polling tidak terblokir.
+    Jika `buffer` diberikan, batch yang gagal ditulis disimpan di disk untuk diputar ulang oleh
+    drain_buffer. Selama buffer masih berisi data, batch baru langsung masuk buffer agar urutan
+    penulisan tetap terjaga.
+    """
+    if not points:
+        return
+    lines = [point.to_line_protocol() for point in points]
+    if buffer is not None and buffer.has_pending():
+        await asyncio.to_thread(buffer.append, lines)
+        log(f"{len(lines)} point ditambahkan ke buffer lokal ({buffer.pending_bytes()} bytes tertunda)")
+        return
+    if not local_write_api:
+        log("Error: write_api InfluxDB belum diinisialisasi.")
+        return
+    try:
+        await asyncio.to_thread(local_write_api.write, bucket=bucket, org=org, record=lines)
+        log(f"{len(lines)} point berhasil ditulis dalam satu batch")
     except Exception as e:
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip_for_log}] Error tidak diketahui saat memproses data dari {url}: {e}")
-        return None
-
-def process_single_device(device_info, local_write_api, bucket, org):
-    """Memproses satu perangkat: fetch, parse, dan write ke InfluxDB."""
-    device_url = device_info["url"]
-    device_ip = device_info["ip_address"] # Untuk logging
-    id_logger = device_info["id_logger"]
-    lokasi = device_info["lokasi"]
-
-    # print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip}] Memulai pengambilan data...")
-    parsed_data = fetch_and_parse_device_data(device_url, device_ip)
-    
-    if parsed_data:
-        point = Point("device_readings") \
-            .tag("device_ip", device_ip) \
-            .tag("id_logger", id_logger) \
-            .tag("lokasi", lokasi) \
-            .tag("source_url", device_url) \
-            .field("humidity", parsed_data["humidity"]) \
-            .field("temperature", parsed_data["temperature"]) \
-            .field("status_hex", parsed_data["hex_value"]) \
-            .time(time.time_ns(), WritePrecision.NS)
-        
+        log(f"Error menulis batch {len(lines)} data ke InfluxDB: {e}")
+        if buffer is not None and not _is_permanent_write_error(e):
+            await asyncio.to_thread(buffer.append, lines)
+            log(f"{len(lines)} point disimpan di buffer lokal untuk dikirim ulang")
+
+
+def replay_buffer(local_write_api, buffer, bucket, org):
+    """
+    Mengirim ulang isi buffer lokal dalam batch besar (REPLAY_BATCH_LINES baris per request).
+    Batch yang ditolak permanen oleh InfluxDB dibuang; kesalahan lain diteruskan agar segmen
+    tetap disimpan. Mengembalikan jumlah baris yang berhasil dikirim.
+    """
+    def write_batch(batch):
         try:
-            if local_write_api: # Pastikan write_api sudah diinisialisasi
-                local_write_api.write(bucket=bucket, org=org, record=point)
-                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip}] Data berhasil ditulis: {point.to_line_protocol()}")
-            else:
-                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip}] Error: write_api InfluxDB belum diinisialisasi.")
+            local_write_api.write(bucket=bucket, org=org, record=batch)
+        except ApiException as e:
+            if not _is_permanent_write_error(e):
+                raise
+            log(f"Error: batch buffer ditolak InfluxDB (status {e.status}) dan dibuang: {e.reason}")
+
+    return buffer.replay(write_batch, batch_lines=REPLAY_BATCH_LINES)
+
+
+async def drain_buffer(local_write_api, buffer, bucket, org):
+    """
+    Task latar belakang yang mengosongkan buffer lokal setelah InfluxDB kembali tersedia.
+    Percobaan yang gagal diulang dengan jeda berlipat dua (maksimum BACKOFF_MAX_SECONDS).
+    """
+    delay = POLL_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        if not buffer.has_pending():
+            delay = POLL_INTERVAL_SECONDS
+            continue
+        try:
+            sent = await asyncio.to_thread(replay_buffer, local_write_api, buffer, bucket, org)
+            log(f"Buffer lokal terkirim: {sent} point ditulis ulang ke InfluxDB")
+            delay = POLL_INTERVAL_SECONDS
         except Exception as e:
-            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip}] Error menulis ke InfluxDB: {e}")
-    # else: # Pesan error sudah dicetak oleh fetch_and_parse_device_data
-        # print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] [Device: {device_ip}] Gagal mendapatkan atau mem-parsing data.")
+            delay = min(delay * 2, BACKOFF_MAX_SECONDS)
+            log(f"InfluxDB belum tersedia untuk replay buffer ({buffer.pending_bytes()} bytes tertunda), "
+                f"dicoba lagi dalam {delay} detik: {e}")
+
+
+def create_http_client():
+    """Membuat connection pool HTTP asinkron bersama untuk semua perangkat."""
+    return httpx.AsyncClient(
+        # Waktu tunggu slot pool tidak dihitung sebagai timeout perangkat
+        timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, pool=POLL_INTERVAL_SECONDS),
+        limits=httpx.Limits(
+            max_connections=MAX_CONCURRENT_REQUESTS,
+            max_keepalive_connections=MAX_CONCURRENT_REQUESTS
+        )
+    )
+
+
+async def run_acquisition(devices, local_write_api, buffer=None):
+    """
+    Loop akuisisi utama: setiap tick (kelipatan POLL_INTERVAL_SECONDS) poll semua perangkat
+    dan tulis satu batch. Jadwal memakai jam monotonic sehingga durasi siklus tidak menggeser
+    tick berikutnya. Jika `buffer` diberikan, batch yang gagal ditulis disimpan di disk dan
+    dikirim ulang oleh task drain_buffer.
+    """
+    backoff = DeviceBackoff()
+    scheduler = TickScheduler(POLL_INTERVAL_SECONDS)
+    drainer = None
+    if buffer is not None:
+        drainer = asyncio.create_task(drain_buffer(local_write_api, buffer, INFLUX_BUCKET, INFLUX_ORG))
+    try:
+        async with create_http_client() as http_client:
+            while True:
+                tick = await scheduler.wait_next_tick()
+                deadline = tick.scheduled + POLL_INTERVAL_SECONDS - TICK_WRITE_MARGIN_SECONDS
+                points, summary = await poll_cycle(
+                    http_client, devices, backoff,
+                    spread_seconds=POLL_INTERVAL_SECONDS * SPREAD_FRACTION, deadline=deadline
+                )
+                points.append(build_tick_point(tick, summary))
+                await write_points(local_write_api, points, INFLUX_BUCKET, INFLUX_ORG, buffer)
+
+                log(f"--- Tick #{tick.number} selesai: terlambat {tick.lateness * 1000:.1f} ms, "
+                    f"dilompati {tick.skipped}, ok {summary['ok']}, gagal {summary['failed']}, "
+                    f"melewati batas {summary['overrun']}, backoff {summary['backoff']} ---")
+    finally:
+        if drainer:
+            drainer.cancel()
+
 
 if __name__ == "__main__":
     try:
-        # Inisialisasi klien InfluxDB dipindahkan ke sini agar bisa diakses global setelah pengecekan
-        client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG)
-        write_api = client.write_api(write_options=SYNCHRONOUS)
-        if not client.ping():
-            raise Exception("Koneksi ke InfluxDB gagal. Pastikan URL, Token, dan Org benar, dan InfluxDB berjalan.")
-        print(f"Berhasil terhubung ke InfluxDB di {INFLUX_URL}")
+        # Klien InfluxDB diambil dari pool bersama; batch line protocol dikirim dengan gzip
+        client = influxdb_pool.get_client(enable_gzip=WRITE_GZIP)
+        write_api = influxdb_pool.get_write_api()
+        if influxdb_pool.ping():
+            print(f"Berhasil terhubung ke InfluxDB di {influxdb_pool.INFLUXDB_URL}")
+        else:
+            # Akuisisi tetap berjalan; data disimpan di buffer lokal sampai InfluxDB tersedia
+            print(f"Warning: InfluxDB di {influxdb_pool.INFLUXDB_URL} belum dapat dihubungi. Data akan disimpan di '{BUFFER_DIR}'.")
 
         devices = load_devices(DEVICE_CSV_PATH)
         if not devices:
             print("Tidak ada perangkat untuk diproses. Skrip akan keluar.")
             exit()
-        
+
+        buffer = SegmentedWriteBuffer(BUFFER_DIR, max_bytes=BUFFER_MAX_MB * 1024 * 1024)
+        if buffer.has_pending():
+            print(f"Buffer lokal berisi {buffer.pending_bytes()} bytes data tertunda, akan dikirim ulang")
+
         print(f"Memulai akuisisi data dari {len(devices)} perangkat setiap {POLL_INTERVAL_SECONDS} detik...")
-        
-        while True:
-            threads = []
-            print(f"--- Memulai siklus polling {time.strftime('%Y-%m-%d %H:%M:%S')} ---")
-            for device in devices:
-                # Memberikan write_api yang sama ke semua thread karena sudah SYNCHRONOUS
-                thread = threading.Thread(target=process_single_device, args=(device, write_api, INFLUX_BUCKET, INFLUX_ORG))
-                threads.append(thread)
-                thread.start()
-            
-            for thread in threads:
-                thread.join() # Tunggu semua thread selesai untuk siklus ini
-            
-            print(f"--- Siklus polling selesai. Menunggu {POLL_INTERVAL_SECONDS} detik... ---")
-            time.sleep(POLL_INTERVAL_SECONDS)
+        asyncio.run(run_acquisition(devices, write_api, buffer))
 
     except KeyboardInterrupt:
         print("\nSkrip akuisisi dihentikan oleh pengguna.")
@@ -185,5 +339,5 @@ if __name__ == "__main__":
         print(f"Error utama dalam skrip: {e}")
     finally:
         if client:
-            client.close()
-            print("Koneksi InfluxDB ditutup.")
\ No newline at end of file
+            influxdb_pool.close_client()
+            print("Koneksi InfluxDB ditutup.")
@@ -7,7 +7,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 
 from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Response
 
 # Import services akan dilakukan di masing-masing endpoint untuk menghindari circular import
 # Services yang digunakan:
@@ -16,12 +16,19 @@ from fastapi import FastAPI, HTTPException, Query, Depends
 # - services.device_service: layanan untuk manajemen perangkat
 # - services.health_service: layanan untuk pemantauan kesehatan sistem
 from fastapi.middleware.cors import CORSMiddleware  # Tambahkan import CORS middleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import APIKeyHeader
 from influxdb_client import InfluxDBClient
 from influxdb_client.client.exceptions import InfluxDBError # Pastikan ini diimpor jika endpoint lain membutuhkannya
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
+from services import (
+    device_service, live_stream, optimal_range_service, prediction_service, query_gateway, rollup_service,
+    room_state_store
+)
+from utils import influxdb_pool
+
 # Muat variabel lingkungan dari file .env
 load_dotenv()
 
@@ -107,8 +114,12 @@ app.include_router(analysis_router)
 from routes.external_routes import router as external_router
 app.include_router(external_router)
 
+# Tambahkan router untuk stream langsung (SSE/WebSocket)
+from routes.stream_routes import router as stream_router
+app.include_router(stream_router)
+
 # Tambahkan enhanced API router untuk digital twin visualization
-from enhanced_api import get_enhanced_router
+from enhanced_api import building_overview_store, get_enhanced_router
 enhanced_router = get_enhanced_router()
 app.include_router(enhanced_router)
 
@@ -130,17 +141,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Cursor pagination /data/
 )
 
 influx_client: Optional[InfluxDBClient] = None
 query_api = None
+rollup_setup_task: Optional[asyncio.Future] = None
 
 @app.on_event("startup")
 async def startup_event():
-    global influx_client, query_api
+    global influx_client, query_api, rollup_setup_task
     try:
-        influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-        query_api = influx_client.query_api()
+        # Gunakan client dari pool bersama agar API dan service berbagi koneksi HTTP yang sama
+        influx_client = influxdb_pool.get_client()
+        query_api = influxdb_pool.get_query_api()
         # Pindahkan pengecekan ping ke endpoint health check atau tempat yang lebih sesuai jika diperlukan pengecekan berkala
         # if influx_client.ping():
         #     logger.info("Berhasil terhubung ke InfluxDB.")
@@ -151,6 +165,17 @@ async def startup_event():
         # Cukup inisialisasi, biarkan endpoint health check yang melakukan ping aktif
         logger.info("InfluxDB client initialized. Connection status will be checked by health endpoint or on first query.")
 
+        # Siapkan task rollup di background agar startup tidak menunggu backfill; cakupan dimuat ulang berkala
+        rollup_setup_task = asyncio.ensure_future(rollup_service.run_rollup_maintenance())
+
+        # Pemeriksaan keterjangkauan perangkat berjalan di background; endpoint membaca snapshot
+        device_service.prober.start()
+        room_state_store.room_store.start()
+        optimal_range_service.optimal_range_tracker.start()
+        building_overview_store.start()
+        live_stream.broadcaster.start()
+        prediction_service.forecaster.start()
+
     except Exception as e:
         logger.error(f"Error saat inisialisasi koneksi InfluxDB: {e}", exc_info=True)
         influx_client = None
@@ -158,8 +183,17 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if rollup_setup_task is not None and not rollup_setup_task.done():
+        rollup_setup_task.cancel()
+    device_service.prober.stop()
+    room_state_store.room_store.stop()
+    optimal_range_service.optimal_range_tracker.stop()
+    building_overview_store.stop()
+    live_stream.broadcaster.stop()
+    prediction_service.forecaster.stop()
+    query_gateway.shutdown_gateway()
     if influx_client:
-        influx_client.close()
+        influxdb_pool.close_client()
         logger.info("Koneksi InfluxDB ditutup.")
 
 def get_query_api():
@@ -207,38 +241,15 @@ async def list_devices(api_key: str = Depends(get_api_key)): # Ditambahkan api_k
     Mengambil daftar perangkat unik (device_id dan lokasi terakhir yang diketahui) dari bucket InfluxDB.
     Memerlukan autentikasi API Key.
     """
-    q_api = get_query_api()
-    
-    flux_query_ids = f'''
-        import "influxdata/influxdb/schema"
-        schema.tagValues(bucket: "{INFLUXDB_BUCKET}", tag: "device_id", start: -90d)
-    '''
+    from services.device_registry_service import list_devices_with_location
+
+    get_query_api()  # 503 jika pool InfluxDB gagal dibuat saat startup
     try:
-        logger.debug(f"Menjalankan Flux query untuk device ID: {flux_query_ids}")
-        tables_ids = q_api.query(query=flux_query_ids)
-        unique_device_ids = [row.values["_value"] for table in tables_ids for row in table.records]
-        
-        devices_with_location = []
-        # TODO: Optimasi: Query ini dapat menyebabkan N+1 problem. Pertimbangkan untuk menggabungkannya menjadi satu query Flux jika memungkinkan.
-        for dev_id in unique_device_ids:
-            flux_query_loc = f'''
-                from(bucket: "{INFLUXDB_BUCKET}")
-                  |> range(start: -90d)
-                  |> filter(fn: (r) => r.device_id == "{dev_id}" and exists r.location)
-                  |> keep(columns: ["location", "_time"])
-                  |> sort(columns: ["_time"], desc: true)
-                  |> limit(n: 1)
-                  |> yield(name: "last_location")
-            '''
-            logger.debug(f"Menjalankan Flux query untuk lokasi device {dev_id}: {flux_query_loc}")
-            tables_loc = q_api.query(query=flux_query_loc)
-            location = "N/A" # Default jika tidak ada lokasi
-            if tables_loc and tables_loc[0].records: # Periksa apakah ada record
-                location = tables_loc[0].records[0].values["location"]
-            devices_with_location.append({"device_id": dev_id, "location": location})
-        
-        return devices_with_location
+        # Satu query last() per device_id, di-cache dan di-refresh inkremental dari watermark
+        return await list_devices_with_location()
 
+    except HTTPException:
+        raise
     except InfluxDBError as e:
         logger.error(f"InfluxDBError saat query perangkat: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Gagal query perangkat dari InfluxDB: {e.message}")
@@ -249,6 +260,7 @@ async def list_devices(api_key: str = Depends(get_api_key)): # Ditambahkan api_k
 
 @app.get("/data/", summary="Ambil data sensor dengan opsi agregasi", response_model=List[Dict[str, Any]])
 async def get_sensor_data(
+    response: Response,
     start_time: Optional[datetime] = Query(None, description="Waktu mulai (format ISO, cth: 2023-01-01T00:00:00Z). Default: 1 jam terakhir."),
     end_time: Optional[datetime] = Query(None, description="Waktu selesai (format ISO, cth: 2023-01-01T01:00:00Z). Default: sekarang."),
     device_ids: Optional[List[str]] = Query(None, description="Daftar ID perangkat untuk difilter"),
@@ -258,18 +270,62 @@ async def get_sensor_data(
     measurement_name: str = Query("sensor_reading", description="Nama measurement di InfluxDB"),
     aggregate_window: Optional[str] = Query(None, description="Jendela agregasi (cth: '1h', '10m', '1d'). Memerlukan aggregate_function."),
     aggregate_function: Optional[str] = Query(None, description=f"Fungsi agregasi (cth: {', '.join(ALLOWED_AGGREGATE_FUNCTIONS)}). Memerlukan aggregate_window."),
+    export_format: str = Query("json", alias="format", description="Format respons: 'json' (default), atau 'ndjson'/'csv' untuk ekspor streaming tanpa batas `limit`"),
+    page_size: Optional[int] = Query(None, ge=1, le=5000, description="Aktifkan pagination keyset dengan ukuran halaman ini (menggantikan `limit`). Cursor halaman berikutnya dikirim di header X-Next-Cursor."),
+    cursor: Optional[str] = Query(None, description="Cursor dari header X-Next-Cursor halaman sebelumnya. Gunakan filter yang sama dengan halaman pertama."),
     api_key: str = Depends(get_api_key)
 ):
     """
     Mengambil data sensor (suhu, kelembaban, dll.) dari InfluxDB.
     Memungkinkan filter berdasarkan rentang waktu, ID perangkat, lokasi, dan kolom data tertentu.
     Mendukung agregasi data menggunakan `aggregate_window` dan `aggregate_function`.
+    Dengan `format=ndjson` atau `format=csv`, seluruh data dalam rentang waktu dikirim sebagai
+    stream (untuk ekspor/audit) dan `limit` diabaikan. Pada CSV, kolom baru di tengah stream
+    memulai blok baru (baris kosong lalu header dengan gabungan kolom).
+    Dengan `page_size` (dan `cursor` untuk halaman berikutnya), data diurutkan berdasarkan waktu
+    dan kunci seri lalu dikembalikan per halaman; header X-Next-Cursor tidak ada di halaman terakhir.
     Memerlukan autentikasi API Key.
     """
     # Import service
     from services.data_service import get_sensor_data as data_service_get_sensor_data
+    from services.data_service import DEFAULT_PAGE_SIZE, EXPORT_FORMATS, get_sensor_data_page, stream_sensor_data
     
     try:
+        if export_format != "json":
+            content = await stream_sensor_data(
+                start_time=start_time,
+                end_time=end_time,
+                device_ids=device_ids,
+                locations=locations,
+                fields=fields,
+                measurement_name=measurement_name,
+                aggregate_window=aggregate_window,
+                aggregate_function=aggregate_function,
+                export_format=export_format
+            )
+            return StreamingResponse(
+                content,
+                media_type=EXPORT_FORMATS[export_format],
+                headers={"Content-Disposition": f'attachment; filename="sensor_data.{export_format}"'}
+            )
+
+        if page_size is not None or cursor:
+            rows, next_cursor = await get_sensor_data_page(
+                start_time=start_time,
+                end_time=end_time,
+                device_ids=device_ids,
+                locations=locations,
+                fields=fields,
+                page_size=page_size or DEFAULT_PAGE_SIZE,
+                measurement_name=measurement_name,
+                aggregate_window=aggregate_window,
+                aggregate_function=aggregate_function,
+                cursor=cursor
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return rows
+
         # Panggil fungsi service layer
         return await data_service_get_sensor_data(
             start_time=start_time,
@@ -296,12 +352,16 @@ async def get_sensor_data(
 @app.get("/system/devices_status/", response_model=Dict[str, Any], include_in_schema=False) # Alias for compatibility with frontend
 async def get_device_status(api_key: str = Depends(get_api_key)):
     """
-    Menampilkan daftar semua perangkat dengan status aktif atau tidak aktif berdasarkan pemeriksaan ping terakhir.
+    Menampilkan daftar semua perangkat dengan status aktif atau tidak aktif dari snapshot prober
+    background (services/device_prober.py). Prober melakukan TCP connect ke port HTTP perangkat
+    (DEVICE_PROBE_PORT, default 80) setiap DEVICE_PROBE_INTERVAL_SECONDS (default 30 detik);
+    endpoint ini hanya membaca snapshot terakhir dan tidak memicu pemeriksaan baru.
     Memerlukan autentikasi API Key.
     
-    - Status aktif (true) jika perangkat merespons ping
-    - Status tidak aktif (false) jika perangkat tidak merespons ping
-    - Waktu terakhir diperiksa menunjukkan kapan ping terakhir dilakukan
+    - Status aktif (true) jika koneksi TCP berhasil atau ditolak (host terjangkau) dalam batas waktu
+    - Status tidak aktif (false) jika koneksi TCP timeout atau host tidak terjangkau
+    - last_checked: waktu pemeriksaan TCP terakhir perangkat; last_refresh_time: waktu snapshot diperbarui
+    - last_seen, rtt_ms, dan flaps_last_hour: terakhir terjangkau, waktu connect, dan jumlah perubahan status
     """
     # Import service
     from services.device_service import get_device_status as device_service_get_status
@@ -323,6 +383,31 @@ async def get_device_status(api_key: str = Depends(get_api_key)):
         logger.error(f"Error tak terduga saat mengambil status perangkat: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Terjadi kesalahan internal server saat mengambil status perangkat.")
 
+@app.get("/system/device_liveness/", response_model=Dict[str, Any], summary="Status liveness perangkat berdasarkan kesegaran data")
+async def get_device_liveness(api_key: str = Depends(get_api_key)):
+    """
+    Menampilkan status setiap perangkat berdasarkan waktu data terakhir yang ditulis ke InfluxDB.
+    Memerlukan autentikasi API Key.
+    
+    - active: data terakhir lebih baru dari DEVICE_STALE_AFTER_SECONDS
+    - stale: perangkat pernah mengirim data tetapi datanya sudah usang
+    - missing: perangkat ada di device_list.csv tetapi belum pernah mengirim data
+    """
+    from services.liveness_service import DEVICE_STALE_AFTER_SECONDS, get_device_liveness as liveness_service_get
+
+    try:
+        snapshot = await liveness_service_get()
+        return {
+            "devices": snapshot.devices,
+            "counts": snapshot.counts,
+            "stale_after_seconds": DEVICE_STALE_AFTER_SECONDS,
+            "generated_at": snapshot.generated_at,
+            "up_to_date": snapshot.up_to_date
+        }
+    except Exception as e:
+        logger.error(f"Error tak terduga saat mengambil liveness perangkat: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Terjadi kesalahan internal server saat mengambil liveness perangkat.")
+
 @app.get("/stats/temperature/", summary="Dapatkan statistik suhu dari seluruh perangkat", response_model=Dict[str, Any])
 async def get_temperature_stats(
     start_time: Optional[datetime] = Query(None, description="Waktu mulai (format ISO, cth: 2023-01-01T00:00:00Z). Default: 24 jam terakhir."),
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark parser payload logger: implementasi lama berbasis str vs utils/payload_parser (bytes)
+
+Memutar ulang payload hasil tangkapan (satu payload per baris, cth: hasil
+`curl -s http://10.6.0.2/ >> payloads.txt`) atau payload sintetis jika file tidak diberikan,
+lalu membandingkan waktu parse per payload dan memastikan hasil keduanya sama. Parser bytes
+tidak ditujukan lebih cepat: rasio sekitar 1x berarti validasi tambahan tidak menambah biaya.
+
+Penggunaan:
+    python benchmark_payload_parser.py [--payloads payloads.txt] [--count 10000] [--repeat 20]
+"""
+
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List, Optional
+
+from utils.payload_parser import PayloadParseError, parse_payload
+
+
+def legacy_parse_device_payload(content: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Salinan parser `acquire_device_data` sebelum parser bytes (termasuk decode `response.text`),
+    sebagai pembanding. Mengembalikan None untuk payload tidak valid.
+    """
+    raw_data = content.decode("utf-8").strip()
+    data_to_parse = raw_data
+    idx_body_start = raw_data.find("<body>")
+    if idx_body_start != -1:
+        idx_body_end = raw_data.find("</body>", idx_body_start + len("<body>"))
+        if idx_body_end != -1:
+            data_to_parse = raw_data[idx_body_start + len("<body>"):idx_body_end].strip()
+    parts = data_to_parse.split('#')
+    if len(parts) != 3:
+        return None
+    try:
+        return {"humidity": float(parts[0]), "temperature": float(parts[1]), "hex_value": parts[2]}
+    except ValueError:
+        return None
+
+
+def bytes_parse_device_payload(content: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        return parse_payload(content)
+    except PayloadParseError:
+        return None
+
+
+def load_payloads(path: str) -> List[bytes]:
+    """
+    Membaca payload tangkapan, satu payload per baris (baris kosong dilewati)
+    """
+    with open(path, "rb") as handle:
+        return [line.rstrip(b"\r\n") for line in handle if line.strip()]
+
+
+def generate_payloads(count: int, seed: int = 42) -> List[bytes]:
+    """
+    Membuat payload sintetis: campuran format polos, terbungkus HTML, dan sebagian kecil rusak
+    """
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        body = f"{rng.uniform(30, 90):.1f}#{rng.uniform(18, 32):.2f}#2D30{i % 256:02X}"
+        kind = rng.random()
+        if kind < 0.5:
+            payloads.append(body.encode())
+        elif kind < 0.98:
+            payloads.append(f"<meta charset='utf-8'><body>{body}</body>".encode())
+        else:
+            payloads.append(body.rsplit("#", 1)[0].encode())
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser payload logger lama vs bytes")
+    parser.add_argument("--payloads", help="File payload tangkapan (satu payload per baris)")
+    parser.add_argument("--count", type=int, default=10000, help="Jumlah payload sintetis jika --payloads tidak diberikan")
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah pengulangan pengukuran")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else generate_payloads(args.count)
+
+    def run_legacy():
+        return [legacy_parse_device_payload(payload) for payload in payloads]
+
+    def run_bytes():
+        return [bytes_parse_device_payload(payload) for payload in payloads]
+
+    mismatches = sum(a != b for a, b in zip(run_legacy(), run_bytes()))
+    invalid = sum(result is None for result in run_bytes())
+
+    legacy_time = min(timeit.repeat(run_legacy, number=1, repeat=args.repeat))
+    bytes_time = min(timeit.repeat(run_bytes, number=1, repeat=args.repeat))
+
+    print(f"Payload: {len(payloads)} ({invalid} tidak valid)")
+    print(f"Parser lama (str)     : {legacy_time / len(payloads) * 1e6:8.3f} µs/payload")
+    print(f"payload_parser (bytes): {bytes_time / len(payloads) * 1e6:8.3f} µs/payload")
+    print(f"Rasio waktu lama/bytes: {legacy_time / bytes_time:8.2f}x")
+    print(f"Hasil berbeda         : {mismatches} dari {len(payloads)} payload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Micro-benchmark analitik tren: implementasi lama per seri vs services/trend_analytics (batch)
+
+Menjalankan analisis untuk N ruangan × T titik waktu dengan data sintetis, lalu
+membandingkan waktu eksekusi dan memastikan hasil keduanya sama.
+
+Penggunaan:
+    python benchmark_trend_analytics.py [--rooms 12] [--points 720] [--repeat 20]
+"""
+
+import argparse
+import timeit
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from services.trend_analytics import analyze_trends, to_padded_matrix
+
+
+def legacy_calculate_trend_analysis(values: List[float], period: str) -> Dict[str, Any]:
+    """
+    Salinan `trend_service._calculate_trend_analysis` sebelum vektorisasi, sebagai pembanding
+    """
+    if not values or len(values) < 2:
+        return {"trend_direction": "insufficient_data", "slope": 0, "correlation": 0,
+                "moving_averages": [], "volatility": 0, "anomalies": []}
+
+    values_array = np.array(values)
+    x = np.arange(len(values))
+    slope = float(np.polyfit(x, values_array, 1)[0])
+    correlation = float(np.corrcoef(x, values_array)[0, 1]) if len(values) > 1 else 0
+
+    if abs(slope) < 0.01:
+        trend_direction = "stable"
+    elif slope > 0:
+        trend_direction = "increasing"
+    else:
+        trend_direction = "decreasing"
+
+    window_size = min(3, len(values) - 1) if period == "hourly" else min(7, len(values) - 1)
+    if window_size > 0:
+        moving_avg = pd.Series(values).rolling(window=window_size).mean().dropna().tolist()
+        moving_avg = [round(v, 1) for v in moving_avg]
+    else:
+        moving_avg = []
+
+    volatility = float(np.std(values_array))
+    mean_val = np.mean(values_array)
+    std_val = np.std(values_array)
+    anomaly_threshold = 2 * std_val
+
+    anomalies = []
+    for i, val in enumerate(values):
+        if abs(val - mean_val) > anomaly_threshold:
+            anomalies.append({"index": i, "value": round(val, 1), "deviation": round(abs(val - mean_val), 1)})
+
+    return {
+        "trend_direction": trend_direction,
+        "slope": round(slope, 4),
+        "correlation": round(correlation, 3),
+        "moving_averages": moving_avg,
+        "volatility": round(volatility, 2),
+        "anomalies": anomalies,
+        "statistics": {
+            "mean": round(float(np.mean(values_array)), 1),
+            "median": round(float(np.median(values_array)), 1),
+            "std": round(float(np.std(values_array)), 2),
+            "min": round(float(np.min(values_array)), 1),
+            "max": round(float(np.max(values_array)), 1),
+            "q25": round(float(np.percentile(values_array, 25)), 1),
+            "q75": round(float(np.percentile(values_array, 75)), 1)
+        }
+    }
+
+
+def generate_series(rooms: int, points: int, seed: int = 42) -> List[List[float]]:
+    """
+    Membuat data suhu sintetis per ruangan dengan tren, siklus harian, derau, dan lonjakan
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(points)
+    series = []
+    for _ in range(rooms):
+        values = (22 + rng.normal(0, 0.5) + t * rng.normal(0, 0.002)
+                  + 1.5 * np.sin(2 * np.pi * t / 24) + rng.normal(0, 0.3, points))
+        values[rng.integers(0, points, 3)] += 6
+        series.append([float(v) for v in np.round(values, 2)])
+    return series
+
+
+def _results_match(legacy: Dict[str, Any], batch: Dict[str, Any]) -> bool:
+    """
+    Membandingkan hasil dengan toleransi satu digit terakhir pembulatan
+    (polyfit/rolling pandas dan jumlah langsung dapat berbeda di nilai .x5)
+    """
+    legacy, batch = dict(legacy), dict(batch)
+    legacy_ma, batch_ma = legacy.pop("moving_averages"), batch.pop("moving_averages")
+    legacy_slope, batch_slope = legacy.pop("slope"), batch.pop("slope")
+    return (
+        legacy == batch
+        and abs(legacy_slope - batch_slope) <= 1.0001e-4
+        and len(legacy_ma) == len(batch_ma)
+        and all(abs(a - b) <= 0.10001 for a, b in zip(legacy_ma, batch_ma))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analitik tren lama vs tervektorisasi")
+    parser.add_argument("--rooms", type=int, default=12, help="Jumlah ruangan (seri)")
+    parser.add_argument("--points", type=int, default=720, help="Jumlah titik per seri (720 = 30 hari per jam)")
+    parser.add_argument("--repeat", type=int, default=20, help="Jumlah pengulangan pengukuran")
+    parser.add_argument("--period", default="hourly", choices=["hourly", "daily", "monthly"])
+    args = parser.parse_args()
+
+    series = generate_series(args.rooms, args.points)
+
+    def run_legacy():
+        return [legacy_calculate_trend_analysis(values, args.period) for values in series]
+
+    def run_batch():
+        return analyze_trends(to_padded_matrix(series), args.period)
+
+    mismatches = sum(not _results_match(a, b) for a, b in zip(run_legacy(), run_batch()))
+
+    legacy_time = min(timeit.repeat(run_legacy, number=1, repeat=args.repeat))
+    batch_time = min(timeit.repeat(run_batch, number=1, repeat=args.repeat))
+
+    print(f"Seri: {args.rooms} ruangan × {args.points} titik ({args.period})")
+    print(f"Implementasi lama (per seri) : {legacy_time * 1000:8.2f} ms")
+    print(f"trend_analytics (batch)      : {batch_time * 1000:8.2f} ms")
+    print(f"Percepatan                   : {legacy_time / batch_time:8.1f}x")
+    print(f"Hasil berbeda                : {mismatches} dari {len(series)} seri")
+
+
+if __name__ == "__main__":
+    main()
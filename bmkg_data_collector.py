@@ -1,17 +1,15 @@
 import requests
 import schedule
 import time
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import Point, WritePrecision
 from datetime import datetime
 import os # Ditambahkan untuk membaca environment variables
 
+from utils import influxdb_pool
+
 # --- Konfigurasi InfluxDB ---
-# Mengambil konfigurasi dari environment variables, 
-# dengan fallback ke nilai default jika variabel tidak diset.
-INFLUXDB_URL = os.getenv("INFLUXDB_URL", "http://localhost:8086")
-INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "th1s_1s_a_v3ry_s3cur3_4nd_l0ng_4dm1n_t0k3n_f0r_d3v") 
-INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "iot_project_alpha")    
+# URL, token, dan org diambil dari environment oleh utils/influxdb_pool.py.
+# Bucket tetap dikonfigurasi di sini dengan fallback ke nilai default.
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET", "sensor_data_primary")
 
 # --- Konfigurasi BMKG API ---
@@ -149,10 +147,10 @@ def process_and_write_data(raw_data):
 
 
         if points_to_write:
-            with InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG) as client:
-                write_api = client.write_api(write_options=SYNCHRONOUS)
-                write_api.write(bucket=INFLUXDB_BUCKET, record=points_to_write)
-                print(f"Successfully wrote {len(points_to_write)} points to InfluxDB for {KODE_WILAYAH}.")
+            # Gunakan write API dari pool bersama, bukan client baru per penulisan
+            write_api = influxdb_pool.get_write_api()
+            write_api.write(bucket=INFLUXDB_BUCKET, record=points_to_write)
+            print(f"Successfully wrote {len(points_to_write)} points to InfluxDB for {KODE_WILAYAH}.")
         else:
             print("No valid points to write to InfluxDB.")
 
@@ -176,6 +174,9 @@ if __name__ == "__main__":
     # Anda juga bisa menggunakan interval lain, misal:
     # schedule.every(1).minutes.do(job) # Untuk testing
 
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        influxdb_pool.close_client()
\ No newline at end of file
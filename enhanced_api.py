@@ -10,9 +10,14 @@ import random
 from datetime import datetime, timedelta
 import asyncio
 
+from services.building_overview import BuildingOverviewStore
+from services.prediction_service import forecaster
+
 # Router untuk enhanced endpoints
 enhanced_router = APIRouter(prefix="/enhanced", tags=["enhanced"])
 
+ROOM_IDS = ['F2', 'F3', 'F4', 'F5', 'F6', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7', 'G8']
+
 def generate_room_conditions(room_id: str) -> Dict[str, Any]:
     """Generate realistic room environmental conditions"""
     
@@ -186,107 +191,46 @@ async def get_enhanced_room_data(room_id: str):
         }
     }
 
+def build_room_overview(room_id: str) -> Dict[str, Any]:
+    """Build the compact overview entry of one room (heat map and building overview)"""
+    
+    conditions = generate_room_conditions(room_id)
+    devices = generate_device_status(room_id)
+    sensor = generate_sensor_status(room_id)
+    health = calculate_room_health_score(conditions, devices, sensor)
+    
+    return {
+        "id": room_id,
+        "currentConditions": conditions,
+        "deviceCount": {
+            "total": len(devices),
+            "active": sum(1 for d in devices if d["status"] == "active")
+        },
+        "sensorStatus": sensor["status"],
+        "healthScore": health,
+        "lastUpdate": datetime.now().isoformat()
+    }
+
+async def load_rooms_overview(room_ids: List[str]) -> List[Dict[str, Any]]:
+    """Load overview entries for the given rooms"""
+    return [build_room_overview(room_id) for room_id in room_ids]
+
+# Materialized view: refreshed in the background, endpoints serve the precomputed documents
+building_overview_store = BuildingOverviewStore(ROOM_IDS, loader=load_rooms_overview)
+
 @enhanced_router.get("/rooms/overview")
 async def get_all_rooms_overview():
     """
     Get overview data for all rooms - useful for heat map visualization
     """
-    
-    valid_rooms = ['F2', 'F3', 'F4', 'F5', 'F6', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7', 'G8']
-    rooms_data = {}
-    
-    for room_id in valid_rooms:
-        conditions = generate_room_conditions(room_id)
-        devices = generate_device_status(room_id)
-        sensor = generate_sensor_status(room_id)
-        health = calculate_room_health_score(conditions, devices, sensor)
-        
-        rooms_data[room_id] = {
-            "id": room_id,
-            "currentConditions": conditions,
-            "deviceCount": {
-                "total": len(devices),
-                "active": sum(1 for d in devices if d["status"] == "active")
-            },
-            "sensorStatus": sensor["status"],
-            "healthScore": health,
-            "lastUpdate": datetime.now().isoformat()
-        }
-    
-    return {
-        "timestamp": datetime.now().isoformat(),
-        "totalRooms": len(valid_rooms),
-        "rooms": rooms_data
-    }
+    return await building_overview_store.get_rooms_document()
 
 @enhanced_router.get("/system/building-overview")
 async def get_building_overview():
     """
     Get building-wide overview including floor statistics
     """
-    
-    rooms_data = await get_all_rooms_overview()
-    rooms = rooms_data["rooms"]
-    
-    # Calculate floor statistics
-    floor_f_rooms = [r for r in rooms.values() if r["id"].startswith("F")]
-    floor_g_rooms = [r for r in rooms.values() if r["id"].startswith("G")]
-    
-    def calculate_floor_stats(floor_rooms):
-        if not floor_rooms:
-            return {"avgTemp": 0, "avgHumidity": 0, "activeDevices": 0, "totalDevices": 0}
-            
-        avg_temp = sum(r["currentConditions"]["temperature"] for r in floor_rooms) / len(floor_rooms)
-        avg_humidity = sum(r["currentConditions"]["humidity"] for r in floor_rooms) / len(floor_rooms)
-        active_devices = sum(r["deviceCount"]["active"] for r in floor_rooms)
-        total_devices = sum(r["deviceCount"]["total"] for r in floor_rooms)
-        
-        return {
-            "avgTemp": round(avg_temp, 1),
-            "avgHumidity": round(avg_humidity, 1),
-            "activeDevices": active_devices,
-            "totalDevices": total_devices,
-            "deviceEfficiency": round((active_devices / total_devices) * 100, 1) if total_devices > 0 else 0
-        }
-    
-    # Calculate overall building stats
-    all_temps = [r["currentConditions"]["temperature"] for r in rooms.values()]
-    all_humidity = [r["currentConditions"]["humidity"] for r in rooms.values()]
-    all_scores = [r["healthScore"]["overallScore"] for r in rooms.values()]
-    
-    critical_rooms = [r["id"] for r in rooms.values() if r["healthScore"]["status"] == "critical"]
-    warning_rooms = [r["id"] for r in rooms.values() if r["healthScore"]["status"] == "warning"]
-    optimal_rooms = [r["id"] for r in rooms.values() if r["healthScore"]["status"] == "optimal"]
-    
-    return {
-        "timestamp": datetime.now().isoformat(),
-        "buildingStats": {
-            "totalRooms": len(rooms),
-            "avgTemperature": round(sum(all_temps) / len(all_temps), 1),
-            "avgHumidity": round(sum(all_humidity) / len(all_humidity), 1),
-            "avgHealthScore": round(sum(all_scores) / len(all_scores), 1),
-            "temperatureRange": {
-                "min": round(min(all_temps), 1),
-                "max": round(max(all_temps), 1)
-            },
-            "humidityRange": {
-                "min": round(min(all_humidity), 1),
-                "max": round(max(all_humidity), 1)
-            }
-        },
-        "floorStats": {
-            "F": calculate_floor_stats(floor_f_rooms),
-            "G": calculate_floor_stats(floor_g_rooms)
-        },
-        "alertSummary": {
-            "critical": len(critical_rooms),
-            "warning": len(warning_rooms),
-            "optimal": len(optimal_rooms),
-            "criticalRooms": critical_rooms,
-            "warningRooms": warning_rooms
-        },
-        "rooms": rooms
-    }
+    return await building_overview_store.get_document()
 
 @enhanced_router.get("/predictions/{room_id}")
 async def get_room_predictions(
@@ -301,39 +245,11 @@ async def get_room_predictions(
     if room_id not in valid_rooms:
         raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
     
-    # Get current conditions
-    current_data = await get_enhanced_room_data(room_id)
-    current_temp = current_data["currentConditions"]["temperature"]
-    current_humidity = current_data["currentConditions"]["humidity"]
-    
-    predictions = []
-    
-    for hour in range(1, hours + 1):
-        # Simple prediction with trend and some randomness
-        temp_trend = random.uniform(-0.2, 0.2) * hour
-        humidity_trend = random.uniform(-0.5, 0.5) * hour
-        
-        predicted_temp = current_temp + temp_trend + random.uniform(-0.5, 0.5)
-        predicted_humidity = current_humidity + humidity_trend + random.uniform(-1, 1)
-        
-        # Keep within reasonable bounds
-        predicted_temp = max(18, min(26, predicted_temp))
-        predicted_humidity = max(35, min(65, predicted_humidity))
-        
-        predictions.append({
-            "timestamp": (datetime.now() + timedelta(hours=hour)).isoformat(),
-            "hoursAhead": hour,
-            "temperature": round(predicted_temp, 1),
-            "humidity": round(predicted_humidity, 1),
-            "confidence": round(max(50, 95 - hour * 3), 1)  # Confidence decreases over time
-        })
-    
-    return {
-        "roomId": room_id,
-        "currentConditions": current_data["currentConditions"],
-        "predictions": predictions,
-        "generatedAt": datetime.now().isoformat()
-    }
+    # Forecasts are precomputed in the background from the best saved ML model
+    prediction = await forecaster.get_forecast(room_id, hours)
+    if prediction is None:
+        raise HTTPException(status_code=503, detail=f"Predictions for room {room_id} are not available yet (no trained model or recent data)")
+    return prediction
 
 # Export untuk diintegrasikan dengan main API
 def get_enhanced_router():
@@ -17,11 +17,12 @@ from .humidity import (
     get_min_humidity_last_hour_query,
     get_max_humidity_last_hour_query
 )
-from .environmental import get_environmental_stats_query
+from .environmental import get_environmental_stats_query, get_stats_bundle_query
 from .data import (
     get_sensor_data_query as get_general_sensor_data_query,
     get_unique_devices_query,
-    get_device_history_query
+    get_device_history_query,
+    get_device_last_seen_query
 )
 
 __all__ = [
@@ -40,9 +41,11 @@ __all__ = [
     
     # Environmental queries
     'get_environmental_stats_query',
+    'get_stats_bundle_query',
     
     # General data queries
     'get_general_sensor_data_query',
     'get_unique_devices_query',
     'get_device_history_query',
+    'get_device_last_seen_query',
 ]
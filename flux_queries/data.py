@@ -14,17 +14,19 @@ def get_sensor_data_query(bucket, range_filter_str, filter_expression, aggregati
         filter_expression (str): Ekspresi filter untuk memfilter data
         aggregation_str (str, optional): String agregasi. Default ke string kosong.
         limit (int, optional): Batas jumlah data yang dikembalikan. Default ke 100.
+            None untuk mengambil seluruh data dalam rentang (mode ekspor streaming).
         
     Returns:
         str: Query Flux lengkap
     """
+    limit_str = f"|> limit(n: {limit})" if limit is not None else ""
     return f'''
         from(bucket: "{bucket}")
           |> range({range_filter_str})
           |> filter(fn: (r) => {filter_expression})
           {aggregation_str} 
           |> pivot(rowKey:["_time", "device_id", "location", "source_ip", "hex_id_from_data"], columnKey: ["_field"], valueColumn: "_value")
-          |> limit(n: {limit}) 
+          {limit_str} 
     '''
 
 
@@ -79,3 +81,28 @@ def get_device_history_query(bucket, device_id, lookback_period="-7d", field="te
           |> aggregateWindow(every: 1h, fn: mean, createEmpty: false)
           |> yield(name: "mean")
     '''
+
+
+def get_device_last_seen_query(bucket, start="-90d"):
+    """
+    Menghasilkan kueri Flux untuk mendapatkan titik data terakhir setiap perangkat dalam satu query.
+    `last()` dijalankan per seri (dapat di-pushdown ke storage InfluxDB) lalu hasilnya
+    dikelompokkan per device_id, sehingga hasilnya hanya beberapa baris per perangkat.
+
+    Args:
+        bucket (str): Nama bucket InfluxDB
+        start (str, optional): Awal rentang waktu, relatif (cth: "-90d") atau RFC3339 absolut
+            untuk refresh inkremental. Default ke "-90d".
+
+    Returns:
+        str: Query Flux lengkap
+    """
+    return f'''
+        from(bucket: "{bucket}")
+          |> range(start: {start})
+          |> filter(fn: (r) => exists r.device_id)
+          |> last()
+          |> group(columns: ["device_id"])
+          |> keep(columns: ["_time", "device_id", "location"])
+          |> yield(name: "device_last_seen")
+    '''
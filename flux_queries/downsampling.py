@@ -0,0 +1,245 @@
+"""
+Flux queries untuk downsampling (rollup) data sensor
+Berisi definisi task InfluxDB yang memelihara bucket rollup 1m/1h/1d serta kueri
+yang membaca rollup tersebut. Setiap titik rollup menyimpan field asli (temperature,
+humidity) dengan tag `agg` bernilai mean/min/max/count dan di-timestamp pada awal interval.
+"""
+
+from typing import Optional, Sequence
+
+ROLLUP_MEASUREMENT = "sensor_reading"
+ROLLUP_FIELDS = ("temperature", "humidity")
+ROLLUP_AGGREGATES = ("mean", "min", "max", "count")
+# Penggabung khusus untuk mean: rata-rata mean rollup dibobot count masing-masing titik
+WEIGHTED_MEAN = "weighted_mean"
+
+
+def _rollup_body(source_bucket: str, dest_bucket: str, org: str, every: str, start: str) -> str:
+    """
+    Bagian bersama task dan backfill: agregasi data mentah lalu tulis ke bucket rollup
+    """
+    field_filter = " or ".join(f'r["_field"] == "{field}"' for field in ROLLUP_FIELDS)
+    writes = []
+    for agg in ROLLUP_AGGREGATES:
+        # count bertipe integer; ubah ke float agar tipe field tetap konsisten dalam satu measurement
+        to_float = "\n        |> toFloat()" if agg == "count" else ""
+        writes.append(f'''
+    data
+        |> aggregateWindow(every: {every}, fn: {agg}, createEmpty: false, timeSrc: "_start"){to_float}
+        |> set(key: "agg", value: "{agg}")
+        |> to(bucket: "{dest_bucket}", org: "{org}")''')
+
+    return f'''
+    data = from(bucket: "{source_bucket}")
+        |> range(start: {start})
+        |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => {field_filter})
+    {"".join(writes)}
+    '''
+
+
+def get_rollup_task_query(source_bucket: str, dest_bucket: str, org: str, task_name: str,
+                          every: str, offset: str) -> str:
+    """
+    Script task InfluxDB yang meringkas satu interval data mentah ke bucket rollup
+
+    `now()` di dalam task adalah waktu jadwal, sehingga `range(start: -task.every)` selalu
+    mencakup tepat satu interval penuh; `offset` memberi waktu bagi data yang terlambat masuk.
+
+    Args:
+        source_bucket: Bucket data mentah
+        dest_bucket: Bucket rollup tujuan
+        org: Nama organisasi InfluxDB
+        task_name: Nama task
+        every: Interval rollup (cth: "1h")
+        offset: Penundaan eksekusi task (cth: "2m")
+
+    Returns:
+        String script task Flux
+    """
+    return f'''option task = {{name: "{task_name}", every: {every}, offset: {offset}}}
+{_rollup_body(source_bucket, dest_bucket, org, every, "-task.every")}'''
+
+
+def get_rollup_backfill_query(source_bucket: str, dest_bucket: str, org: str, every: str,
+                              start: str) -> str:
+    """
+    Query satu kali untuk mengisi bucket rollup dari data mentah historis
+
+    Args:
+        source_bucket: Bucket data mentah
+        dest_bucket: Bucket rollup tujuan
+        org: Nama organisasi InfluxDB
+        every: Interval rollup (cth: "1h")
+        start: Awal rentang backfill (cth: "-30d")
+
+    Returns:
+        String query Flux
+    """
+    return _rollup_body(source_bucket, dest_bucket, org, every, start)
+
+
+def get_rollup_coverage_query(bucket: str) -> str:
+    """
+    Query untuk mendapatkan timestamp titik rollup paling awal di sebuah bucket rollup
+
+    Args:
+        bucket: Bucket rollup
+
+    Returns:
+        String query Flux
+    """
+    return f'''
+    from(bucket: "{bucket}")
+        |> range(start: 0)
+        |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}" and r["agg"] == "count")
+        |> first()
+        |> group()
+        |> min(column: "_time")
+        |> keep(columns: ["_time"])
+    '''
+
+
+def _field_filter(parameters: Sequence[str]) -> str:
+    """
+    Ekspresi filter Flux untuk satu atau beberapa field
+    """
+    return " or ".join(f'r["_field"] == "{parameter}"' for parameter in parameters)
+
+
+def _group_clause(group_columns: Optional[Sequence[str]]) -> str:
+    """
+    Klausa group() opsional; tanpa group, setiap seri (per perangkat) dihitung sendiri
+    """
+    if not group_columns:
+        return ""
+    columns = ", ".join(f'"{column}"' for column in group_columns)
+    return f"|> group(columns: [{columns}])"
+
+
+def _raw_window_query(raw_bucket: str, field_filter: str, location_filter: str, group_clause: str,
+                      start: str, stop: str, window: str, fn: str, yield_name: str) -> str:
+    """
+    Bagian query yang mengagregasi data mentah per jendela pada satu rentang
+    """
+    to_float = "\n        |> toFloat()" if fn == "count" else ""
+    return f'''
+    from(bucket: "{raw_bucket}")
+        |> range(start: {start}, stop: {stop})
+        |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => {field_filter})
+        {location_filter}
+        {group_clause}
+        |> aggregateWindow(every: {window}, fn: {fn}, createEmpty: false){to_float}
+        |> sort(columns: ["_time"])
+        |> yield(name: "{yield_name}")
+    '''
+
+
+def get_rollup_aggregated_query(rollup_bucket: str, raw_bucket: str, parameters: Sequence[str],
+                                location_filter: str, start: str, rollup_start: str,
+                                boundary: str, stop: str,
+                                window: str, agg: str, rollup_fn: str, fn: str,
+                                group_columns: Optional[Sequence[str]] = None,
+                                yield_prefix: str = "") -> str:
+    """
+    Query agregasi per jendela yang membaca rollup untuk jendela lengkap dan data mentah
+    hanya untuk jendela pertama yang terpotong `start` dan ekor terbaru yang belum tercakup
+    task rollup
+
+    Bagian-bagian dipisah di `rollup_start` dan `boundary` (kelipatan `window`), sehingga
+    tidak ada jendela yang dihitung dari campuran rollup dan data mentah.
+
+    Args:
+        rollup_bucket: Bucket rollup yang dipilih planner
+        raw_bucket: Bucket data mentah
+        parameters: Parameter sensor (cth: ["temperature", "humidity"])
+        location_filter: Filter lokasi tambahan
+        start: Awal rentang
+        rollup_start: Awal bagian rollup; jika setelah `start`, [start, rollup_start) dibaca dari data mentah
+        boundary: Batas antara bagian rollup dan bagian mentah (RFC3339)
+        stop: Akhir rentang
+        window: Jendela agregasi (cth: "1d")
+        agg: Nilai tag `agg` yang dibaca dari rollup
+        rollup_fn: Fungsi untuk menggabungkan titik rollup dalam satu jendela
+            (WEIGHTED_MEAN: mean dibobot count)
+        fn: Fungsi agregasi untuk data mentah
+        group_columns: Kolom pengelompokan sebelum agregasi (opsional, cth: ["location", "_field"])
+        yield_prefix: Prefix nama yield agar beberapa query dapat digabung dalam satu script
+
+    Returns:
+        String query Flux
+    """
+    field_filter = _field_filter(parameters)
+    group_clause = _group_clause(group_columns)
+    if rollup_fn == WEIGHTED_MEAN:
+        # Mean dan count dari interval yang sama dijadikan satu baris, lalu per jendela
+        # dihitung sum(mean * count) / sum(count); nilai akhir reduce adalah hasil jendela
+        rollup_filter = f'r["agg"] == "{agg}" or r["agg"] == "count"'
+        rollup_shape = '''|> pivot(rowKey: ["_time"], columnKey: ["agg"], valueColumn: "_value")
+        |> filter(fn: (r) => exists r.mean and exists r.count)'''
+        rollup_aggregate = '''(column, tables=<-) => tables
+            |> reduce(
+                identity: {_weight: 0.0, _total: 0.0, _value: 0.0},
+                fn: (r, accumulator) => ({
+                    _weight: accumulator._weight + r.count,
+                    _total: accumulator._total + r.mean * r.count,
+                    _value: (accumulator._total + r.mean * r.count) / (accumulator._weight + r.count)
+                })
+            )
+            |> drop(columns: ["_weight", "_total"])'''
+    else:
+        rollup_filter = f'r["agg"] == "{agg}"'
+        rollup_shape = '|> drop(columns: ["agg"])'
+        rollup_aggregate = rollup_fn
+    query = f'''
+    from(bucket: "{rollup_bucket}")
+        |> range(start: {rollup_start}, stop: {boundary})
+        |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => ({field_filter}) and ({rollup_filter}))
+        {location_filter}
+        {rollup_shape}
+        {group_clause}
+        |> aggregateWindow(every: {window}, fn: {rollup_aggregate}, createEmpty: false)
+        |> sort(columns: ["_time"])
+        |> yield(name: "{yield_prefix}rollup")
+    '''
+    if rollup_start != start:
+        query += _raw_window_query(raw_bucket, field_filter, location_filter, group_clause,
+                                   start, rollup_start, window, fn, f"{yield_prefix}head")
+    return query + _raw_window_query(raw_bucket, field_filter, location_filter, group_clause,
+                                     boundary, stop, window, fn, f"{yield_prefix}recent")
+
+
+def get_raw_aggregated_query(raw_bucket: str, parameters: Sequence[str], location_filter: str,
+                             start: str, stop: str, window: str, fn: str,
+                             group_columns: Optional[Sequence[str]] = None,
+                             yield_prefix: str = "") -> str:
+    """
+    Query agregasi per jendela langsung dari data mentah (tanpa rollup)
+
+    Args:
+        raw_bucket: Bucket data mentah
+        parameters: Parameter sensor (cth: ["temperature", "humidity"])
+        location_filter: Filter lokasi tambahan
+        start: Awal rentang
+        stop: Akhir rentang
+        window: Jendela agregasi (cth: "1h")
+        fn: Fungsi agregasi
+        group_columns: Kolom pengelompokan sebelum agregasi (opsional, cth: ["location", "_field"])
+        yield_prefix: Prefix nama yield agar beberapa query dapat digabung dalam satu script
+
+    Returns:
+        String query Flux
+    """
+    return f'''
+    from(bucket: "{raw_bucket}")
+        |> range(start: {start}, stop: {stop})
+        |> filter(fn: (r) => r["_measurement"] == "{ROLLUP_MEASUREMENT}")
+        |> filter(fn: (r) => {_field_filter(parameters)})
+        {location_filter}
+        {_group_clause(group_columns)}
+        |> aggregateWindow(every: {window}, fn: {fn}, createEmpty: false)
+        |> sort(columns: ["_time"])
+        |> yield(name: "{yield_prefix}raw")
+    '''
@@ -95,3 +95,39 @@ def get_environmental_stats_query(bucket, range_filter_str, location_filter=""):
         
         union(tables: [temperature, humidity])
     '''
+
+
+def get_stats_bundle_query(bucket, range_filter_str, location_filter=""):
+    """
+    Menghasilkan kueri Flux untuk bundel statistik suhu dan kelembaban dalam satu kali scan.
+    Setiap tabel (location, _field) direduksi menjadi akumulator parsial: count, sum, sum_sq,
+    min, max, dan nilai terakhir. Statistik agregat (mean, stddev, dan total seluruh lokasi)
+    dihitung dari akumulator tersebut di service layer.
+    
+    Args:
+        bucket (str): Nama bucket InfluxDB
+        range_filter_str (str): String filter rentang waktu Flux
+        location_filter (str, optional): Filter lokasi. Default ke string kosong.
+        
+    Returns:
+        str: Query Flux lengkap
+    """
+    return f'''
+        from(bucket: "{bucket}")
+          |> range({range_filter_str})
+          |> filter(fn: (r) => r._measurement == "sensor_reading" and (r._field == "temperature" or r._field == "humidity"){location_filter})
+          |> group(columns: ["location", "_field"])
+          |> reduce(
+              identity: {{"count": 0.0, "sum": 0.0, "sum_sq": 0.0, "min": 1000.0, "max": -1000.0, "last": 0.0, "last_time": time(v: 0)}},
+              fn: (r, accumulator) => ({{
+                  count: accumulator.count + 1.0,
+                  sum: accumulator.sum + r._value,
+                  sum_sq: accumulator.sum_sq + r._value * r._value,
+                  min: if r._value < accumulator.min then r._value else accumulator.min,
+                  max: if r._value > accumulator.max then r._value else accumulator.max,
+                  last: if r._time >= accumulator.last_time then r._value else accumulator.last,
+                  last_time: if r._time >= accumulator.last_time then r._time else accumulator.last_time
+              }})
+          )
+          |> yield(name: "stats_bundle")
+    '''
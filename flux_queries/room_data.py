@@ -175,3 +175,95 @@ def get_room_device_status(room_id, start_time="-10m", end_time="now()"):
     '''
     
     return query
+
+
+def get_room_snapshot_query(bucket, temperature_range, humidity_range, start_time="-24h"):
+    """
+    Menghasilkan kueri Flux untuk kondisi semua ruangan dalam satu kali scan.
+    Setiap tabel (location, _field) direduksi menjadi akumulator: jumlah sampel, jumlah nilai,
+    jumlah sampel di rentang optimal, serta nilai dan waktu terakhir. Rata-rata dan persentase
+    waktu di rentang optimal dihitung dari akumulator tersebut di service layer.
+    
+    Args:
+        bucket (str): Nama bucket InfluxDB
+        temperature_range (tuple): Rentang suhu optimal (min, max) dalam °C
+        humidity_range (tuple): Rentang kelembapan optimal (min, max) dalam %
+        start_time (str, optional): Awal rentang waktu statistik. Default ke "-24h".
+        
+    Returns:
+        str: Query Flux lengkap
+    """
+    temp_min, temp_max = (float(value) for value in temperature_range)
+    hum_min, hum_max = (float(value) for value in humidity_range)
+    return f'''
+        from(bucket: "{bucket}")
+          |> range(start: {start_time})
+          |> filter(fn: (r) => r._measurement == "sensor_reading" and (r._field == "temperature" or r._field == "humidity") and exists r.location)
+          |> group(columns: ["location", "_field"])
+          |> reduce(
+              identity: {{"count": 0.0, "sum": 0.0, "in_range": 0.0, "last": 0.0, "last_time": time(v: 0)}},
+              fn: (r, accumulator) => ({{
+                  count: accumulator.count + 1.0,
+                  sum: accumulator.sum + r._value,
+                  in_range: if (r._field == "temperature" and r._value >= {temp_min} and r._value <= {temp_max})
+                      or (r._field == "humidity" and r._value >= {hum_min} and r._value <= {hum_max})
+                      then accumulator.in_range + 1.0 else accumulator.in_range,
+                  last: if r._time >= accumulator.last_time then r._value else accumulator.last,
+                  last_time: if r._time >= accumulator.last_time then r._time else accumulator.last_time
+              }})
+          )
+          |> yield(name: "room_snapshot")
+    '''
+
+
+def _flux_start(start_time):
+    # Durasi relatif (contoh: -24h) dipakai apa adanya, selain itu dianggap waktu RFC3339
+    return start_time if start_time.startswith("-") else f"time(v: \"{start_time}\")"
+
+
+def get_room_readings_since_query(bucket, start_time):
+    """
+    Menghasilkan kueri Flux untuk pembacaan suhu/kelembapan mentah semua ruangan sejak waktu tertentu.
+    Dipakai akumulator waktu di rentang optimal untuk memproses hanya data yang baru masuk.
+    
+    Args:
+        bucket (str): Nama bucket InfluxDB
+        start_time (str): Awal rentang, berupa durasi Flux (contoh: -24h) atau waktu RFC3339
+        
+    Returns:
+        str: Query Flux lengkap, satu baris per pembacaan diurutkan berdasarkan waktu
+    """
+    return f'''
+        from(bucket: "{bucket}")
+          |> range(start: {_flux_start(start_time)})
+          |> filter(fn: (r) => r._measurement == "sensor_reading" and (r._field == "temperature" or r._field == "humidity") and exists r.location)
+          |> keep(columns: ["_time", "_value", "_field", "location", "device_id"])
+          |> group()
+          |> sort(columns: ["_time"])
+          |> yield(name: "room_readings")
+    '''
+
+
+def get_room_window_query(bucket, start_time, every="10m"):
+    """
+    Menghasilkan kueri Flux untuk rata-rata suhu/kelembapan per jendela waktu semua ruangan.
+    Dipakai untuk memperbarui jendela bergulir fitur prediksi per ruangan.
+    
+    Args:
+        bucket (str): Nama bucket InfluxDB
+        start_time (str): Awal rentang, berupa durasi Flux (contoh: -7h) atau waktu RFC3339
+        every (str, optional): Lebar jendela agregasi. Default ke "10m".
+        
+    Returns:
+        str: Query Flux lengkap, satu baris per (ruangan, field, awal jendela)
+    """
+    return f'''
+        from(bucket: "{bucket}")
+          |> range(start: {_flux_start(start_time)})
+          |> filter(fn: (r) => r._measurement == "sensor_reading" and (r._field == "temperature" or r._field == "humidity") and exists r.location)
+          |> group(columns: ["location", "_field"])
+          |> aggregateWindow(every: {every}, fn: mean, createEmpty: false, timeSrc: "_start")
+          |> keep(columns: ["_time", "_value", "_field", "location"])
+          |> group()
+          |> yield(name: "room_window")
+    '''
@@ -8,7 +8,7 @@ from typing import Dict, Any, Optional
 import logging
 
 from services.gemini_service import gemini_service
-from services.trend_service import get_hourly_trend_data, get_daily_trend_data, get_monthly_trend_data
+from services.trend_service import get_hourly_trend_data, get_daily_trend_data, get_monthly_trend_data, get_batch_trend_data
 from utils.auth import get_api_key
 
 logger = logging.getLogger(__name__)
@@ -96,9 +96,11 @@ async def get_preservation_risk_analysis(
     try:
         logger.info(f"Generating preservation risk analysis for location: {location}")
         
-        # Ambil data tren untuk temperature dan humidity
-        temp_data = await get_daily_trend_data("temperature", location, days=7)
-        humidity_data = await get_daily_trend_data("humidity", location, days=7)
+        # Ambil data tren 7 hari untuk temperature dan humidity dengan satu query batch
+        location_key = location or "all"
+        batch = await get_batch_trend_data(["temperature", "humidity"], [location_key], "week")
+        temp_data = batch["locations"][location_key]["temperature"]
+        humidity_data = batch["locations"][location_key]["humidity"]
         
         # Generate insights untuk kedua parameter
         temp_insights = await gemini_service.generate_climate_insights(
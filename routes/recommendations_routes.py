@@ -2,11 +2,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
-import requests
 import asyncio
 
 # Import get_api_key dari api.py daripada mendefinisikan ulang di sini
 from utils.auth import get_api_key
+from services.room_state_store import RECOMMENDATION_ROOM_IDS, room_store
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
@@ -29,148 +29,8 @@ async def get_current_environmental_data():
         return None
 
 async def get_rooms_data():
-    """Ambil data kondisi semua ruangan dari API real (bukan hardcode)"""
-    try:
-        import requests
-        
-        # Daftar ruangan yang ingin dimonitor
-        room_ids = ["F2", "F3", "F4", "G2", "G3", "G4"]
-        rooms_data = []
-        
-        headers = {"X-API-Key": "development_key_for_testing"}
-        
-        # Coba akses internal API menggunakan service name atau localhost
-        internal_api_urls = [
-            "http://api:8002",  # Service name dalam Docker network
-            "http://localhost:8002",  # Localhost fallback
-            "http://127.0.0.1:8002"  # IP fallback
-        ]
-        
-        api_base_url = None
-        for url in internal_api_urls:
-            try:
-                test_response = requests.get(f"{url}/system/health/", headers=headers, timeout=5)
-                if test_response.status_code == 200:
-                    api_base_url = url
-                    print(f"✅ Successfully connected to API at {url}")
-                    break
-            except:
-                continue
-        
-        if not api_base_url:
-            print("❌ Cannot connect to internal API, using fallback data")
-            # Fallback data dengan timestamp untuk menunjukkan real-time attempt
-            from datetime import datetime
-            return [
-                {"id": "F2", "name": "Ruang F2", "floor": "F", "area": 25, 
-                 "currentConditions": {"temperature": 24.0, "humidity": 55.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}},
-                {"id": "F3", "name": "Ruang F3", "floor": "F", "area": 30, 
-                 "currentConditions": {"temperature": 23.8, "humidity": 48.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}},
-                {"id": "F4", "name": "Ruang F4", "floor": "F", "area": 35, 
-                 "currentConditions": {"temperature": 25.2, "humidity": 62.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}},
-                {"id": "G2", "name": "Ruang G2", "floor": "G", "area": 25, 
-                 "currentConditions": {"temperature": 24.1, "humidity": 44.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}},
-                {"id": "G3", "name": "Ruang G3", "floor": "G", "area": 30, 
-                 "currentConditions": {"temperature": 23.9, "humidity": 46.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}},
-                {"id": "G4", "name": "Ruang G4", "floor": "G", "area": 35, 
-                 "currentConditions": {"temperature": 25.8, "humidity": 70.0, "trend": "stable", "last_attempt": datetime.now().isoformat()}}
-            ]
-        
-        for room_id in room_ids:
-            try:
-                # Ambil data real dari endpoint rooms
-                response = requests.get(
-                    f"{api_base_url}/rooms/{room_id}",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    room_data = response.json()
-                    
-                    # Extract data yang dibutuhkan untuk rekomendasi
-                    current_conditions = room_data.get("currentConditions", {})
-                    
-                    # Hitung trend berdasarkan daily average vs current
-                    daily_avg = room_data.get("statistics", {}).get("dailyAvg", {})
-                    current_temp = current_conditions.get("temperature", 0)
-                    current_humidity = current_conditions.get("humidity", 0)
-                    avg_temp = daily_avg.get("temperature", current_temp)
-                    avg_humidity = daily_avg.get("humidity", current_humidity)
-                    
-                    # Determine trend
-                    temp_trend = "stable"
-                    if current_temp > avg_temp + 0.5:
-                        temp_trend = "increasing"
-                    elif current_temp < avg_temp - 0.5:
-                        temp_trend = "decreasing"
-                    
-                    humidity_trend = "stable"
-                    if current_humidity > avg_humidity + 2:
-                        humidity_trend = "increasing"
-                    elif current_humidity < avg_humidity - 2:
-                        humidity_trend = "decreasing"
-                    
-                    # Format untuk compatibility dengan existing code
-                    rooms_data.append({
-                        "id": room_data["id"],
-                        "name": room_data["name"],
-                        "floor": room_data["floor"],
-                        "area": room_data["area"],
-                        "currentConditions": {
-                            "temperature": current_temp,
-                            "humidity": current_humidity,
-                            "trend": temp_trend,  # Overall trend
-                            "temp_trend": temp_trend,
-                            "humidity_trend": humidity_trend,
-                            "co2": current_conditions.get("co2", 400),
-                            "air_quality": current_conditions.get("air_quality", 85),
-                            "data_source": "real_api"
-                        },
-                        "statistics": room_data.get("statistics", {}),
-                        "devices": room_data.get("devices", [])
-                    })
-                    
-                    print(f"✅ Fetched real data for {room_id}: {current_temp}°C, {current_humidity}%")
-                    
-                else:
-                    print(f"❌ Failed to fetch data for room {room_id}: {response.status_code}")
-                    # Fallback untuk room yang gagal
-                    rooms_data.append({
-                        "id": room_id,
-                        "name": f"Ruang {room_id}",
-                        "floor": room_id[0],
-                        "area": 25,
-                        "currentConditions": {
-                            "temperature": 24.0,
-                            "humidity": 55.0,
-                            "trend": "stable",
-                            "data_source": "fallback"
-                        }
-                    })
-                    
-            except Exception as e:
-                print(f"❌ Error fetching data for room {room_id}: {e}")
-                # Fallback dengan data default
-                rooms_data.append({
-                    "id": room_id,
-                    "name": f"Ruang {room_id}",
-                    "floor": room_id[0],
-                    "area": 25,
-                    "currentConditions": {
-                        "temperature": 24.0,
-                        "humidity": 55.0,
-                        "trend": "stable",
-                        "data_source": "error_fallback"
-                    }
-                })
-        
-        print(f"✅ Successfully loaded {len(rooms_data)} rooms data")
-        return rooms_data
-        
-    except Exception as e:
-        print(f"❌ Critical error getting rooms data: {e}")
-        return []
+    """Ambil data kondisi ruangan dari store snapshot di dalam proses (tanpa request HTTP ke API sendiri)"""
+    return await room_store.get_rooms(RECOMMENDATION_ROOM_IDS)
 
 async def get_automation_parameters():
     """Ambil parameter otomasi yang diatur"""
@@ -6,7 +6,8 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from typing import Dict, List, Any, Optional
 
 # Import service
-from services.room_service import get_room_details, get_room_list
+from services.room_service import ROOM_METADATA, get_room_details, get_room_list
+from services.optimal_range_service import optimal_range_tracker
 
 # Import get_api_key dari api.py
 from utils.auth import get_api_key
@@ -44,3 +45,26 @@ async def get_room_details_endpoint(
     if not room_data:
         raise HTTPException(status_code=404, detail=f"Ruangan dengan ID {room_id} tidak ditemukan")
     return room_data
+
+@router.get("/{room_id}/optimal_range", summary="Dapatkan waktu di rentang optimal ruangan",
+            response_model=Dict[str, Any])
+async def get_room_optimal_range_endpoint(
+    room_id: str,
+    hours: int = Query(24, ge=1, le=35 * 24, description="Panjang jendela dalam jam"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Mengambil durasi dan persentase waktu suhu/kelembapan ruangan berada di rentang optimal
+    dalam jendela terakhir, dijawab dari counter per jam tanpa memindai data mentah.
+    
+    Args:
+        room_id (str): ID ruangan (contoh: F2, G3, dsb)
+        hours (int): Panjang jendela dalam jam (dibulatkan ke batas jam)
+        
+    Returns:
+        Dict[str, Any]: Durasi di dalam/di luar rentang dan persentase per parameter
+    """
+    summary = optimal_range_tracker.summary(room_id, hours)
+    if room_id not in ROOM_METADATA and not any(summary.values()):
+        raise HTTPException(status_code=404, detail=f"Ruangan dengan ID {room_id} tidak ditemukan")
+    return {"room_id": room_id, "window_hours": hours, **summary}
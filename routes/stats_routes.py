@@ -16,9 +16,12 @@ from services.stats_service import (
     get_min_humidity_last_hour,
     get_max_humidity_last_hour,
     get_humidity_stats_last_hour,
-    get_temperature_stats_last_hour
+    get_temperature_stats_last_hour,
+    get_stats_bundle_last_hour
 )
 
+from services.result_cache import stats_cache
+
 # Import get_api_key dari utils.auth daripada mendefinisikan ulang di sini
 from utils.auth import get_api_key
 
@@ -142,3 +145,44 @@ async def get_temperature_stats_last_hour_endpoint(
     Memerlukan autentikasi API Key.
     """
     return await get_temperature_stats_last_hour()
+
+
+@router.get("/last-hour/bundle/", summary="Dapatkan bundel statistik suhu dan kelembapan pada jam terakhir", 
+            response_model=Dict[str, Any])
+async def get_stats_bundle_last_hour_endpoint(
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Mengambil statistik suhu dan kelembapan (rata-rata, minimum, maksimum, jumlah sampel,
+    standar deviasi, dan nilai terakhir) untuk seluruh perangkat dan per lokasi pada rentang
+    1 jam terakhir dalam satu query InfluxDB.
+    Memerlukan autentikasi API Key.
+    """
+    return await get_stats_bundle_last_hour()
+
+
+@router.get("/cache/", summary="Dapatkan statistik cache endpoint statistik jam terakhir", 
+            response_model=Dict[str, Any])
+async def get_stats_cache_endpoint(
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Mengambil counter hit/miss/coalesced dari cache hasil query statistik 1 jam terakhir.
+    Berguna untuk memantau efektivitas cache saat jumlah dashboard bertambah.
+    Memerlukan autentikasi API Key.
+    """
+    return stats_cache.get_stats()
+
+
+@router.get("/rollups/", summary="Dapatkan status rollup (downsampling) data sensor", 
+            response_model=Dict[str, Any])
+async def get_stats_rollups_endpoint(
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Mengambil status bucket/task rollup 1m/1h/1d beserta awal cakupan datanya.
+    Tier tanpa cakupan tidak dipakai planner sehingga query tren tetap membaca data mentah.
+    Memerlukan autentikasi API Key.
+    """
+    from services.rollup_service import get_rollup_status
+    return get_rollup_status()
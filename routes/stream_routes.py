@@ -0,0 +1,130 @@
+"""
+API routes untuk stream langsung kondisi ruangan dan status perangkat (SSE dan WebSocket).
+Pengganti polling /rooms/{id} dan /system/devices_status/ dari dashboard.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional, Set
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from services.live_stream import broadcaster
+
+# Import get_api_key dari api.py
+from utils.auth import get_api_key
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+logger = logging.getLogger(__name__)
+
+
+def get_stream_api_key(x_api_key: Optional[str] = Header(None),
+                       api_key: Optional[str] = Query(None, description="API key (EventSource/WebSocket browser tidak dapat mengirim header)")) -> str:
+    """
+    Validasi API key dari header X-API-Key atau query parameter api_key
+    """
+    return get_api_key(x_api_key or api_key)
+
+
+def _parse_rooms(rooms: Optional[str]) -> Optional[Set[str]]:
+    if not rooms:
+        return None
+    return {room_id.strip() for room_id in rooms.split(",") if room_id.strip()}
+
+
+async def sse_events(request: Request, rooms: Optional[Set[str]]) -> AsyncIterator[str]:
+    """
+    Mendaftarkan pelanggan lalu mengubah event-nya menjadi format Server-Sent Events sampai klien terputus
+
+    Pendaftaran dilakukan di dalam generator (bukan di handler) agar selalu dilepas oleh
+    `finally`: generator yang tidak pernah mulai diiterasi (klien terputus sebelum body
+    dikirim) juga tidak pernah mendaftarkan pelanggan.
+    """
+    try:
+        subscription = broadcaster.subscribe(rooms)
+    except RuntimeError as e:
+        # Batas pelanggan tercapai sejak pemeriksaan di handler
+        logger.warning(f"Stream SSE ditutup: {e}")
+        return
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            events = await subscription.next_events()
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/rooms", summary="Stream SSE kondisi ruangan dan status perangkat")
+async def stream_rooms_sse(
+    request: Request,
+    rooms: Optional[str] = Query(None, description="ID ruangan dipisahkan koma (default: semua ruangan)"),
+    api_key: str = Depends(get_stream_api_key)
+):
+    """
+    Mengirim perubahan kondisi ruangan (event `room`) dan status perangkat (event `device`)
+    sebagai Server-Sent Events. Saat terhubung, state terakhir setiap topik langsung dikirim.
+    """
+    if broadcaster.is_full:
+        raise HTTPException(status_code=503,
+                            detail=f"Jumlah pelanggan stream sudah mencapai batas ({broadcaster.max_subscribers})")
+    return StreamingResponse(
+        sse_events(request, _parse_rooms(rooms)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/ws")
+async def stream_rooms_websocket(
+    websocket: WebSocket,
+    rooms: Optional[str] = None,
+    api_key: Optional[str] = None
+):
+    """
+    Mengirim event yang sama dengan /stream/rooms sebagai pesan JSON WebSocket.
+    """
+    try:
+        get_api_key(websocket.headers.get("x-api-key") or api_key)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        subscription = broadcaster.subscribe(_parse_rooms(rooms))
+    except RuntimeError:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await websocket.accept()
+    # Pesan dari klien tidak dipakai; dibaca hanya untuk mendeteksi koneksi terputus
+    disconnected = asyncio.ensure_future(_wait_disconnect(websocket))
+    try:
+        while True:
+            next_events = asyncio.ensure_future(subscription.next_events())
+            await asyncio.wait({next_events, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_events.cancel()
+                break
+            events = next_events.result()
+            if not events:
+                await websocket.send_text(json.dumps({"type": "heartbeat"}))
+                continue
+            for event in events:
+                await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        broadcaster.unsubscribe(subscription)
@@ -11,7 +11,8 @@ from services.trend_service import (
     get_hourly_trend_data,
     get_daily_trend_data,
     get_monthly_trend_data,
-    get_comparative_trend_analysis
+    get_comparative_trend_analysis,
+    get_batch_trend_data
 )
 
 # Import get_api_key dari api.py
@@ -115,6 +116,22 @@ async def get_comparative_trend_endpoint(
     return await get_comparative_trend_analysis(parameter, location, current_period, comparison_period)
 
 
+@router.get("/trends/batch", summary="Analisis tren banyak lokasi dan parameter sekaligus", 
+            response_model=Dict[str, Any])
+async def get_batch_trend_endpoint(
+    parameters: List[str] = Query(["temperature", "humidity"], description="Daftar parameter sensor: 'temperature' dan/atau 'humidity'"),
+    locations: List[str] = Query(["all"], description="Daftar lokasi; 'all' untuk gabungan seluruh lokasi"),
+    period: str = Query("week", description="Periode analisis: 'day', 'week', atau 'month'"),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Mengambil analisis tren untuk setiap kombinasi lokasi × parameter dengan satu query InfluxDB.
+    Cocok untuk overview multi-ruangan (cth: 12 ruangan × 2 parameter dalam satu round trip).
+    Memerlukan autentikasi API Key.
+    """
+    return await get_batch_trend_data(parameters, locations, period)
+
+
 @router.get("/trends/summary", summary="Ringkasan analisis tren multi-parameter", 
             response_model=Dict[str, Any])
 async def get_trend_summary_endpoint(
@@ -128,24 +145,11 @@ async def get_trend_summary_endpoint(
     Memerlukan autentikasi API Key.
     """
     try:
-        # Ambil data untuk kedua parameter
-        temperature_data = None
-        humidity_data = None
-        
-        if period == "day":
-            temperature_data = await get_hourly_trend_data("temperature", location, hours=24)
-            humidity_data = await get_hourly_trend_data("humidity", location, hours=24)
-        elif period == "week":
-            temperature_data = await get_daily_trend_data("temperature", location, days=7)
-            humidity_data = await get_daily_trend_data("humidity", location, days=7)
-        elif period == "month":
-            temperature_data = await get_monthly_trend_data("temperature", location, days=30)
-            humidity_data = await get_monthly_trend_data("humidity", location, days=30)
-        else:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Period '{period}' tidak didukung. Gunakan 'day', 'week', atau 'month'"
-            )
+        # Ambil data kedua parameter dengan satu query batch
+        location_key = location or "all"
+        batch = await get_batch_trend_data(["temperature", "humidity"], [location_key], period)
+        temperature_data = batch["locations"][location_key]["temperature"]
+        humidity_data = batch["locations"][location_key]["humidity"]
         
         # Compile summary
         summary = {
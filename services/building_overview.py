@@ -0,0 +1,272 @@
+"""
+Materialized view ringkasan gedung untuk endpoint /enhanced
+Agregat per lantai dan per gedung (jumlah suhu/kelembapan/skor, perangkat aktif) serta
+himpunan ruangan critical/warning/optimal diperbarui secara inkremental setiap kali data satu
+ruangan berubah. Dokumen respons dibangun sekali per perubahan dan dibagikan ke semua
+request, sehingga endpoint heat map hanya mengembalikan dokumen yang sudah jadi.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from utils.tick_scheduler import TickScheduler
+
+# Konstanta
+BUILDING_OVERVIEW_REFRESH_SECONDS = float(os.getenv("BUILDING_OVERVIEW_REFRESH_SECONDS", "10"))
+HEALTH_STATUSES = ("critical", "warning", "good", "optimal")
+
+logger = logging.getLogger(__name__)
+
+
+class _Aggregate:
+    """
+    Jumlah berjalan untuk satu kelompok ruangan (satu lantai atau seluruh gedung)
+    """
+
+    __slots__ = ("rooms", "temperature_sum", "humidity_sum", "score_sum", "active_devices", "total_devices")
+
+    def __init__(self):
+        self.rooms = 0
+        self.temperature_sum = 0.0
+        self.humidity_sum = 0.0
+        self.score_sum = 0.0
+        self.active_devices = 0
+        self.total_devices = 0
+
+    def apply(self, room: Dict[str, Any], sign: int) -> None:
+        # sign = 1 untuk menambahkan ruangan, -1 untuk mengeluarkannya
+        self.rooms += sign
+        self.temperature_sum += sign * room["currentConditions"]["temperature"]
+        self.humidity_sum += sign * room["currentConditions"]["humidity"]
+        self.score_sum += sign * room["healthScore"]["overallScore"]
+        self.active_devices += sign * room["deviceCount"]["active"]
+        self.total_devices += sign * room["deviceCount"]["total"]
+
+    def floor_stats(self) -> Dict[str, Any]:
+        if not self.rooms:
+            return {"avgTemp": 0, "avgHumidity": 0, "activeDevices": 0, "totalDevices": 0}
+        return {
+            "avgTemp": round(self.temperature_sum / self.rooms, 1),
+            "avgHumidity": round(self.humidity_sum / self.rooms, 1),
+            "activeDevices": self.active_devices,
+            "totalDevices": self.total_devices,
+            "deviceEfficiency": round((self.active_devices / self.total_devices) * 100, 1) if self.total_devices > 0 else 0
+        }
+
+
+class BuildingOverview:
+    """
+    Kondisi semua ruangan beserta agregat gedung yang dipelihara secara inkremental
+
+    Args:
+        floors: Lantai yang selalu dilaporkan di floorStats walaupun belum memiliki ruangan
+    """
+
+    def __init__(self, floors: Sequence[str] = ("F", "G")):
+        self.rooms: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.updated_at = datetime.now()
+        self._building = _Aggregate()
+        self._floors: Dict[str, _Aggregate] = {floor: _Aggregate() for floor in floors}
+        self._statuses: Dict[str, set] = {status: set() for status in HEALTH_STATUSES}
+        self._document: Optional[Dict[str, Any]] = None
+        self._rooms_document: Optional[Dict[str, Any]] = None
+
+    def _apply(self, room: Dict[str, Any], sign: int) -> None:
+        self._building.apply(room, sign)
+        self._floors.setdefault(room["id"][:1], _Aggregate()).apply(room, sign)
+        statuses = self._statuses.setdefault(room["healthScore"]["status"], set())
+        if sign > 0:
+            statuses.add(room["id"])
+        else:
+            statuses.discard(room["id"])
+
+    def update_room(self, room: Dict[str, Any]) -> bool:
+        """
+        Mengganti data satu ruangan dan menyesuaikan agregat
+
+        Args:
+            room: Data ringkas ruangan (id, currentConditions, deviceCount, sensorStatus, healthScore, lastUpdate)
+
+        Returns:
+            bool: True jika data ruangan berubah
+        """
+        previous = self.rooms.get(room["id"])
+        if previous is not None:
+            if {**previous, "lastUpdate": None} == {**room, "lastUpdate": None}:
+                return False
+            self._apply(previous, -1)
+        self.rooms[room["id"]] = room
+        self._apply(room, 1)
+        self._mark_changed()
+        return True
+
+    def remove_room(self, room_id: str) -> bool:
+        """
+        Mengeluarkan ruangan dari ringkasan
+
+        Returns:
+            bool: True jika ruangan sebelumnya ada
+        """
+        previous = self.rooms.pop(room_id, None)
+        if previous is None:
+            return False
+        self._apply(previous, -1)
+        self._mark_changed()
+        return True
+
+    def _mark_changed(self) -> None:
+        self.version += 1
+        self.updated_at = datetime.now()
+        self._document = None
+        self._rooms_document = None
+
+    def _rooms_with_status(self, status: str) -> List[str]:
+        members = self._statuses.get(status, ())
+        return [room_id for room_id in self.rooms if room_id in members]
+
+    def rooms_document(self) -> Dict[str, Any]:
+        """
+        Dokumen /enhanced/rooms/overview (dibangun ulang hanya setelah ada perubahan)
+        """
+        if self._rooms_document is None:
+            self._rooms_document = {
+                "timestamp": self.updated_at.isoformat(),
+                "totalRooms": len(self.rooms),
+                "rooms": dict(self.rooms)
+            }
+        return self._rooms_document
+
+    def document(self) -> Dict[str, Any]:
+        """
+        Dokumen /enhanced/system/building-overview (dibangun ulang hanya setelah ada perubahan)
+        """
+        if self._document is not None:
+            return self._document
+
+        building = self._building
+        temperatures = [room["currentConditions"]["temperature"] for room in self.rooms.values()]
+        humidities = [room["currentConditions"]["humidity"] for room in self.rooms.values()]
+        critical_rooms = self._rooms_with_status("critical")
+        warning_rooms = self._rooms_with_status("warning")
+
+        self._document = {
+            "timestamp": self.updated_at.isoformat(),
+            "buildingStats": {
+                "totalRooms": building.rooms,
+                "avgTemperature": round(building.temperature_sum / building.rooms, 1) if building.rooms else 0,
+                "avgHumidity": round(building.humidity_sum / building.rooms, 1) if building.rooms else 0,
+                "avgHealthScore": round(building.score_sum / building.rooms, 1) if building.rooms else 0,
+                "temperatureRange": {
+                    "min": round(min(temperatures), 1) if temperatures else 0,
+                    "max": round(max(temperatures), 1) if temperatures else 0
+                },
+                "humidityRange": {
+                    "min": round(min(humidities), 1) if humidities else 0,
+                    "max": round(max(humidities), 1) if humidities else 0
+                }
+            },
+            "floorStats": {floor: aggregate.floor_stats() for floor, aggregate in sorted(self._floors.items())},
+            "alertSummary": {
+                "critical": len(critical_rooms),
+                "warning": len(warning_rooms),
+                "optimal": len(self._statuses.get("optimal", ())),
+                "criticalRooms": critical_rooms,
+                "warningRooms": warning_rooms
+            },
+            "rooms": self.rooms_document()["rooms"]
+        }
+        return self._document
+
+
+class BuildingOverviewStore:
+    """
+    Memperbarui materialized view ringkasan gedung di background
+
+    Args:
+        room_ids: Ruangan yang dimuat
+        loader: Fungsi asinkron yang mengembalikan data ringkas beberapa ruangan
+        interval: Jarak antar pembaruan dalam detik
+    """
+
+    def __init__(self, room_ids: Sequence[str],
+                 loader: Callable[[Sequence[str]], Awaitable[List[Dict[str, Any]]]],
+                 interval: float = BUILDING_OVERVIEW_REFRESH_SECONDS):
+        self.room_ids = list(room_ids)
+        self._loader = loader
+        self.interval = interval
+        self.overview = BuildingOverview()
+        self._refreshed = False
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> int:
+        """
+        Memuat data ruangan dan menerapkan perubahannya ke ringkasan
+
+        Ruangan yang tidak dikembalikan loader tetap memakai data sebelumnya. Pemanggilan
+        bersamaan berbagi satu proses muat.
+
+        Returns:
+            int: Jumlah ruangan yang berubah
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return 0
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            changed = 0
+            try:
+                for room in await self._loader(self.room_ids):
+                    changed += self.overview.update_room(room)
+            except Exception as e:
+                logger.error(f"Gagal memuat data ringkasan gedung: {e}", exc_info=True)
+            self._refreshed = True
+            logger.debug(f"Ringkasan gedung diperbarui dalam {(time.perf_counter() - started) * 1000:.0f} ms "
+                         f"({changed} ruangan berubah, versi {self.overview.version})")
+            return changed
+
+    async def _ensure_loaded(self) -> BuildingOverview:
+        if not self._refreshed:
+            await self.refresh()
+        return self.overview
+
+    async def get_document(self) -> Dict[str, Any]:
+        """
+        Dokumen ringkasan gedung; dimuat langsung hanya jika belum pernah diperbarui
+        """
+        return (await self._ensure_loaded()).document()
+
+    async def get_rooms_document(self) -> Dict[str, Any]:
+        """
+        Dokumen ringkasan semua ruangan (heat map); dimuat langsung hanya jika belum pernah diperbarui
+        """
+        return (await self._ensure_loaded()).rooms_document()
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            await self.refresh()
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai pembaruan berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Ringkasan gedung dimulai (interval {self.interval} detik, {len(self.room_ids)} ruangan)")
+
+    def stop(self) -> None:
+        """
+        Menghentikan pembaruan berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
@@ -3,9 +3,15 @@ Implementasi service layer untuk data sensor API Digital Twin
 Berisi fungsi-fungsi untuk mengakses dan memproses data sensor dari InfluxDB
 """
 
+import base64
+import binascii
+import csv
+import io
+import json
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
 import os
 
@@ -15,50 +21,50 @@ from influxdb_client.client.exceptions import InfluxDBError
 # Import konfigurasi dari environment
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
 ALLOWED_AGGREGATE_FUNCTIONS = {"mean", "median", "sum", "count", "min", "max", "stddev", "first", "last"}
+# Format ekspor streaming -> media type respons
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Kolom internal Flux yang tidak ikut diekspor
+_EXPORT_EXCLUDED_COLUMNS = ("result", "table")
+# Pagination keyset: urutan halaman adalah (_time, kunci seri); kunci seri = rowKey pivot selain _time
+SERIES_KEY_COLUMNS = ["device_id", "location", "source_ip", "hex_id_from_data"]
+DEFAULT_PAGE_SIZE = 1000
 
-# Import query helper dan query API
-from services.stats_service import get_query_api
+# Import query helper dan gateway query asinkron
+from services import query_gateway
 from flux_queries.data import get_general_sensor_data_query
 
 logger = logging.getLogger(__name__)
 
-async def get_sensor_data(
+def _build_sensor_data_query(
     start_time: Optional[datetime],
     end_time: Optional[datetime],
     device_ids: Optional[List[str]],
     locations: Optional[List[str]],
     fields: Optional[List[str]],
-    limit: int,
+    limit: Optional[int],
     measurement_name: str,
     aggregate_window: Optional[str],
-    aggregate_function: Optional[str]
-) -> List[Dict[str, Any]]:
+    aggregate_function: Optional[str],
+    range_start: Optional[str] = None,
+    range_stop: Optional[str] = None
+) -> str:
     """
-    Mengambil data sensor dari InfluxDB dengan berbagai opsi filter dan agregasi
+    Membangun query Flux data sensor dari parameter filter dan agregasi endpoint /data/
+    
+    `range_start`/`range_stop` (RFC3339, presisi nanodetik) menggantikan `start_time`/`end_time`
+    bila diberikan, cth: posisi cursor pagination.
     
-    Args:
-        start_time: Waktu mulai untuk query
-        end_time: Waktu selesai untuk query
-        device_ids: Daftar ID perangkat untuk difilter
-        locations: Daftar lokasi untuk difilter
-        fields: Kolom data spesifik yang ingin diambil
-        limit: Jumlah maksimum record yang dikembalikan
-        measurement_name: Nama measurement di InfluxDB
-        aggregate_window: Jendela agregasi
-        aggregate_function: Fungsi agregasi
-        
-    Returns:
-        List[Dict[str, Any]]: Data sensor dalam bentuk list of dictionary
-        
     Raises:
-        HTTPException: Jika terjadi error saat query
+        HTTPException: 400 jika parameter agregasi tidak valid
     """
-    q_api = get_query_api()
-
     # Bangun string filter rentang waktu
-    range_filter_str = f'start: {start_time.isoformat() if start_time else "-1h"}'
-    if end_time:
-        range_filter_str += f', stop: {end_time.isoformat()}'
+    if range_start is None:
+        range_start = start_time.isoformat() if start_time else "-1h"
+    if range_stop is None and end_time:
+        range_stop = end_time.isoformat()
+    range_filter_str = f'start: {range_start}'
+    if range_stop:
+        range_filter_str += f', stop: {range_stop}'
     
     # Bangun filter expressions
     filters = [f'r._measurement == "{measurement_name}"']
@@ -90,27 +96,55 @@ async def get_sensor_data(
         raise HTTPException(status_code=400, detail="aggregate_window dan aggregate_function harus digunakan bersamaan.")
 
     # Dapatkan query dari modul flux_queries
-    flux_query = get_general_sensor_data_query(INFLUXDB_BUCKET, range_filter_str, filter_expression, aggregation_str, limit)
+    return get_general_sensor_data_query(INFLUXDB_BUCKET, range_filter_str, filter_expression, aggregation_str, limit)
+
+
+async def get_sensor_data(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    device_ids: Optional[List[str]],
+    locations: Optional[List[str]],
+    fields: Optional[List[str]],
+    limit: int,
+    measurement_name: str,
+    aggregate_window: Optional[str],
+    aggregate_function: Optional[str]
+) -> List[Dict[str, Any]]:
+    """
+    Mengambil data sensor dari InfluxDB dengan berbagai opsi filter dan agregasi
+    
+    Args:
+        start_time: Waktu mulai untuk query
+        end_time: Waktu selesai untuk query
+        device_ids: Daftar ID perangkat untuk difilter
+        locations: Daftar lokasi untuk difilter
+        fields: Kolom data spesifik yang ingin diambil
+        limit: Jumlah maksimum record yang dikembalikan
+        measurement_name: Nama measurement di InfluxDB
+        aggregate_window: Jendela agregasi
+        aggregate_function: Fungsi agregasi
+        
+    Returns:
+        List[Dict[str, Any]]: Data sensor dalam bentuk list of dictionary
+        
+    Raises:
+        HTTPException: Jika terjadi error saat query
+    """
+    flux_query = _build_sensor_data_query(
+        start_time, end_time, device_ids, locations, fields, limit,
+        measurement_name, aggregate_window, aggregate_function
+    )
     
     try:
         logger.info(f"Menjalankan Flux query untuk data sensor: {flux_query}")
-        result_df = q_api.query_data_frame(query=flux_query)
+        # Annotated CSV didekode langsung ke kolom; tabel dengan skema berbeda digabung
+        result_df = await query_gateway.query_columns(flux_query, "query data sensor")
         
-        if result_df is None:
-            return []
-        if isinstance(result_df, list): 
-            all_records = []
-            for df_item in result_df:
-                if not df_item.empty:
-                    # Ganti NaN/NaT dengan None untuk serialisasi JSON yang benar
-                    df_item = df_item.where(pd.notnull(df_item), None) 
-                    all_records.extend(df_item.to_dict(orient='records'))
-            return all_records
-        elif not result_df.empty:
-            result_df = result_df.where(pd.notnull(result_df), None)
-            return result_df.to_dict(orient='records')
-        else:
+        if result_df.empty:
             return []
+        # Ganti NaN/NaT dengan None untuk serialisasi JSON yang benar
+        result_df = result_df.astype(object).where(pd.notnull(result_df), None)
+        return result_df.to_dict(orient='records')
 
     except InfluxDBError as e:
         logger.error(f"InfluxDBError saat query data sensor: {e}", exc_info=True)
@@ -123,3 +157,241 @@ async def get_sensor_data(
         if isinstance(e, ValueError) or isinstance(e, TypeError):
             detail_msg = f"Gagal query data sensor dari InfluxDB: {str(e)}"
         raise HTTPException(status_code=500, detail=detail_msg)
+
+
+def _export_row(record: Any) -> Dict[str, Any]:
+    """
+    Mengubah FluxRecord menjadi baris ekspor (tanpa kolom internal Flux)
+    """
+    return {key: value for key, value in record.values.items() if key not in _EXPORT_EXCLUDED_COLUMNS}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def _encode_ndjson(batches: AsyncIterator[List[Any]]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(json.dumps(_export_row(record), default=_json_default) + "\n" for record in batch)
+
+
+async def _encode_csv(batches: AsyncIterator[List[Any]]) -> AsyncIterator[str]:
+    # Stream tidak dapat mengetahui semua kolom di awal: jika tabel berikutnya membawa kolom
+    # baru, header ditulis ulang (didahului baris kosong) dengan gabungan kolom sejauh ini
+    fieldnames: List[str] = []
+    async for batch in batches:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        for record in batch:
+            row = _export_row(record)
+            new_columns = [key for key in row if key not in fieldnames]
+            if new_columns:
+                if fieldnames:
+                    buffer.write("\r\n")
+                fieldnames = fieldnames + new_columns
+                writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+                writer.writeheader()
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in row.items()
+            })
+        yield buffer.getvalue()
+
+
+async def stream_sensor_data(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    device_ids: Optional[List[str]],
+    locations: Optional[List[str]],
+    fields: Optional[List[str]],
+    measurement_name: str,
+    aggregate_window: Optional[str],
+    aggregate_function: Optional[str],
+    export_format: str
+) -> AsyncIterator[str]:
+    """
+    Mengekspor data sensor sebagai stream NDJSON atau CSV dengan memori konstan
+
+    Berbeda dengan `get_sensor_data`, tidak ada batas jumlah record: seluruh data dalam
+    rentang waktu dibaca per batch melalui `query_gateway.query_stream` dan langsung
+    dikirim ke klien, sehingga cocok untuk ekspor data mentah berbulan-bulan.
+
+    Args:
+        start_time: Waktu mulai untuk query
+        end_time: Waktu selesai untuk query
+        device_ids: Daftar ID perangkat untuk difilter
+        locations: Daftar lokasi untuk difilter
+        fields: Kolom data spesifik yang ingin diambil
+        measurement_name: Nama measurement di InfluxDB
+        aggregate_window: Jendela agregasi
+        aggregate_function: Fungsi agregasi
+        export_format: Format ekspor ("ndjson" atau "csv")
+
+    Returns:
+        AsyncIterator[str]: Potongan isi respons, siap untuk StreamingResponse
+
+    Raises:
+        HTTPException: Jika parameter tidak valid atau query gagal dijalankan
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format ekspor tidak valid: {export_format}. Pilihan yang valid: json, {', '.join(EXPORT_FORMATS)}"
+        )
+
+    flux_query = _build_sensor_data_query(
+        start_time, end_time, device_ids, locations, fields, None,
+        measurement_name, aggregate_window, aggregate_function
+    )
+
+    try:
+        logger.info(f"Menjalankan ekspor {export_format} data sensor: {flux_query}")
+        batches = await query_gateway.query_stream(flux_query, "ekspor data sensor")
+    except InfluxDBError as e:
+        logger.error(f"InfluxDBError saat ekspor data sensor: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Gagal query data dari InfluxDB: {e.message}")
+
+    encoder = _encode_ndjson if export_format == "ndjson" else _encode_csv
+    return encoder(batches)
+
+
+def _format_ns(timestamp_ns: int) -> str:
+    """
+    Timestamp epoch nanodetik -> RFC3339 dengan presisi nanodetik untuk range() Flux
+    """
+    return np.datetime_as_string(np.datetime64(timestamp_ns, "ns"), unit="ns") + "Z"
+
+
+def encode_cursor(timestamp_ns: int, series_key: List[str], stop: str) -> str:
+    """
+    Membuat token cursor opaque dari posisi terakhir (waktu + kunci seri) dan batas akhir rentang
+
+    Args:
+        timestamp_ns: `_time` baris terakhir halaman (epoch nanodetik)
+        series_key: Nilai SERIES_KEY_COLUMNS baris terakhir
+        stop: Batas akhir rentang query (RFC3339), tetap sama di semua halaman
+
+    Returns:
+        str: Token cursor (base64 URL-safe)
+    """
+    payload = json.dumps({"t": int(timestamp_ns), "k": list(series_key), "s": stop}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Tuple[str, ...], str]:
+    """
+    Membaca token cursor dari `encode_cursor`
+
+    Returns:
+        Tuple[int, Tuple[str, ...], str]: Waktu (epoch nanodetik), kunci seri, dan batas akhir rentang
+
+    Raises:
+        HTTPException: 400 jika cursor tidak valid
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        series_key = tuple(str(value) for value in payload["k"])
+        if len(series_key) != len(SERIES_KEY_COLUMNS):
+            raise ValueError("panjang kunci seri tidak sesuai")
+        return int(payload["t"]), series_key, str(payload["s"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Cursor tidak valid: {e}")
+
+
+async def get_sensor_data_page(
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    device_ids: Optional[List[str]],
+    locations: Optional[List[str]],
+    fields: Optional[List[str]],
+    page_size: int,
+    measurement_name: str,
+    aggregate_window: Optional[str],
+    aggregate_function: Optional[str],
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Mengambil satu halaman data sensor dengan pagination keyset (`_time` + kunci seri)
+
+    Halaman diurutkan berdasarkan (_time, device_id, location, source_ip, hex_id_from_data).
+    Setiap halaman adalah query rentang mulai dari waktu cursor dengan `limit(page_size + 1)`
+    per seri, sehingga biaya per halaman tetap (paling banyak seri × (page_size + 1) baris)
+    berapa pun posisi halaman. Baris dari semua seri lalu digabung dan dipotong di memori.
+
+    Args:
+        start_time: Waktu mulai untuk query (halaman pertama)
+        end_time: Waktu selesai untuk query. Default: waktu permintaan halaman pertama,
+            dan dibekukan di cursor agar halaman berikutnya konsisten.
+        device_ids: Daftar ID perangkat untuk difilter
+        locations: Daftar lokasi untuk difilter
+        fields: Kolom data spesifik yang ingin diambil
+        page_size: Jumlah baris per halaman
+        measurement_name: Nama measurement di InfluxDB
+        aggregate_window: Jendela agregasi
+        aggregate_function: Fungsi agregasi
+        cursor: Token cursor dari halaman sebelumnya (opsional, None untuk halaman pertama)
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[str]]: Baris halaman ini dan cursor halaman
+        berikutnya (None jika sudah halaman terakhir)
+
+    Raises:
+        HTTPException: Jika cursor/parameter tidak valid atau query gagal
+    """
+    if cursor:
+        cursor_ns, cursor_key, range_stop = decode_cursor(cursor)
+        range_start = _format_ns(cursor_ns)
+    else:
+        cursor_ns, cursor_key = None, None
+        range_start = None
+        range_stop = (end_time or datetime.now(timezone.utc)).isoformat()
+
+    flux_query = _build_sensor_data_query(
+        start_time, end_time, device_ids, locations, fields, page_size + 1,
+        measurement_name, aggregate_window, aggregate_function,
+        range_start=range_start, range_stop=range_stop
+    )
+
+    try:
+        logger.info(f"Menjalankan Flux query untuk halaman data sensor: {flux_query}")
+        frame = await query_gateway.query_columns(flux_query, "query halaman data sensor")
+    except InfluxDBError as e:
+        logger.error(f"InfluxDBError saat query halaman data sensor: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Gagal query data dari InfluxDB: {e.message}")
+
+    if frame.empty:
+        return [], None
+
+    keys = frame.reindex(columns=SERIES_KEY_COLUMNS).fillna("").astype(str)
+    frame = frame.assign(**{f"__key_{i}": keys[column] for i, column in enumerate(SERIES_KEY_COLUMNS)})
+    key_columns = [f"__key_{i}" for i in range(len(SERIES_KEY_COLUMNS))]
+    # Ada seri yang terpotong limit: data setelah halaman ini mungkin masih ada
+    truncated = bool((frame.groupby(key_columns).size() > page_size).any())
+
+    times_ns = frame["_time"].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    frame = frame.assign(__time_ns=times_ns)
+    if cursor_ns is not None:
+        # Baris pada waktu cursor yang kuncinya <= kunci cursor sudah dikirim di halaman sebelumnya
+        at_cursor = frame["__time_ns"].to_numpy() == cursor_ns
+        already_sent = np.array([
+            tuple(row) <= cursor_key for row in frame.loc[at_cursor, key_columns].itertuples(index=False, name=None)
+        ], dtype=bool)
+        drop = np.zeros(len(frame), dtype=bool)
+        drop[np.flatnonzero(at_cursor)[already_sent]] = True
+        frame = frame[~drop]
+
+    frame = frame.sort_values(["__time_ns", *key_columns], kind="stable")
+    page = frame.head(page_size)
+    has_more = len(frame) > page_size or (truncated and len(page) == page_size)
+
+    next_cursor = None
+    if has_more and not page.empty:
+        last = page.iloc[-1]
+        next_cursor = encode_cursor(int(last["__time_ns"]), [last[column] for column in key_columns], range_stop)
+
+    page = page.drop(columns=[*key_columns, "__time_ns"])
+    page = page.astype(object).where(pd.notnull(page), None)
+    return page.to_dict(orient="records"), next_cursor
@@ -0,0 +1,226 @@
+"""
+Service prober keterjangkauan perangkat di background
+Memeriksa setiap perangkat dengan TCP connect asinkron (tanpa subprocess `ping`) secara
+berkala dengan jumlah koneksi paralel terbatas, lalu menyimpan status per perangkat
+(terakhir terlihat, RTT, riwayat flap) dalam snapshot yang dibaca endpoint health dan
+status perangkat tanpa memicu pemeriksaan baru.
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional
+
+from utils.tick_scheduler import TickScheduler
+
+# Konstanta
+DEVICE_PROBE_INTERVAL_SECONDS = float(os.getenv("DEVICE_PROBE_INTERVAL_SECONDS", "30"))
+DEVICE_PROBE_TIMEOUT_SECONDS = float(os.getenv("DEVICE_PROBE_TIMEOUT_SECONDS", "1"))
+DEVICE_PROBE_PORT = int(os.getenv("DEVICE_PROBE_PORT", "80"))  # Logger melayani data lewat HTTP
+DEVICE_PROBE_CONCURRENCY = int(os.getenv("DEVICE_PROBE_CONCURRENCY", "32"))
+FLAP_WINDOW = timedelta(hours=1)
+FLAP_HISTORY_SIZE = 32
+
+# Host yang menolak koneksi (RST) tetap hidup di jaringan
+_REACHABLE_ERRNOS = {errno.ECONNREFUSED}
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceProbeState:
+    """
+    Status keterjangkauan satu perangkat
+
+    Args:
+        ip_address: Alamat IP perangkat
+    """
+
+    def __init__(self, ip_address: str):
+        self.ip_address = ip_address
+        self.is_active = False
+        self.last_checked: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.rtt_ms: Optional[float] = None
+        self.consecutive_failures = 0
+        self.transitions: Deque[datetime] = deque(maxlen=FLAP_HISTORY_SIZE)
+
+    def record(self, reachable: bool, rtt_ms: Optional[float], checked_at: datetime) -> None:
+        """
+        Mencatat hasil satu pemeriksaan
+        """
+        if self.last_checked is not None and reachable != self.is_active:
+            self.transitions.append(checked_at)
+        self.is_active = reachable
+        self.last_checked = checked_at
+        if reachable:
+            self.last_seen = checked_at
+            self.rtt_ms = rtt_ms
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+    def flap_count(self, now: datetime) -> int:
+        """
+        Jumlah perubahan status aktif/tidak aktif dalam FLAP_WINDOW terakhir
+        """
+        return sum(1 for changed_at in self.transitions if now - changed_at <= FLAP_WINDOW)
+
+    def to_dict(self, now: datetime) -> Dict:
+        return {
+            "ip_address": self.ip_address,
+            "is_active": self.is_active,
+            "last_checked": self.last_checked,
+            "last_seen": self.last_seen,
+            "rtt_ms": self.rtt_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "flaps_last_hour": self.flap_count(now),
+        }
+
+
+class ProbeSnapshot(NamedTuple):
+    """
+    Hasil satu putaran pemeriksaan semua perangkat (immutable, aman dibaca bersamaan)
+    """
+    refreshed_at: datetime
+    devices: List[Dict]      # Satu dict per perangkat, urutan daftar perangkat
+    active_count: int
+    total_count: int
+
+    def statuses(self) -> Dict[str, bool]:
+        return {device["ip_address"]: device["is_active"] for device in self.devices}
+
+
+async def probe_tcp(ip_address: str, port: int = DEVICE_PROBE_PORT,
+                    timeout: float = DEVICE_PROBE_TIMEOUT_SECONDS) -> Optional[float]:
+    """
+    Memeriksa perangkat dengan TCP connect asinkron
+
+    Args:
+        ip_address: Alamat IP perangkat
+        port: Port TCP yang dicoba
+        timeout: Batas waktu koneksi dalam detik
+
+    Returns:
+        Optional[float]: RTT koneksi dalam milidetik, atau None jika tidak terjangkau
+    """
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip_address, port), timeout=timeout)
+    except asyncio.TimeoutError:
+        return None
+    except OSError as e:
+        if e.errno in _REACHABLE_ERRNOS:
+            return round((time.perf_counter() - started) * 1000, 3)
+        logger.debug(f"Koneksi TCP ke {ip_address}:{port} gagal: {e}")
+        return None
+    rtt_ms = round((time.perf_counter() - started) * 1000, 3)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return rtt_ms
+
+
+class DeviceProber:
+    """
+    Menjalankan pemeriksaan berkala semua perangkat dan menyimpan snapshot terakhir
+
+    Args:
+        get_ips: Fungsi yang mengembalikan daftar IP perangkat saat ini
+        interval: Jarak antar putaran pemeriksaan dalam detik
+        concurrency: Jumlah maksimum pemeriksaan yang berjalan bersamaan
+        probe: Fungsi pemeriksaan asinkron (IP -> RTT ms atau None)
+    """
+
+    def __init__(self, get_ips: Callable[[], List[str]],
+                 interval: float = DEVICE_PROBE_INTERVAL_SECONDS,
+                 concurrency: int = DEVICE_PROBE_CONCURRENCY,
+                 probe: Callable[[str], Awaitable[Optional[float]]] = probe_tcp):
+        self._get_ips = get_ips
+        self.interval = interval
+        self.concurrency = concurrency
+        self._probe = probe
+        self._states: Dict[str, DeviceProbeState] = {}
+        self._snapshot: Optional[ProbeSnapshot] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Optional[ProbeSnapshot]:
+        """
+        Snapshot terakhir (None jika belum pernah ada putaran pemeriksaan)
+        """
+        return self._snapshot
+
+    async def refresh(self) -> ProbeSnapshot:
+        """
+        Memeriksa semua perangkat sekali dan menerbitkan snapshot baru
+
+        Pemanggilan bersamaan berbagi satu putaran pemeriksaan.
+
+        Returns:
+            ProbeSnapshot: Snapshot hasil pemeriksaan
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return self._snapshot
+        async with self._refresh_lock:
+            return await self._refresh()
+
+    async def _refresh(self) -> ProbeSnapshot:
+        ips = list(dict.fromkeys(self._get_ips()))
+        # Perangkat yang dihapus dari daftar tidak dilaporkan lagi
+        self._states = {ip: self._states.get(ip) or DeviceProbeState(ip) for ip in ips}
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+
+        async def check(state: DeviceProbeState) -> None:
+            async with semaphore:
+                try:
+                    rtt_ms = await self._probe(state.ip_address)
+                except Exception as e:
+                    logger.error(f"Error saat memeriksa perangkat {state.ip_address}: {e}", exc_info=True)
+                    rtt_ms = None
+            # Status diperbarui segera setelah perangkat selesai diperiksa
+            state.record(rtt_ms is not None, rtt_ms, datetime.now())
+
+        started = time.perf_counter()
+        await asyncio.gather(*(check(state) for state in self._states.values()))
+
+        now = datetime.now()
+        devices = [state.to_dict(now) for state in self._states.values()]
+        active_count = sum(1 for device in devices if device["is_active"])
+        self._snapshot = ProbeSnapshot(now, devices, active_count, len(devices))
+        logger.info(f"Pemeriksaan perangkat selesai dalam {(time.perf_counter() - started) * 1000:.0f} ms: "
+                    f"{active_count}/{len(devices)} perangkat aktif")
+        return self._snapshot
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Putaran pemeriksaan perangkat gagal: {e}", exc_info=True)
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai pemeriksaan berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Prober perangkat dimulai (interval {self.interval} detik, paralel {self.concurrency})")
+
+    def stop(self) -> None:
+        """
+        Menghentikan pemeriksaan berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
@@ -0,0 +1,148 @@
+"""
+Service layer untuk registry perangkat berbasis data InfluxDB
+Menyimpan daftar device_id beserta lokasi dan waktu data terakhirnya di memori.
+Muat awal memindai 90 hari terakhir; refresh berikutnya hanya memindai data sejak
+watermark (timestamp data terakhir yang sudah terlihat) sehingga biayanya tetap kecil.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from services import query_gateway
+from services.result_cache import AsyncResultCache, cached
+from flux_queries import get_device_last_seen_query
+
+# Konstanta
+INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
+DEVICE_REGISTRY_LOOKBACK = "-90d"
+DEVICE_REGISTRY_REFRESH_SECONDS = float(os.getenv("DEVICE_REGISTRY_REFRESH_SECONDS", "60"))
+# Mundurkan watermark sedikit agar titik data yang terlambat ditulis tetap terambil
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Variabel global registry
+_devices: Dict[str, Dict[str, Any]] = {}
+_watermark: Optional[datetime] = None
+
+registry_cache = AsyncResultCache("device_registry", ttl_seconds=DEVICE_REGISTRY_REFRESH_SECONDS)
+
+logger = logging.getLogger(__name__)
+
+
+def _format_flux_time(value: datetime) -> str:
+    """
+    Mengubah datetime menjadi literal waktu RFC3339 (UTC) untuk Flux
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _merge_records(tables) -> int:
+    """
+    Menggabungkan hasil query last-seen ke registry dan memajukan watermark
+
+    Args:
+        tables: Hasil query Flux (satu tabel per device_id, satu baris per seri)
+
+    Returns:
+        int: Jumlah perangkat baru yang ditambahkan ke registry
+    """
+    global _watermark
+
+    new_devices = 0
+    for table in tables:
+        for record in table.records:
+            device_id = record.values.get("device_id")
+            record_time = record.values.get("_time")
+            if not device_id or record_time is None:
+                continue
+
+            entry = _devices.get(device_id)
+            if entry is None:
+                entry = {"location": None, "location_time": None, "last_seen": record_time}
+                _devices[device_id] = entry
+                new_devices += 1
+
+            if record_time > entry["last_seen"]:
+                entry["last_seen"] = record_time
+
+            # Lokasi diambil dari seri terbaru yang memiliki tag location
+            location = record.values.get("location")
+            if location and (entry["location_time"] is None or record_time >= entry["location_time"]):
+                entry["location"] = location
+                entry["location_time"] = record_time
+
+            if _watermark is None or record_time > _watermark:
+                _watermark = record_time
+
+    return new_devices
+
+
+@cached(registry_cache)
+async def refresh_device_registry() -> List[Dict[str, Any]]:
+    """
+    Memperbarui registry perangkat secara inkremental dari watermark
+
+    Hanya satu refresh yang berjalan per interval DEVICE_REGISTRY_REFRESH_SECONDS;
+    permintaan bersamaan menunggu hasil refresh yang sama.
+
+    Returns:
+        List[Dict[str, Any]]: Daftar perangkat dengan device_id dan lokasi terakhir
+
+    Raises:
+        HTTPException: Jika query ke InfluxDB timeout atau koneksi belum siap
+    """
+    if _watermark is None:
+        start = DEVICE_REGISTRY_LOOKBACK
+    else:
+        start = _format_flux_time(_watermark - WATERMARK_OVERLAP)
+
+    flux_query = get_device_last_seen_query(INFLUXDB_BUCKET, start)
+    logger.debug(f"Menjalankan Flux query registry perangkat: {flux_query}")
+    tables = await query_gateway.query(flux_query, "query registry perangkat")
+
+    new_devices = _merge_records(tables)
+    if new_devices:
+        logger.info(f"Registry perangkat: {new_devices} perangkat baru, total {len(_devices)}")
+
+    return [
+        {"device_id": device_id, "location": entry["location"] or "N/A"}
+        for device_id, entry in sorted(_devices.items())
+    ]
+
+
+async def list_devices_with_location() -> List[Dict[str, Any]]:
+    """
+    Mendapatkan daftar perangkat unik beserta lokasi terakhir yang diketahui
+
+    Returns:
+        List[Dict[str, Any]]: Daftar perangkat dengan device_id dan lokasi ("N/A" jika tidak diketahui)
+    """
+    devices = await refresh_device_registry()
+    return [dict(device) for device in devices]
+
+
+def get_last_write_times() -> Dict[str, Dict[str, Any]]:
+    """
+    Waktu data terakhir dan lokasi setiap perangkat yang sudah terlihat, tanpa query ke InfluxDB
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Map device_id -> {"last_write_time": datetime, "location": str|None}
+    """
+    return {
+        device_id: {"last_write_time": entry["last_seen"], "location": entry["location"]}
+        for device_id, entry in _devices.items()
+    }
+
+
+def reset_device_registry() -> None:
+    """
+    Mengosongkan registry dan watermark sehingga refresh berikutnya memuat ulang penuh
+    """
+    global _watermark
+
+    _devices.clear()
+    _watermark = None
+    registry_cache.invalidate()
@@ -9,7 +9,9 @@ from datetime import datetime
 from pydantic import BaseModel
 from influxdb_client import InfluxDBClient
 
-from services.device_service import refresh_device_status, get_device_ips_from_csv
+from services.device_service import get_probe_snapshot
+from services.liveness_service import LIVENESS_ACTIVE, LIVENESS_MISSING, LIVENESS_STALE, get_device_liveness
+from services import query_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,10 @@ class SystemHealthStatus(BaseModel):
     total_devices: int  # Jumlah total perangkat terdaftar
     ratio_active_to_total: float  # Rasio perangkat aktif terhadap total
     influxdb_connection: str  # Status koneksi InfluxDB (connected, disconnected)
+    reachable_devices: int = 0  # Jumlah perangkat yang menjawab pemeriksaan jaringan
+    stale_devices: int = 0  # Perangkat yang pernah mengirim data tetapi datanya sudah usang
+    missing_devices: int = 0  # Perangkat terkonfigurasi yang belum pernah mengirim data
+    activity_source: str = "reachability"  # Dasar perhitungan perangkat aktif (data_freshness, reachability)
 
 async def get_system_health_status(influx_client: InfluxDBClient) -> SystemHealthStatus:
     """
@@ -36,19 +42,30 @@ async def get_system_health_status(influx_client: InfluxDBClient) -> SystemHealt
     influxdb_ok = False
     if influx_client:
         try:
-            influxdb_ok = influx_client.ping()
+            influxdb_ok = await query_gateway.run_blocking(influx_client.ping, "ping InfluxDB", timeout=5)
             logger.info("InfluxDB ping successful for health check.")
         except Exception as ping_exc:
             logger.warning(f"InfluxDB ping failed during health check: {ping_exc}", exc_info=True)
             influxdb_ok = False
     influxdb_connection_status = "connected" if influxdb_ok else "disconnected"
 
-    # Refresh status perangkat
-    device_statuses = await refresh_device_status()
+    # Status perangkat dibaca dari snapshot prober background (tanpa pemeriksaan ulang)
+    snapshot = await get_probe_snapshot()
     
-    # Hitung perangkat aktif dan total
-    total_devices_count = len(device_statuses)
-    active_devices_count = sum(1 for is_active in device_statuses.values() if is_active)
+    # Perangkat aktif = perangkat yang masih menulis data; perangkat bisa menjawab ping
+    # tetapi berhenti mengirim pembacaan. Tanpa InfluxDB, hanya keterjangkauan yang tersedia.
+    total_devices_count = snapshot.total_count
+    active_devices_count = snapshot.active_count
+    stale_count = missing_count = 0
+    activity_source = "reachability"
+    if influxdb_ok:
+        liveness = await get_device_liveness()
+        if liveness.up_to_date and liveness.devices:
+            total_devices_count = len(liveness.devices)
+            active_devices_count = liveness.counts[LIVENESS_ACTIVE]
+            stale_count = liveness.counts[LIVENESS_STALE]
+            missing_count = liveness.counts[LIVENESS_MISSING]
+            activity_source = "data_freshness"
     
     # Hitung rasio dan tentukan status sistem
     ratio = 0.0
@@ -86,5 +103,9 @@ async def get_system_health_status(influx_client: InfluxDBClient) -> SystemHealt
         active_devices=active_devices_count,
         total_devices=total_devices_count,
         ratio_active_to_total=round(ratio, 4),
-        influxdb_connection=influxdb_connection_status
+        influxdb_connection=influxdb_connection_status,
+        reachable_devices=snapshot.active_count,
+        stale_devices=stale_count,
+        missing_devices=missing_count,
+        activity_source=activity_source
     )
@@ -10,8 +10,8 @@ from typing import Dict, List, Any, Optional, Union
 from influxdb_client.client.exceptions import InfluxDBError
 from fastapi import HTTPException
 
-# Import fungsi get_query_api dari stats_service
-from services.stats_service import get_query_api
+# Query dijalankan melalui gateway asinkron agar tidak memblokir event loop
+from services import query_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +30,9 @@ async def execute_query(query: str, description: str = "InfluxDB query") -> List
     Raises:
         HTTPException: Jika terjadi error saat mengakses InfluxDB
     """
-    q_api = get_query_api()
-    
     try:
         logger.info(f"Menjalankan {description}: {query}")
-        results = q_api.query(query=query)
+        results = await query_gateway.query(query, description)
         
         if not results:
             logger.info(f"{description} tidak mengembalikan data")
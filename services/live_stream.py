@@ -0,0 +1,239 @@
+"""
+Service push kondisi ruangan dan status perangkat secara langsung (SSE / WebSocket)
+Satu loop di server membaca snapshot yang sudah dipelihara store background (kondisi
+ruangan dari room_state_store, keterjangkauan dari prober perangkat), menghitung perubahan
+terhadap state terakhir yang diterbitkan, lalu menyebarkannya ke semua pelanggan. Beban
+InfluxDB dan jaringan perangkat bergantung pada interval refresh, bukan jumlah dashboard.
+
+Backpressure: setiap pelanggan menyimpan paling banyak satu event tertunda per topik
+(ruangan/perangkat). Pelanggan yang lambat menerima state terbaru, bukan antrean yang terus
+bertambah.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services import device_service
+from services.room_state_store import room_store
+from utils.device_registry import load_registry
+from utils.tick_scheduler import TickScheduler
+
+# Konstanta
+LIVE_STREAM_INTERVAL_SECONDS = float(os.getenv("LIVE_STREAM_INTERVAL_SECONDS", "5"))
+LIVE_STREAM_HEARTBEAT_SECONDS = 15.0
+LIVE_STREAM_MAX_SUBSCRIBERS = int(os.getenv("LIVE_STREAM_MAX_SUBSCRIBERS", "200"))
+EVENT_ROOM = "room"
+EVENT_DEVICE = "device"
+
+logger = logging.getLogger(__name__)
+
+EventKey = Tuple[str, str]  # (tipe event, ID ruangan atau IP perangkat)
+
+
+def room_event(room_id: str, room_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": EVENT_ROOM, "room_id": room_id,
+            "data": {"currentConditions": room_data.get("currentConditions") or {}}}
+
+
+def device_event(device: Dict[str, Any]) -> Dict[str, Any]:
+    registered = load_registry().get_by_ip(device["ip_address"])
+    return {"type": EVENT_DEVICE, "room_id": registered.location if registered else None,
+            "data": {"ip_address": device["ip_address"],
+                     "device_id": registered.id_logger if registered else None,
+                     "is_active": device["is_active"]}}
+
+
+def event_key(event: Dict[str, Any]) -> EventKey:
+    if event["type"] == EVENT_DEVICE:
+        return EVENT_DEVICE, event["data"]["ip_address"]
+    return event["type"], event["room_id"]
+
+
+async def collect_live_events() -> List[Dict[str, Any]]:
+    """
+    State terkini semua topik dari snapshot in-process (tanpa query atau probe tambahan)
+
+    Returns:
+        List[Dict[str, Any]]: Satu event per ruangan dan per perangkat
+    """
+    events = []
+    rooms = await room_store.get_snapshot()
+    for room_id, room_data in rooms.rooms.items():
+        events.append(room_event(room_id, room_data))
+    probe_snapshot = device_service.prober.snapshot()
+    if probe_snapshot is not None:
+        events.extend(device_event(device) for device in probe_snapshot.devices)
+    return events
+
+
+class Subscription:
+    """
+    Satu pelanggan stream dengan filter ruangan dan antrean terkoalesensi per topik
+
+    Args:
+        rooms: ID ruangan yang diikuti (None = semua ruangan dan perangkat)
+    """
+
+    def __init__(self, rooms: Optional[Set[str]] = None):
+        self.rooms = rooms
+        self.coalesced = 0  # Event yang digantikan event lebih baru sebelum sempat dikirim
+        self._pending: Dict[EventKey, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return self.rooms is None or event.get("room_id") in self.rooms
+
+    def offer(self, key: EventKey, event: Dict[str, Any]) -> None:
+        """
+        Menjadwalkan event untuk dikirim; event tertunda dengan topik yang sama digantikan
+        """
+        if self._pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._pending[key] = event
+        self._wakeup.set()
+
+    async def next_events(self, timeout: float = LIVE_STREAM_HEARTBEAT_SECONDS) -> List[Dict[str, Any]]:
+        """
+        Menunggu event berikutnya
+
+        Args:
+            timeout: Batas waktu tunggu dalam detik
+
+        Returns:
+            List[Dict[str, Any]]: Event tertunda sesuai urutan, atau list kosong jika timeout (waktunya heartbeat)
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self._pending.values())
+        self._pending.clear()
+        self._wakeup.clear()
+        return events
+
+
+class LiveBroadcaster:
+    """
+    Menerbitkan perubahan state ruangan dan perangkat ke semua pelanggan
+
+    Args:
+        collect: Fungsi asinkron yang mengembalikan state terkini semua topik
+        interval: Jarak antar refresh dalam detik
+        max_subscribers: Jumlah maksimum pelanggan bersamaan
+    """
+
+    def __init__(self, collect: Callable[[], Awaitable[List[Dict[str, Any]]]] = collect_live_events,
+                 interval: float = LIVE_STREAM_INTERVAL_SECONDS,
+                 max_subscribers: int = LIVE_STREAM_MAX_SUBSCRIBERS):
+        self._collect = collect
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._state: Dict[EventKey, Dict[str, Any]] = {}
+        self._subscribers: Set[Subscription] = set()
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self, rooms: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        Mendaftarkan pelanggan baru; state terakhir topik yang diikuti langsung dijadwalkan
+
+        Args:
+            rooms: ID ruangan yang diikuti (None = semua)
+
+        Returns:
+            Subscription: Pelanggan baru
+
+        Raises:
+            RuntimeError: Jika jumlah pelanggan sudah mencapai batas
+        """
+        if self.is_full:
+            raise RuntimeError(f"Jumlah pelanggan stream sudah mencapai batas ({self.max_subscribers})")
+        subscription = Subscription(set(rooms) if rooms is not None else None)
+        for key, event in self._state.items():
+            if subscription.wants(event):
+                subscription.offer(key, event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, events: Iterable[Dict[str, Any]]) -> int:
+        """
+        Menerbitkan event yang berbeda dari state terakhir topiknya
+
+        Returns:
+            int: Jumlah event yang berubah
+        """
+        changed = 0
+        for event in events:
+            key = event_key(event)
+            if self._state.get(key) == event:
+                continue
+            self._state[key] = event
+            changed += 1
+            for subscription in self._subscribers:
+                if subscription.wants(event):
+                    subscription.offer(key, event)
+        return changed
+
+    async def refresh(self) -> int:
+        """
+        Membaca state terkini dan menerbitkan perubahannya
+
+        Returns:
+            int: Jumlah event yang berubah
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return 0
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                changed = self.publish(await self._collect())
+            except Exception as e:
+                logger.error(f"Gagal membaca state untuk stream langsung: {e}", exc_info=True)
+                return 0
+            if changed:
+                logger.debug(f"Stream langsung: {changed} perubahan ke {len(self._subscribers)} pelanggan "
+                             f"dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+            return changed
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            await self.refresh()
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai refresh berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Stream langsung dimulai (interval {self.interval} detik)")
+
+    def stop(self) -> None:
+        """
+        Menghentikan refresh berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+broadcaster = LiveBroadcaster()
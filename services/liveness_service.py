@@ -0,0 +1,117 @@
+"""
+Service liveness perangkat berbasis kesegaran data di InfluxDB
+Perangkat dianggap aktif jika masih menulis data, bukan sekadar menjawab ping. Waktu tulis
+terakhir per device_id diambil dari registry perangkat (services/device_registry_service.py),
+yang diperbarui dengan satu query last() terkelompok secara inkremental dan di-cache, lalu
+dibandingkan dengan daftar perangkat yang dikonfigurasi di device_list.csv.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from services import device_registry_service
+from utils import device_registry
+
+# Konstanta
+DEVICE_STALE_AFTER_SECONDS = float(os.getenv("DEVICE_STALE_AFTER_SECONDS", "300"))
+
+LIVENESS_ACTIVE = "active"
+LIVENESS_STALE = "stale"
+LIVENESS_MISSING = "missing"
+
+logger = logging.getLogger(__name__)
+
+
+class LivenessSnapshot(NamedTuple):
+    """
+    Status liveness semua perangkat pada satu waktu
+    """
+    generated_at: datetime
+    devices: List[Dict[str, Any]]
+    counts: Dict[str, int]
+    up_to_date: bool         # False jika refresh dari InfluxDB gagal dan data terakhir dipakai
+
+
+def classify(last_write_time: Optional[datetime], now: datetime,
+             stale_after_seconds: float = DEVICE_STALE_AFTER_SECONDS) -> str:
+    """
+    Menentukan status liveness dari waktu tulis terakhir
+
+    Args:
+        last_write_time: Waktu data terakhir perangkat (None jika belum pernah terlihat)
+        now: Waktu acuan (UTC)
+        stale_after_seconds: Umur data maksimum untuk dianggap aktif
+
+    Returns:
+        str: "active", "stale", atau "missing"
+    """
+    if last_write_time is None:
+        return LIVENESS_MISSING
+    if (now - last_write_time).total_seconds() <= stale_after_seconds:
+        return LIVENESS_ACTIVE
+    return LIVENESS_STALE
+
+
+def build_snapshot(last_writes: Dict[str, Dict[str, Any]], configured: device_registry.DeviceRegistry,
+                   now: datetime, up_to_date: bool = True) -> LivenessSnapshot:
+    """
+    Menyusun status liveness untuk perangkat terkonfigurasi dan perangkat lain yang mengirim data
+
+    Args:
+        last_writes: Map device_id -> {"last_write_time", "location"} dari registry perangkat
+        configured: Registry device_list.csv (device_id = ID LOGGER)
+        now: Waktu acuan (UTC)
+        up_to_date: Apakah last_writes berasal dari refresh yang berhasil
+
+    Returns:
+        LivenessSnapshot: Status per perangkat beserta jumlah per status
+    """
+    devices = []
+    counts = {LIVENESS_ACTIVE: 0, LIVENESS_STALE: 0, LIVENESS_MISSING: 0}
+    device_ids = [device.id_logger for device in configured]
+    device_ids += sorted(device_id for device_id in last_writes if configured.get_by_id(device_id) is None)
+
+    for device_id in device_ids:
+        seen = last_writes.get(device_id, {})
+        config = configured.get_by_id(device_id)
+        last_write_time = seen.get("last_write_time")
+        state = classify(last_write_time, now)
+        counts[state] += 1
+        devices.append({
+            "device_id": device_id,
+            "location": seen.get("location") or (config.location if config else None),
+            "ip_address": config.ip_address if config else None,
+            "configured": config is not None,
+            "state": state,
+            "last_write_time": last_write_time,
+            "age_seconds": round((now - last_write_time).total_seconds(), 1) if last_write_time else None,
+        })
+    return LivenessSnapshot(now, devices, counts, up_to_date)
+
+
+async def get_device_liveness() -> LivenessSnapshot:
+    """
+    Status liveness semua perangkat
+
+    Registry perangkat di-refresh paling sering sekali per DEVICE_REGISTRY_REFRESH_SECONDS
+    (satu query terkelompok untuk semua perangkat); jika refresh gagal, waktu tulis terakhir
+    yang sudah diketahui tetap dipakai dan snapshot ditandai tidak mutakhir.
+
+    Returns:
+        LivenessSnapshot: Status per perangkat beserta jumlah per status
+    """
+    up_to_date = True
+    try:
+        await device_registry_service.refresh_device_registry()
+    except Exception as e:
+        logger.warning(f"Refresh registry perangkat gagal, memakai waktu tulis terakhir yang diketahui: {e}")
+        up_to_date = False
+
+    return build_snapshot(
+        device_registry_service.get_last_write_times(),
+        device_registry.load_registry(),
+        datetime.now(timezone.utc),
+        up_to_date
+    )
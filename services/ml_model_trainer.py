@@ -36,6 +36,7 @@ class ModelTrainer:
         self.scalers = {}
         self.training_history = []
         self.feature_importance = {}
+        self.feature_names = {}
         
         # Create models directory
         os.makedirs(model_storage_path, exist_ok=True)
@@ -226,6 +227,7 @@ class ModelTrainer:
             
             # Store model
             self.models[model_name] = model
+            self.feature_names[model_name] = list(X_train.columns)
             
             # Calculate feature importance if available
             feature_importance = self._get_feature_importance(model, X_train.columns)
@@ -431,6 +433,7 @@ class ModelTrainer:
                 'model': self.models[model_name],
                 'scaler': self.scalers.get(model_name),
                 'feature_importance': self.feature_importance.get(model_name, {}),
+                'feature_names': self.feature_names.get(model_name, []),
                 'model_name': model_name,
                 'version': version,
                 'trained_at': datetime.now().isoformat()
@@ -470,6 +473,7 @@ class ModelTrainer:
             self.models[model_name] = model_data['model']
             self.scalers[model_name] = model_data.get('scaler')
             self.feature_importance[model_name] = model_data.get('feature_importance', {})
+            self.feature_names[model_name] = model_data.get('feature_names', [])
             
             logger.info(f"Model {model_name} berhasil dimuat dari {model_path}")
             return model_name
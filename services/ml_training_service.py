@@ -12,10 +12,13 @@ from typing import Dict, List, Any, Optional, Tuple
 from influxdb_client.client.exceptions import InfluxDBError
 from fastapi import HTTPException
 
-from services.stats_service import get_query_api
+from services import query_gateway
 
 logger = logging.getLogger(__name__)
 
+# Query data training mencakup rentang panjang, beri batas waktu lebih longgar
+TRAINING_QUERY_TIMEOUT_SECONDS = 120
+
 
 class TrainingDataCollector:
     """
@@ -24,7 +27,6 @@ class TrainingDataCollector:
     
     def __init__(self, bucket: str = "sensor_data_primary"):
         self.bucket = bucket
-        self.query_api = get_query_api()
     
     async def collect_historical_data(
         self, 
@@ -65,7 +67,9 @@ class TrainingDataCollector:
         
         try:
             logger.info(f"Mengumpulkan data training untuk {days_back} hari terakhir")
-            results = self.query_api.query_data_frame(query=query)
+            results = await query_gateway.query_data_frame(
+                query, "query data training", timeout=TRAINING_QUERY_TIMEOUT_SECONDS
+            )
             
             if results.empty:
                 logger.warning("Tidak ada data historis ditemukan")
@@ -80,6 +84,8 @@ class TrainingDataCollector:
         except InfluxDBError as e:
             logger.error(f"InfluxDBError saat mengumpulkan data training: {e}")
             raise HTTPException(status_code=500, detail=f"Gagal mengumpulkan data training: {e.message}")
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error saat mengumpulkan data training: {e}")
             raise HTTPException(status_code=500, detail="Gagal mengumpulkan data training")
@@ -197,7 +203,9 @@ class TrainingDataCollector:
         '''
         
         try:
-            results = self.query_api.query_data_frame(query=query)
+            results = await query_gateway.query_data_frame(
+                query, "query data cuaca eksternal", timeout=TRAINING_QUERY_TIMEOUT_SECONDS
+            )
             
             if results.empty:
                 logger.warning("Tidak ada data cuaca eksternal ditemukan")
@@ -0,0 +1,366 @@
+"""
+Service akumulasi waktu di rentang optimal per ruangan
+Setiap pembacaan baru menambah durasi "di dalam" atau "di luar" rentang optimal (target ±
+toleransi dari pengaturan otomasi) ke counter per jam untuk setiap (ruangan, parameter).
+Counter disimpan ringkas ke disk, sehingga persentase untuk jendela berapa pun (24 jam,
+30 hari) dijawab dengan menjumlahkan beberapa puluh counter tanpa memindai ulang data mentah.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from services import query_gateway
+from utils.tick_scheduler import TickScheduler
+from flux_queries.room_data import get_room_readings_since_query
+
+# Konstanta
+INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
+OPTIMAL_RANGE_STATE_PATH = os.getenv(
+    "OPTIMAL_RANGE_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "optimal_range_state.json")
+)
+OPTIMAL_RANGE_REFRESH_SECONDS = float(os.getenv("OPTIMAL_RANGE_REFRESH_SECONDS", "60"))
+OPTIMAL_RANGE_RETENTION_HOURS = int(os.getenv("OPTIMAL_RANGE_RETENTION_HOURS", str(35 * 24)))
+OPTIMAL_RANGE_BACKFILL = "-24h"  # Rentang yang diproses saat belum ada state tersimpan
+# Jeda antar pembacaan yang lebih panjang dari ini dianggap perangkat tidak mengirim data
+# dan tidak dihitung (selaras DEVICE_STALE_AFTER_SECONDS di liveness_service)
+OPTIMAL_RANGE_MAX_GAP_SECONDS = 300.0
+# Query inkremental dimulai sejauh ini sebelum watermark agar pembacaan perangkat lain yang
+# terlambat ditulis tetap terambil; pembacaan yang sudah diproses diabaikan per perangkat
+OPTIMAL_RANGE_LOOKBACK_SECONDS = OPTIMAL_RANGE_MAX_GAP_SECONDS
+OPTIMAL_RANGE_FIELDS = ("temperature", "humidity")
+# Dipakai jika pengaturan otomasi tidak dapat dibaca
+DEFAULT_OPTIMAL_RANGES = {"temperature": (22.0, 26.0), "humidity": (50.0, 70.0)}
+READING_COLUMNS = ["_time", "_value", "_field", "location", "device_id"]
+STATE_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def _hour_start(timestamp: float) -> int:
+    return int(timestamp // 3600) * 3600
+
+
+class OptimalRangeAccumulator:
+    """
+    Counter durasi di dalam/di luar rentang optimal per (ruangan, parameter, jam)
+
+    Durasi antara dua pembacaan berurutan dari perangkat yang sama dikreditkan ke status
+    pembacaan pertama (di dalam atau di luar rentang), dipecah pada batas jam. Ruangan dengan
+    beberapa perangkat menjumlahkan durasi semua perangkatnya.
+
+    Args:
+        max_gap_seconds: Jeda maksimum antar pembacaan yang masih dihitung
+        retention_hours: Jumlah jam counter yang disimpan
+    """
+
+    def __init__(self, max_gap_seconds: float = OPTIMAL_RANGE_MAX_GAP_SECONDS,
+                 retention_hours: int = OPTIMAL_RANGE_RETENTION_HOURS):
+        self.max_gap_seconds = max_gap_seconds
+        self.retention_hours = retention_hours
+        # (ruangan, parameter) -> awal jam (epoch detik) -> [detik di rentang, detik di luar rentang]
+        self.hours: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
+        # (ruangan, perangkat, parameter) -> (waktu pembacaan terakhir, di rentang?)
+        self.last: Dict[Tuple[str, str, str], Tuple[float, bool]] = {}
+        self.watermark: Optional[float] = None  # Waktu pembacaan terbaru yang sudah diproses
+
+    def add(self, room_id: str, device_id: str, field: str, timestamp: float, value: float,
+            value_range: Tuple[float, float]) -> None:
+        """
+        Memproses satu pembacaan
+
+        Pembacaan yang tidak lebih baru dari pembacaan terakhir perangkat tersebut diabaikan.
+
+        Args:
+            room_id: ID ruangan
+            device_id: ID perangkat
+            field: Nama parameter (temperature/humidity)
+            timestamp: Waktu pembacaan (epoch detik)
+            value: Nilai pembacaan
+            value_range: Rentang optimal (min, max) yang berlaku
+        """
+        key = (room_id, device_id, field)
+        previous = self.last.get(key)
+        if previous is not None:
+            previous_time, previous_in_range = previous
+            if timestamp <= previous_time:
+                return
+            if timestamp - previous_time <= self.max_gap_seconds:
+                self._credit(room_id, field, previous_time, timestamp, previous_in_range)
+        self.last[key] = (timestamp, value_range[0] <= value <= value_range[1])
+        if self.watermark is None or timestamp > self.watermark:
+            self.watermark = timestamp
+
+    def _credit(self, room_id: str, field: str, start: float, end: float, in_range: bool) -> None:
+        counters = self.hours.setdefault((room_id, field), {})
+        index = 0 if in_range else 1
+        while start < end:
+            hour = _hour_start(start)
+            chunk_end = min(end, hour + 3600)
+            counters.setdefault(hour, [0.0, 0.0])[index] += chunk_end - start
+            start = chunk_end
+
+    def durations(self, room_id: str, field: str, start: float, end: float) -> Optional[Tuple[float, float]]:
+        """
+        Total durasi di dalam dan di luar rentang optimal pada jam-jam yang beririsan dengan [start, end)
+
+        Returns:
+            Optional[Tuple[float, float]]: (detik di rentang, detik di luar rentang), atau None jika tidak ada data
+        """
+        counters = self.hours.get((room_id, field))
+        if not counters:
+            return None
+        first_hour = _hour_start(start)
+        in_range = out_of_range = 0.0
+        for hour, (hour_in, hour_out) in counters.items():
+            if first_hour <= hour < end:
+                in_range += hour_in
+                out_of_range += hour_out
+        if in_range + out_of_range <= 0:
+            return None
+        return in_range, out_of_range
+
+    def room_ids(self) -> List[str]:
+        return sorted({room_id for room_id, _ in self.hours})
+
+    def prune(self, now: float) -> None:
+        """
+        Membuang counter yang lebih tua dari retention_hours
+        """
+        oldest = _hour_start(now) - self.retention_hours * 3600
+        for counters in self.hours.values():
+            for hour in [hour for hour in counters if hour < oldest]:
+                del counters[hour]
+        self.hours = {key: counters for key, counters in self.hours.items() if counters}
+        self.last = {key: last for key, last in self.last.items() if last[0] >= oldest}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": STATE_VERSION,
+            "watermark": self.watermark,
+            "hours": [[room_id, field, {str(hour): [round(v, 3) for v in counter] for hour, counter in counters.items()}]
+                      for (room_id, field), counters in self.hours.items()],
+            "last": [[room_id, device_id, field, timestamp, in_range]
+                     for (room_id, device_id, field), (timestamp, in_range) in self.last.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **kwargs) -> "OptimalRangeAccumulator":
+        accumulator = cls(**kwargs)
+        if data.get("version") != STATE_VERSION:
+            return accumulator
+        accumulator.watermark = data.get("watermark")
+        for room_id, field, counters in data.get("hours", []):
+            accumulator.hours[(room_id, field)] = {int(hour): list(counter) for hour, counter in counters.items()}
+        for room_id, device_id, field, timestamp, in_range in data.get("last", []):
+            accumulator.last[(room_id, device_id, field)] = (timestamp, in_range)
+        return accumulator
+
+
+async def load_optimal_ranges() -> Dict[str, Tuple[float, float]]:
+    """
+    Rentang optimal (target ± toleransi) dari pengaturan otomasi
+
+    Returns:
+        Dict[str, Tuple[float, float]]: Parameter -> (min, max); DEFAULT_OPTIMAL_RANGES jika pengaturan gagal dibaca
+    """
+    from routes.automation_routes import get_automation_settings
+
+    try:
+        settings = await get_automation_settings(api_key="internal")
+        return {
+            "temperature": (settings["target_temperature"] - settings["temperature_tolerance"],
+                            settings["target_temperature"] + settings["temperature_tolerance"]),
+            "humidity": (settings["target_humidity"] - settings["humidity_tolerance"],
+                         settings["target_humidity"] + settings["humidity_tolerance"]),
+        }
+    except Exception as e:
+        logger.error(f"Gagal membaca pengaturan otomasi, memakai rentang optimal default: {e}")
+        return dict(DEFAULT_OPTIMAL_RANGES)
+
+
+async def load_readings_since(start_time: str):
+    """
+    Pembacaan suhu/kelembapan semua ruangan sejak start_time, diurutkan berdasarkan waktu
+
+    Raises:
+        HTTPException: Jika query ke InfluxDB timeout atau koneksi belum siap
+    """
+    flux_query = get_room_readings_since_query(INFLUXDB_BUCKET, start_time)
+    return await query_gateway.query_columns(flux_query, "query pembacaan ruangan baru", columns=READING_COLUMNS)
+
+
+class OptimalRangeTracker:
+    """
+    Memperbarui akumulator secara berkala dari pembacaan baru dan menyimpannya ke disk
+
+    Rentang optimal dibaca ulang setiap putaran dan berlaku untuk pembacaan yang diproses pada
+    putaran tersebut; counter jam-jam sebelumnya tidak dihitung ulang.
+
+    Args:
+        state_path: File JSON tempat counter disimpan (None = tidak disimpan)
+        loader: Fungsi asinkron yang memuat pembacaan sejak waktu tertentu (DataFrame READING_COLUMNS)
+        ranges_loader: Fungsi asinkron yang mengembalikan rentang optimal per parameter
+        interval: Jarak antar pembaruan dalam detik
+    """
+
+    def __init__(self, state_path: Optional[str] = OPTIMAL_RANGE_STATE_PATH,
+                 loader=load_readings_since, ranges_loader=load_optimal_ranges,
+                 interval: float = OPTIMAL_RANGE_REFRESH_SECONDS):
+        self.state_path = state_path
+        self._loader = loader
+        self._ranges_loader = ranges_loader
+        self.interval = interval
+        self._accumulator: Optional[OptimalRangeAccumulator] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def accumulator(self) -> OptimalRangeAccumulator:
+        if self._accumulator is None:
+            self._accumulator = self._load_state()
+        return self._accumulator
+
+    def _load_state(self) -> OptimalRangeAccumulator:
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, encoding="utf-8") as handle:
+                    return OptimalRangeAccumulator.from_dict(json.load(handle))
+            except (OSError, ValueError, TypeError) as e:
+                logger.error(f"State rentang optimal '{self.state_path}' tidak dapat dibaca, mulai dari awal: {e}")
+        return OptimalRangeAccumulator()
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        temp_path = f"{self.state_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(self.accumulator.to_dict(), handle, separators=(",", ":"))
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.error(f"Gagal menyimpan state rentang optimal ke '{self.state_path}': {e}")
+
+    async def refresh(self) -> int:
+        """
+        Memproses pembacaan yang masuk sejak pembaruan terakhir
+
+        Pemanggilan bersamaan berbagi satu proses pembaruan.
+
+        Returns:
+            int: Jumlah pembacaan yang diproses
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return 0
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            accumulator = self.accumulator
+            start_time = (datetime.fromtimestamp(accumulator.watermark - OPTIMAL_RANGE_LOOKBACK_SECONDS,
+                                                 tz=timezone.utc).isoformat()
+                          if accumulator.watermark is not None else OPTIMAL_RANGE_BACKFILL)
+            ranges = await self._ranges_loader()
+            frame = await self._loader(start_time)
+            processed = self.ingest(frame, ranges)
+            accumulator.prune(time.time())
+            self._save_state()
+            logger.debug(f"Akumulator rentang optimal memproses {processed} pembacaan "
+                         f"dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+            return processed
+
+    def ingest(self, frame: pd.DataFrame, ranges: Dict[str, Tuple[float, float]]) -> int:
+        """
+        Memasukkan pembacaan (DataFrame READING_COLUMNS, urut waktu) ke akumulator
+
+        Returns:
+            int: Jumlah pembacaan yang diproses
+        """
+        if frame.empty:
+            return 0
+        accumulator = self.accumulator
+        timestamps = frame["_time"].dt.as_unit("ns").astype("int64").to_numpy() / 1e9
+        processed = 0
+        for timestamp, value, field, room_id, device_id in zip(
+                timestamps, frame["_value"], frame["_field"], frame["location"], frame["device_id"]):
+            value_range = ranges.get(field)
+            if value_range is None or not isinstance(room_id, str) or math.isnan(value):
+                continue
+            accumulator.add(room_id, device_id if isinstance(device_id, str) else "", field,
+                            float(timestamp), float(value), value_range)
+            processed += 1
+        return processed
+
+    def summary(self, room_id: str, hours: float, now: Optional[float] = None,
+                fields: Sequence[str] = OPTIMAL_RANGE_FIELDS) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Durasi dan persentase waktu di rentang optimal sebuah ruangan dalam jendela terakhir
+
+        Jendela dibulatkan ke batas jam: jam berjalan ikut dihitung beserta `hours` jam sebelumnya.
+
+        Args:
+            room_id: ID ruangan
+            hours: Panjang jendela dalam jam
+            now: Waktu acuan (epoch detik, default waktu sekarang)
+
+        Returns:
+            Dict[str, Optional[Dict[str, float]]]: Parameter -> durasi dan persentase (None jika tidak ada data)
+        """
+        now = time.time() if now is None else now
+        summary = {}
+        for field in fields:
+            durations = self.accumulator.durations(room_id, field, now - hours * 3600, now)
+            if durations is None:
+                summary[field] = None
+                continue
+            in_range, out_of_range = durations
+            summary[field] = {
+                "in_range_seconds": round(in_range),
+                "out_of_range_seconds": round(out_of_range),
+                "percentage": int(round(in_range / (in_range + out_of_range) * 100)),
+            }
+        return summary
+
+    def percentages(self, room_id: str, hours: float = 24, now: Optional[float] = None) -> Dict[str, Optional[int]]:
+        """
+        Persentase waktu di rentang optimal per parameter (format statistics.timeInOptimalRange)
+        """
+        return {field: (value["percentage"] if value else None)
+                for field, value in self.summary(room_id, hours, now).items()}
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Pembaruan akumulator rentang optimal gagal: {e}", exc_info=True)
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai pembaruan berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Akumulator rentang optimal dimulai (interval {self.interval} detik)")
+
+    def stop(self) -> None:
+        """
+        Menghentikan pembaruan berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+optimal_range_tracker = OptimalRangeTracker()
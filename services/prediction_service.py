@@ -0,0 +1,409 @@
+"""
+Service prediksi suhu dan kelembapan per ruangan dari model ML tersimpan
+Model terbaik hasil ModelTrainer (RMSE validasi terendah di direktori model) dimuat sekali
+dan tetap berada di memori. Jendela bergulir rata-rata 10 menit per ruangan di-cache dan
+diperbarui secara inkremental; prakiraan 1-24 jam untuk semua ruangan dihitung di background
+dengan satu pemanggilan `model.predict` batch (semua ruangan sekaligus) per langkah horizon,
+sehingga request hanya mengambil potongan hasil yang sudah jadi.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services import query_gateway
+from utils.tick_scheduler import TickScheduler
+from flux_queries.room_data import get_room_window_query
+
+# Konstanta
+INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
+MODEL_STORAGE_PATH = os.getenv("ML_MODEL_STORAGE_PATH", "/app/models")
+PREDICTION_REFRESH_SECONDS = float(os.getenv("PREDICTION_REFRESH_SECONDS", "600"))
+PREDICTION_MAX_HOURS = 24
+PREDICTION_TIMEOUT_SECONDS = 60
+# Langkah sampel mengikuti asumsi fitur di ml_training_service (lag 1 jam = 6 sampel 10 menit)
+SAMPLE_MINUTES = 10
+SAMPLE_EVERY = f"{SAMPLE_MINUTES}m"
+STEPS_PER_HOUR = 60 // SAMPLE_MINUTES
+WINDOW_SAMPLES = 7 * STEPS_PER_HOUR  # Cukup untuk lag dan rata-rata bergerak 6 jam
+WINDOW_BACKFILL = "-7h"
+MAX_WINDOW_LAG_SECONDS = 3600
+WINDOW_COLUMNS = ["_time", "_value", "_field", "location"]
+# Urutan fitur ml_training_service.prepare_training_features, untuk model lama tanpa daftar fitur
+DEFAULT_FEATURE_COLUMNS = [
+    'temperature', 'humidity', 'hour', 'day_of_week', 'month', 'is_weekend',
+    'temp_lag_1h', 'humidity_lag_1h', 'temp_lag_6h', 'humidity_lag_6h',
+    'temp_ma_1h', 'humidity_ma_1h', 'temp_ma_6h', 'humidity_ma_6h',
+    'temp_change_rate', 'humidity_change_rate'
+]
+
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel(NamedTuple):
+    """
+    Model tersimpan yang sudah dimuat ke memori
+    """
+    path: str
+    model: Any
+    scaler: Any
+    feature_names: List[str]
+    fill_values: np.ndarray   # Nilai fitur yang tidak dapat dihitung saat inferensi (rata-rata training)
+    info: Dict[str, Any]
+
+
+class ForecastSnapshot(NamedTuple):
+    """
+    Prakiraan semua ruangan pada satu waktu (immutable, aman dibaca bersamaan)
+    """
+    generated_at: datetime
+    model_info: Dict[str, Any]
+    rooms: Dict[str, Dict[str, Any]]   # room_id -> currentConditions dan predictions (1..PREDICTION_MAX_HOURS)
+
+
+def find_best_model(model_dir: str = MODEL_STORAGE_PATH) -> Optional[str]:
+    """
+    Model tersimpan dengan RMSE validasi terendah (seri: yang terbaru)
+
+    Args:
+        model_dir: Direktori penyimpanan ModelTrainer
+
+    Returns:
+        Optional[str]: Path file .joblib, atau None jika belum ada model
+    """
+    try:
+        filenames = os.listdir(model_dir)
+    except OSError:
+        return None
+
+    candidates = []
+    for filename in filenames:
+        if not filename.endswith(".joblib"):
+            continue
+        path = os.path.join(model_dir, filename)
+        rmse = math.inf
+        try:
+            with open(path.replace(".joblib", "_metadata.json"), encoding="utf-8") as handle:
+                history = json.load(handle).get("training_history") or []
+            if history:
+                rmse = history[-1].get("val_metrics", {}).get("rmse", math.inf)
+        except (OSError, ValueError):
+            pass
+        candidates.append((rmse, -os.path.getmtime(path), path))
+    return min(candidates)[2] if candidates else None
+
+
+def load_model(path: str) -> LoadedModel:
+    """
+    Memuat model yang disimpan ModelTrainer.save_model
+
+    Raises:
+        ImportError: Jika dependency machine learning (joblib/scikit-learn) tidak tersedia
+    """
+    import joblib
+
+    model_data = joblib.load(path)
+    model, scaler = model_data["model"], model_data.get("scaler")
+    feature_names = list(model_data.get("feature_names") or [])
+    if not feature_names and scaler is not None and hasattr(scaler, "feature_names_in_"):
+        feature_names = list(scaler.feature_names_in_)
+    if not feature_names:
+        feature_names = list(DEFAULT_FEATURE_COLUMNS)
+
+    # Training mengisi nilai kosong dengan rata-rata; fitur eksternal (cuaca BMKG) memakai rata-rata yang sama
+    if scaler is not None and getattr(scaler, "mean_", None) is not None and len(scaler.mean_) == len(feature_names):
+        fill_values = np.asarray(scaler.mean_, dtype=float)
+    else:
+        fill_values = np.zeros(len(feature_names))
+
+    info = {"name": model_data.get("model_name"), "version": model_data.get("version"),
+            "trained_at": model_data.get("trained_at"), "file": os.path.basename(path)}
+    return LoadedModel(path, model, scaler, feature_names, fill_values, info)
+
+
+def build_features(temperature: np.ndarray, humidity: np.ndarray, at: datetime,
+                   feature_names: Sequence[str], fill_values: np.ndarray) -> np.ndarray:
+    """
+    Membangun matriks fitur semua ruangan dari jendela sampel 10 menit
+
+    Definisi fitur sama dengan ml_training_service._clean_dataframe.
+
+    Args:
+        temperature: Matriks suhu (ruangan x sampel, sampel terakhir = kondisi terkini)
+        humidity: Matriks kelembapan dengan bentuk yang sama
+        at: Waktu sampel terakhir (UTC)
+        feature_names: Urutan fitur model
+        fill_values: Nilai untuk fitur yang tidak dapat dihitung
+
+    Returns:
+        np.ndarray: Matriks fitur (ruangan x fitur)
+    """
+    rooms = temperature.shape[0]
+    lag_1h, lag_6h = STEPS_PER_HOUR + 1, 6 * STEPS_PER_HOUR + 1
+    computed = {
+        "temperature": temperature[:, -1],
+        "humidity": humidity[:, -1],
+        "hour": at.hour,
+        "day_of_week": at.weekday(),
+        "month": at.month,
+        "is_weekend": int(at.weekday() >= 5),
+        "temp_lag_1h": temperature[:, -lag_1h],
+        "humidity_lag_1h": humidity[:, -lag_1h],
+        "temp_lag_6h": temperature[:, -lag_6h],
+        "humidity_lag_6h": humidity[:, -lag_6h],
+        "temp_ma_1h": temperature[:, -STEPS_PER_HOUR:].mean(axis=1),
+        "humidity_ma_1h": humidity[:, -STEPS_PER_HOUR:].mean(axis=1),
+        "temp_ma_6h": temperature[:, -6 * STEPS_PER_HOUR:].mean(axis=1),
+        "humidity_ma_6h": humidity[:, -6 * STEPS_PER_HOUR:].mean(axis=1),
+        "temp_change_rate": (temperature[:, -1] - temperature[:, -2]) / 10,
+        "humidity_change_rate": (humidity[:, -1] - humidity[:, -2]) / 10,
+    }
+    features = np.empty((rooms, len(feature_names)))
+    for column, name in enumerate(feature_names):
+        features[:, column] = computed.get(name, fill_values[column])
+    return features
+
+
+def forecast(loaded: LoadedModel, temperature: np.ndarray, humidity: np.ndarray, at: datetime,
+             hours: int = PREDICTION_MAX_HOURS) -> np.ndarray:
+    """
+    Prakiraan rekursif per jam untuk semua ruangan sekaligus
+
+    Model memprediksi kondisi 1 jam ke depan. Setiap langkah memanggil `predict` sekali untuk
+    semua ruangan, lalu jendela diperpanjang dengan interpolasi linear 10 menit menuju hasil
+    prediksi sebagai input langkah berikutnya.
+
+    Args:
+        loaded: Model yang sudah dimuat
+        temperature: Matriks suhu (ruangan x sampel), minimal WINDOW_SAMPLES sampel
+        humidity: Matriks kelembapan dengan bentuk yang sama
+        at: Waktu sampel terakhir (UTC)
+        hours: Jumlah jam prakiraan
+
+    Returns:
+        np.ndarray: Array (ruangan x jam x 2) berisi (suhu, kelembapan)
+    """
+    results = np.empty((temperature.shape[0], hours, 2))
+    ramp = np.arange(1, STEPS_PER_HOUR + 1) / STEPS_PER_HOUR
+    for step in range(hours):
+        features = build_features(temperature, humidity, at, loaded.feature_names, loaded.fill_values)
+        if loaded.scaler is not None:
+            features = loaded.scaler.transform(pd.DataFrame(features, columns=loaded.feature_names))
+        predicted = np.asarray(loaded.model.predict(features), dtype=float).reshape(len(features), -1)
+        results[:, step] = predicted[:, :2]
+
+        # Sampel 10 menit di antara kondisi terakhir dan prediksi
+        temperature = np.concatenate([temperature[:, STEPS_PER_HOUR:], temperature[:, -1:]
+                                      + np.outer(predicted[:, 0] - temperature[:, -1], ramp)], axis=1)
+        humidity = np.concatenate([humidity[:, STEPS_PER_HOUR:], humidity[:, -1:]
+                                   + np.outer(predicted[:, 1] - humidity[:, -1], ramp)], axis=1)
+        at += timedelta(hours=1)
+    return results
+
+
+async def load_window_since(start_time: str) -> pd.DataFrame:
+    """
+    Rata-rata 10 menit suhu/kelembapan semua ruangan sejak start_time
+
+    Raises:
+        HTTPException: Jika query ke InfluxDB timeout atau koneksi belum siap
+    """
+    flux_query = get_room_window_query(INFLUXDB_BUCKET, start_time, SAMPLE_EVERY)
+    return await query_gateway.query_columns(flux_query, "query jendela prediksi ruangan", columns=WINDOW_COLUMNS)
+
+
+class RoomForecaster:
+    """
+    Menjaga model dan jendela fitur per ruangan tetap hangat dan menghitung ulang prakiraan berkala
+
+    Args:
+        model_dir: Direktori model ModelTrainer
+        loader: Fungsi asinkron yang memuat rata-rata 10 menit sejak waktu tertentu (DataFrame WINDOW_COLUMNS)
+        interval: Jarak antar pembaruan dalam detik
+    """
+
+    def __init__(self, model_dir: str = MODEL_STORAGE_PATH, loader=load_window_since,
+                 interval: float = PREDICTION_REFRESH_SECONDS):
+        self.model_dir = model_dir
+        self._loader = loader
+        self.interval = interval
+        self._model: Optional[LoadedModel] = None
+        # room_id -> epoch detik awal jendela 10 menit -> [suhu, kelembapan]
+        self._windows: Dict[str, Dict[int, List[float]]] = {}
+        self._snapshot: Optional[ForecastSnapshot] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Optional[ForecastSnapshot]:
+        """
+        Prakiraan terakhir (None jika belum pernah berhasil dihitung)
+        """
+        return self._snapshot
+
+    async def _ensure_model(self) -> Optional[LoadedModel]:
+        path = find_best_model(self.model_dir)
+        if path is None:
+            if self._model is None:
+                logger.warning(f"Belum ada model tersimpan di {self.model_dir}; prakiraan tidak tersedia")
+            return self._model
+        if self._model is None or self._model.path != path:
+            self._model = await query_gateway.run_blocking(
+                lambda: load_model(path), "memuat model prediksi", timeout=PREDICTION_TIMEOUT_SECONDS
+            )
+            logger.info(f"Model prediksi dimuat: {self._model.info['file']} ({len(self._model.feature_names)} fitur)")
+        return self._model
+
+    async def _update_windows(self) -> None:
+        latest = max((max(samples) for samples in self._windows.values() if samples), default=None)
+        # Jendela terakhir dimuat ulang karena masih bisa bertambah sampel
+        start_time = (datetime.fromtimestamp(latest, tz=timezone.utc).isoformat()
+                      if latest is not None else WINDOW_BACKFILL)
+        frame = await self._loader(start_time)
+        if frame.empty:
+            return
+        timestamps = frame["_time"].dt.as_unit("s").astype("int64").to_numpy()
+        for timestamp, value, field, room_id in zip(timestamps, frame["_value"], frame["_field"], frame["location"]):
+            if not isinstance(room_id, str) or field not in ("temperature", "humidity"):
+                continue
+            sample = self._windows.setdefault(room_id, {}).setdefault(int(timestamp), [math.nan, math.nan])
+            sample[0 if field == "temperature" else 1] = float(value)
+        for room_id, samples in self._windows.items():
+            for timestamp in sorted(samples)[:-WINDOW_SAMPLES]:
+                del samples[timestamp]
+
+    def _window_matrix(self):
+        # Matriks (ruangan x WINDOW_SAMPLES) dengan grid 10 menit; celah diisi nilai terdekat sebelumnya
+        latest = max((max(samples) for samples in self._windows.values() if samples), default=None)
+        if latest is None:
+            return [], None, None, None
+        grid = latest - np.arange(WINDOW_SAMPLES)[::-1] * SAMPLE_MINUTES * 60
+        room_ids, temperature, humidity = [], [], []
+        for room_id, samples in sorted(self._windows.items()):
+            if not samples or max(samples) < latest - MAX_WINDOW_LAG_SECONDS:
+                continue  # Ruangan tanpa data baru tidak diprakirakan dari kondisi lama
+            frame = pd.DataFrame.from_dict(samples, orient="index", columns=["temperature", "humidity"]).sort_index()
+            frame = frame.reindex(frame.index.union(grid)).ffill().bfill().loc[grid]
+            if frame.isna().any().any():
+                continue
+            room_ids.append(room_id)
+            temperature.append(frame["temperature"].to_numpy())
+            humidity.append(frame["humidity"].to_numpy())
+        if not room_ids:
+            return [], None, None, None
+        return room_ids, np.vstack(temperature), np.vstack(humidity), datetime.fromtimestamp(latest, tz=timezone.utc)
+
+    async def refresh(self) -> Optional[ForecastSnapshot]:
+        """
+        Memperbarui jendela fitur dan menghitung ulang prakiraan semua ruangan
+
+        Pemanggilan bersamaan berbagi satu proses pembaruan. Jika gagal, prakiraan sebelumnya tetap dipakai.
+
+        Returns:
+            Optional[ForecastSnapshot]: Prakiraan terbaru (None jika model atau data belum tersedia)
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return self._snapshot
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                loaded = await self._ensure_model()
+                if loaded is None:
+                    return self._snapshot
+                await self._update_windows()
+            except Exception as e:
+                logger.error(f"Gagal memperbarui model atau jendela prediksi: {e}", exc_info=True)
+                return self._snapshot
+            room_ids, temperature, humidity, at = self._window_matrix()
+            if not room_ids:
+                return self._snapshot
+
+            try:
+                results = await query_gateway.run_blocking(
+                    lambda: forecast(loaded, temperature, humidity, at), "prakiraan ruangan",
+                    timeout=PREDICTION_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logger.error(f"Gagal menghitung prakiraan ruangan: {e}", exc_info=True)
+                return self._snapshot
+
+            rooms = {}
+            for index, room_id in enumerate(room_ids):
+                rooms[room_id] = {
+                    "currentConditions": {
+                        "temperature": round(float(temperature[index, -1]), 1),
+                        "humidity": round(float(humidity[index, -1]), 1),
+                        "lastUpdated": at.isoformat()
+                    },
+                    "predictions": [
+                        {
+                            "timestamp": (at + timedelta(hours=hour)).isoformat(),
+                            "hoursAhead": hour,
+                            "temperature": round(float(results[index, hour - 1, 0]), 1),
+                            "humidity": round(float(results[index, hour - 1, 1]), 1),
+                            "confidence": round(max(50, 95 - hour * 3), 1)  # Heuristik: menurun seiring horizon
+                        }
+                        for hour in range(1, results.shape[1] + 1)
+                    ]
+                }
+            self._snapshot = ForecastSnapshot(datetime.now(), loaded.info, rooms)
+            logger.info(f"Prakiraan {len(rooms)} ruangan diperbarui dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+            return self._snapshot
+
+    async def get_forecast(self, room_id: str, hours: int) -> Optional[Dict[str, Any]]:
+        """
+        Prakiraan satu ruangan untuk 1..hours jam ke depan dari snapshot terakhir
+
+        Args:
+            room_id: ID ruangan
+            hours: Jumlah jam prakiraan (maksimal PREDICTION_MAX_HOURS)
+
+        Returns:
+            Optional[Dict[str, Any]]: Respons prakiraan, atau None jika model/data ruangan belum tersedia
+        """
+        snapshot = self._snapshot or await self.refresh()
+        room = snapshot.rooms.get(room_id) if snapshot else None
+        if room is None:
+            return None
+        return {
+            "roomId": room_id,
+            "currentConditions": room["currentConditions"],
+            "predictions": room["predictions"][:hours],
+            "generatedAt": snapshot.generated_at.isoformat(),
+            "model": snapshot.model_info
+        }
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            await self.refresh()
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai pembaruan prakiraan berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Prakiraan ruangan dimulai (interval {self.interval} detik)")
+
+    def stop(self) -> None:
+        """
+        Menghentikan pembaruan prakiraan berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+forecaster = RoomForecaster()
@@ -0,0 +1,227 @@
+"""
+Gateway query asinkron untuk InfluxDB
+Menjalankan query sinkron influxdb_client di thread pool terbatas agar event loop
+tidak terblokir, dengan batas waktu per query dan batas jumlah query bersamaan
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from fastapi import HTTPException
+
+from services import result_decoder
+
+# Konfigurasi gateway dari environment
+QUERY_TIMEOUT_SECONDS = float(os.getenv("INFLUXDB_QUERY_TIMEOUT_SECONDS", "30"))
+QUERY_MAX_CONCURRENCY = int(os.getenv("INFLUXDB_QUERY_MAX_CONCURRENCY", "8"))
+STREAM_BATCH_SIZE = int(os.getenv("INFLUXDB_STREAM_BATCH_SIZE", "5000"))
+
+logger = logging.getLogger(__name__)
+
+# Executor dan semaphore dibuat secara lazy
+_executor: Optional[ThreadPoolExecutor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Mendapatkan thread pool untuk eksekusi query (singleton pattern)
+
+    Returns:
+        ThreadPoolExecutor: Thread pool dengan jumlah worker sebesar QUERY_MAX_CONCURRENCY
+    """
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=QUERY_MAX_CONCURRENCY,
+            thread_name_prefix="influx-query"
+        )
+
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """
+    Mendapatkan semaphore pembatas concurrency untuk event loop yang sedang berjalan
+
+    Returns:
+        asyncio.Semaphore: Semaphore dengan kapasitas QUERY_MAX_CONCURRENCY
+    """
+    global _semaphore, _semaphore_loop
+
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(QUERY_MAX_CONCURRENCY)
+        _semaphore_loop = loop
+
+    return _semaphore
+
+
+def _get_query_api():
+    # Import lokal untuk menghindari circular import dengan stats_service
+    from services.stats_service import get_query_api
+    return get_query_api()
+
+
+async def run_blocking(func: Callable[[], Any], description: str = "InfluxDB query",
+                       timeout: Optional[float] = None) -> Any:
+    """
+    Menjalankan fungsi blocking di thread pool gateway
+
+    Args:
+        func: Fungsi tanpa argumen yang akan dieksekusi
+        description: Deskripsi operasi untuk logging
+        timeout: Batas waktu dalam detik. Default ke QUERY_TIMEOUT_SECONDS.
+
+    Returns:
+        Any: Hasil dari fungsi
+
+    Raises:
+        HTTPException: 504 jika operasi melebihi batas waktu
+    """
+    timeout = timeout if timeout is not None else QUERY_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+
+    async with _get_semaphore():
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(_get_executor(), func),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"{description} melebihi batas waktu {timeout} detik")
+            raise HTTPException(
+                status_code=504,
+                detail=f"Query InfluxDB melebihi batas waktu {timeout} detik"
+            )
+
+
+async def query(flux_query: str, description: str = "InfluxDB query",
+                timeout: Optional[float] = None) -> Any:
+    """
+    Eksekusi `query_api.query` tanpa memblokir event loop
+
+    Args:
+        flux_query: Query Flux yang akan dieksekusi
+        description: Deskripsi query untuk logging
+        timeout: Batas waktu dalam detik (opsional)
+
+    Returns:
+        TableList: Hasil query dari InfluxDB
+    """
+    q_api = _get_query_api()
+    return await run_blocking(partial(q_api.query, query=flux_query), description, timeout)
+
+
+async def query_data_frame(flux_query: str, description: str = "InfluxDB query",
+                           timeout: Optional[float] = None) -> Any:
+    """
+    Eksekusi `query_api.query_data_frame` tanpa memblokir event loop
+
+    Args:
+        flux_query: Query Flux yang akan dieksekusi
+        description: Deskripsi query untuk logging
+        timeout: Batas waktu dalam detik (opsional)
+
+    Returns:
+        pd.DataFrame atau List[pd.DataFrame]: Hasil query dari InfluxDB
+    """
+    q_api = _get_query_api()
+    return await run_blocking(partial(q_api.query_data_frame, query=flux_query), description, timeout)
+
+
+async def query_columns(flux_query: str, description: str = "InfluxDB query",
+                        timeout: Optional[float] = None,
+                        columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Eksekusi `query_api.query_raw` dan dekode annotated CSV langsung ke kolom pandas/NumPy
+
+    Respons dibaca secara streaming dan didekode di thread pool gateway, tanpa membuat
+    objek FluxRecord per baris. Lihat services/result_decoder.py.
+
+    Args:
+        flux_query: Query Flux yang akan dieksekusi
+        description: Deskripsi query untuk logging
+        timeout: Batas waktu dalam detik (opsional)
+        columns: Kolom yang diambil (opsional, default semua kolom)
+
+    Returns:
+        pd.DataFrame: Seluruh tabel hasil query dalam satu DataFrame kolumnar
+    """
+    q_api = _get_query_api()
+
+    def _query_and_decode() -> pd.DataFrame:
+        response = q_api.query_raw(query=flux_query)
+        try:
+            return result_decoder.decode_annotated_csv(response, columns)
+        finally:
+            release_conn = getattr(response, "release_conn", None)
+            if release_conn is not None:
+                release_conn()
+
+    return await run_blocking(_query_and_decode, description, timeout)
+
+
+async def query_stream(flux_query: str, description: str = "InfluxDB query",
+                       batch_size: Optional[int] = None,
+                       timeout: Optional[float] = None) -> AsyncIterator[List[Any]]:
+    """
+    Eksekusi `query_api.query_stream` dan kembalikan iterator asinkron batch FluxRecord
+
+    Request HTTP dijalankan sebelum fungsi ini kembali, sehingga error query muncul di sini
+    (sebelum respons streaming dimulai). Setiap batch dibaca di thread pool gateway hanya
+    saat diminta konsumen, sehingga memori tetap konstan dan klien yang lambat menahan
+    pembacaan dari InfluxDB. Batas waktu berlaku per batch, bukan untuk keseluruhan stream.
+
+    Args:
+        flux_query: Query Flux yang akan dieksekusi
+        description: Deskripsi query untuk logging
+        batch_size: Jumlah record per batch. Default ke STREAM_BATCH_SIZE.
+        timeout: Batas waktu per batch dalam detik (opsional)
+
+    Returns:
+        AsyncIterator[List[FluxRecord]]: Batch record secara berurutan
+    """
+    q_api = _get_query_api()
+    records = await run_blocking(partial(q_api.query_stream, query=flux_query), description, timeout)
+    return _iter_record_batches(records, batch_size or STREAM_BATCH_SIZE, description, timeout)
+
+
+async def _iter_record_batches(records: Iterator[Any], batch_size: int, description: str,
+                               timeout: Optional[float]) -> AsyncIterator[List[Any]]:
+    try:
+        while True:
+            batch = await run_blocking(lambda: list(islice(records, batch_size)), description, timeout)
+            if not batch:
+                return
+            yield batch
+    finally:
+        # Menutup generator juga menutup koneksi HTTP ke InfluxDB (cth: klien memutus unduhan)
+        try:
+            close = getattr(records, "close", None)
+            if close is not None:
+                close()
+        except ValueError:
+            # Batch terakhir masih berjalan di thread pool setelah timeout
+            logger.warning(f"Stream {description} tidak dapat ditutup saat batch masih dibaca")
+
+
+def shutdown_gateway() -> None:
+    """
+    Menghentikan thread pool gateway. Dipanggil saat aplikasi shutdown.
+    """
+    global _executor, _semaphore, _semaphore_loop
+
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    _semaphore = None
+    _semaphore_loop = None
@@ -0,0 +1,134 @@
+"""
+Cache hasil query dengan TTL berbasis time-bucket dan request coalescing (single-flight)
+Permintaan identik yang datang bersamaan hanya memicu satu eksekusi loader; hasilnya
+dibagikan ke semua pemanggil dan disimpan hingga time-bucket berikutnya dimulai.
+"""
+
+import asyncio
+import copy
+import functools
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# TTL default mengikuti interval polling Telegraf (10 detik)
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncResultCache:
+    """
+    Cache asinkron dengan TTL per time-bucket dan single-flight per key.
+
+    Time-bucket dihitung dari wall clock (`time.time() // ttl`) sehingga seluruh entri
+    kedaluwarsa serentak di batas bucket, selaras dengan interval penulisan data sensor.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = STATS_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[int, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _current_bucket(self) -> int:
+        return int(self._clock() // self.ttl_seconds)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Mengambil nilai dari cache atau menjalankan loader jika belum ada di bucket saat ini
+
+        Args:
+            key: Key cache
+            loader: Coroutine function tanpa argumen yang menghasilkan nilai
+
+        Returns:
+            Any: Nilai dari cache atau hasil loader
+        """
+        bucket = self._current_bucket()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == bucket:
+            self.hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # shield: pembatalan satu pemanggil tidak membatalkan query bersama
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = task
+        task.add_done_callback(functools.partial(self._on_loaded, key, bucket))
+        return await asyncio.shield(task)
+
+    def _on_loaded(self, key: Hashable, bucket: int, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Error tidak di-cache; semua pemanggil yang menunggu menerima exception yang sama
+        if task.cancelled() or task.exception() is not None:
+            return
+        # Simpan dengan bucket saat loader dimulai agar hasil yang terlambat tidak melewati batas TTL
+        self._entries[key] = (bucket, task.result())
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Menghapus satu entri cache, atau semua entri jika key tidak diberikan
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Mendapatkan counter hit/miss cache
+
+        Returns:
+            Dict[str, Any]: Statistik cache
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "name": self.name,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+def cached(cache: AsyncResultCache):
+    """
+    Decorator untuk meng-cache hasil coroutine function berdasarkan nama dan argumennya
+
+    Args:
+        cache: Instance AsyncResultCache yang digunakan
+
+    Returns:
+        Callable: Decorator
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            value = await cache.get_or_load(key, lambda: func(*args, **kwargs))
+            # Salinan dangkal agar pemanggil tidak mengubah nilai yang dibagikan
+            return copy.copy(value)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+# Cache bersama untuk endpoint statistik 1 jam terakhir
+stats_cache = AsyncResultCache("stats_last_hour")
@@ -0,0 +1,235 @@
+"""
+Decoder kolumnar untuk hasil query InfluxDB (annotated CSV)
+Membaca respons `query_api.query_raw` per blok tabel langsung ke kolom pandas/NumPy,
+tanpa membuat objek FluxRecord per baris. Hasilnya dapat diteruskan ke analitik
+tervektorisasi (services/trend_analytics.py) dalam bentuk matriks seri.
+"""
+
+import csv
+import io
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from influxdb_client.client.exceptions import InfluxDBError
+
+logger = logging.getLogger(__name__)
+
+# Ukuran potongan saat membaca respons HTTP secara streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Awal setiap blok tabel baru (skema kolom baru) dalam annotated CSV
+_BLOCK_START = b"\n#datatype"
+
+_TIME_TYPES = ("dateTime:RFC3339", "dateTime:RFC3339Nano")
+_NUMERIC_TYPES = {"double": "float64"}
+_STRING_TYPES = ("string", "duration", "base64Binary")
+
+
+class SeriesMatrix(NamedTuple):
+    """
+    Seri hasil query yang disusun menjadi matriks (seri × waktu), diisi NaN/NaT di akhir baris
+    """
+    keys: List[Tuple[Any, ...]]
+    times: np.ndarray
+    values: np.ndarray
+    counts: np.ndarray
+
+
+def _iter_chunks(payload: Any) -> Iterator[bytes]:
+    """
+    Menghasilkan potongan bytes dari respons HTTP (urllib3), bytes, atau str
+    """
+    if isinstance(payload, str):
+        yield payload.encode("utf-8")
+    elif isinstance(payload, (bytes, bytearray)):
+        yield bytes(payload)
+    elif hasattr(payload, "stream"):
+        yield from payload.stream(STREAM_CHUNK_SIZE)
+    else:
+        yield from payload
+
+
+def _iter_blocks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Memecah aliran bytes annotated CSV menjadi blok tabel lengkap begitu blok berikutnya dimulai
+    """
+    buffer = bytearray()
+    scan_from = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer.extend(chunk)
+        while True:
+            position = buffer.find(_BLOCK_START, max(scan_from, 1))
+            if position < 0:
+                # Penanda bisa terpotong di batas chunk; mulai pencarian berikutnya sedikit ke belakang
+                scan_from = max(len(buffer) - len(_BLOCK_START), 0)
+                break
+            yield bytes(buffer[:position + 1])
+            del buffer[:position + 1]
+            scan_from = 0
+    if buffer.strip():
+        yield bytes(buffer)
+
+
+def _decode_block(block: bytes, columns: Optional[Sequence[str]]) -> Optional[pd.DataFrame]:
+    """
+    Mengubah satu blok tabel annotated CSV menjadi DataFrame bertipe sesuai anotasi `#datatype`
+
+    Raises:
+        InfluxDBError: Jika blok berisi tabel error dari InfluxDB
+    """
+    annotations: Dict[str, List[str]] = {}
+    offset = 0
+    header: Optional[List[str]] = None
+    while offset < len(block):
+        end = block.find(b"\n", offset)
+        end = len(block) if end < 0 else end
+        line = block[offset:end].decode("utf-8").rstrip("\r")
+        offset = end + 1
+        if not line:
+            continue
+        row = next(csv.reader([line]))
+        if line.startswith("#"):
+            annotations[row[0][1:]] = row[1:]
+            continue
+        header = row
+        break
+
+    if header is None:
+        return None
+
+    names = header[1:]
+    if "error" in names and "reference" in names:
+        error_rows = list(csv.reader(io.StringIO(block[offset:].decode("utf-8"))))
+        message = next((row[names.index("error") + 1] for row in error_rows if len(row) > 1), "unknown error")
+        raise InfluxDBError(message=message)
+
+    datatypes = dict(zip(names, annotations.get("datatype", [])))
+    defaults = dict(zip(names, annotations.get("default", [])))
+    selected = [name for name in names if columns is None or name in columns]
+
+    dtype: Dict[str, Any] = {}
+    for name in selected:
+        datatype = datatypes.get(name, "string")
+        if datatype in _NUMERIC_TYPES:
+            dtype[name] = _NUMERIC_TYPES[datatype]
+        elif datatype in _STRING_TYPES or datatype in _TIME_TYPES:
+            dtype[name] = str
+
+    frame = pd.read_csv(
+        io.BytesIO(block[offset:]),
+        header=None,
+        names=[""] + names,
+        usecols=selected,
+        dtype=dtype,
+        keep_default_na=False,
+        na_values=[""],
+        engine="c",
+    )
+
+    for name in selected:
+        # Nilai kosong pada kolom memakai anotasi #default (cth: nama yield pada kolom result)
+        default = defaults.get(name, "")
+        if default:
+            frame[name] = frame[name].fillna(default)
+        if datatypes.get(name) in _TIME_TYPES:
+            frame[name] = pd.to_datetime(frame[name], utc=True, format="ISO8601")
+
+    return frame
+
+
+def decode_annotated_csv(payload: Union[bytes, str, Any],
+                         columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Mendekode respons annotated CSV InfluxDB menjadi satu DataFrame kolumnar
+
+    Setiap blok tabel dibaca oleh parser CSV pandas begitu lengkap diterima, sehingga
+    respons besar tidak perlu ditampung utuh sebagai teks maupun sebagai FluxRecord.
+    Kolom `double` menjadi float64, kolom waktu menjadi datetime UTC, dan kolom `result`
+    memakai nama yield dari anotasi `#default`.
+
+    Args:
+        payload: Respons `query_api.query_raw`, atau isi CSV dalam bentuk bytes/str
+        columns: Kolom yang diambil (opsional, default semua kolom)
+
+    Returns:
+        pd.DataFrame: Gabungan seluruh tabel hasil query; kolom yang tidak ada di suatu
+        tabel diisi NaN
+
+    Raises:
+        InfluxDBError: Jika respons berisi tabel error dari InfluxDB
+    """
+    frames = []
+    for block in _iter_blocks(_iter_chunks(payload)):
+        frame = _decode_block(block, columns)
+        if frame is not None and not frame.empty:
+            frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=list(columns) if columns else [])
+
+    result = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if columns is not None:
+        result = result.reindex(columns=list(columns))
+    return result
+
+
+def to_series_matrix(frame: pd.DataFrame, by: Sequence[str], value_column: str = "_value",
+                     time_column: str = "_time") -> SeriesMatrix:
+    """
+    Menyusun baris hasil query menjadi matriks (seri × waktu) per kombinasi kolom `by`
+
+    Baris diurutkan per seri berdasarkan waktu lalu ditempatkan dengan indeks hasil
+    groupby, tanpa iterasi Python per baris. Matriks nilai dapat langsung diberikan ke
+    `trend_analytics.analyze_trends`.
+
+    Args:
+        frame: DataFrame hasil `decode_annotated_csv`
+        by: Kolom penentu seri (cth: ["location", "_field"])
+        value_column: Kolom nilai
+        time_column: Kolom waktu
+
+    Returns:
+        SeriesMatrix: Kunci seri (tuple), matriks waktu (datetime64[ns] UTC, NaT di akhir),
+        matriks nilai (float, NaN di akhir), dan jumlah titik per seri
+    """
+    by = list(by)
+    frame = frame.dropna(subset=[value_column, *by])
+    if frame.empty:
+        return SeriesMatrix([], np.empty((0, 0), dtype="datetime64[ns]"), np.empty((0, 0)),
+                            np.zeros(0, dtype=int))
+
+    frame = frame.sort_values([*by, time_column], kind="stable")
+    grouped = frame.groupby(by, sort=True)
+    rows = grouped.ngroup().to_numpy()
+    cols = grouped.cumcount().to_numpy()
+    counts = np.bincount(rows)
+
+    values = np.full((len(counts), int(counts.max())), np.nan)
+    values[rows, cols] = frame[value_column].to_numpy(dtype=float)
+    times = np.full(values.shape, np.datetime64("NaT"), dtype="datetime64[ns]")
+    times[rows, cols] = frame[time_column].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(
+        dtype="datetime64[ns]"
+    )
+
+    # Baris sudah terurut per seri, sehingga baris pertama tiap seri menentukan kuncinya
+    first_rows = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    keys = list(frame[by].iloc[first_rows].itertuples(index=False, name=None))
+    return SeriesMatrix(keys, times, values, counts)
+
+
+def format_times(times: np.ndarray, time_format: str) -> List[str]:
+    """
+    Memformat satu baris matriks waktu (tanpa padding NaT) menjadi string
+
+    Args:
+        times: Array datetime64 UTC
+        time_format: Format strftime (cth: "%Y-%m-%d")
+
+    Returns:
+        List[str]: Timestamp terformat
+    """
+    return pd.DatetimeIndex(times).strftime(time_format).tolist()
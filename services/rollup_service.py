@@ -0,0 +1,375 @@
+"""
+Service untuk rollup (downsampling) data sensor dan perencanaan query berbasis rollup
+Memelihara bucket rollup 1m/1h/1d melalui task InfluxDB, dan memilih rollup paling kasar
+yang mampu menjawab sebuah query agregasi (rentang + jendela) sebelum jatuh ke data mentah.
+"""
+
+import logging
+import os
+from functools import partial
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Set, Union
+
+from influxdb_client.domain.bucket_retention_rules import BucketRetentionRules
+from influxdb_client.domain.task_create_request import TaskCreateRequest
+
+from services import query_gateway
+from utils import influxdb_pool
+from utils.tick_scheduler import TickScheduler
+from flux_queries.downsampling import (
+    get_rollup_task_query,
+    get_rollup_backfill_query,
+    get_rollup_coverage_query,
+    get_rollup_aggregated_query,
+    get_raw_aggregated_query,
+    WEIGHTED_MEAN
+)
+
+logger = logging.getLogger(__name__)
+
+# Konfigurasi
+INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
+ROLLUPS_ENABLED = os.getenv("INFLUXDB_ROLLUPS_ENABLED", "true").lower() == "true"
+ROLLUP_BACKFILL_DAYS = int(os.getenv("INFLUXDB_ROLLUP_BACKFILL_DAYS", "30"))
+ROLLUP_PROVISION_TIMEOUT_SECONDS = 600
+# Cakupan dimuat ulang berkala agar tier yang baru terisi task (atau baru berhasil disiapkan) ikut dipakai
+ROLLUP_COVERAGE_REFRESH_SECONDS = float(os.getenv("INFLUXDB_ROLLUP_COVERAGE_REFRESH_SECONDS", "600"))
+# Cadangan waktu eksekusi task setelah offset sebelum interval rollup dianggap final
+ROLLUP_SETTLE_MARGIN = timedelta(minutes=1)
+# Interval penulisan data mentah oleh Telegraf, untuk estimasi jumlah titik yang dipindai
+RAW_SAMPLE_INTERVAL = timedelta(seconds=10)
+
+
+class RollupTier(NamedTuple):
+    """Satu tingkat rollup beserta bucket dan jadwal task-nya"""
+    name: str
+    bucket: str
+    resolution: timedelta
+    every: str  # Durasi Flux untuk task dan aggregateWindow
+    offset: timedelta  # Penundaan eksekusi task agar data terlambat ikut teragregasi
+    retention_days: int  # 0 = tanpa batas
+
+    @property
+    def task_name(self) -> str:
+        return f"rollup_{INFLUXDB_BUCKET}_{self.name}"
+
+
+ROLLUP_TIERS = [
+    RollupTier("1m", f"{INFLUXDB_BUCKET}_1m", timedelta(minutes=1), "1m", timedelta(seconds=15), 7),
+    RollupTier("1h", f"{INFLUXDB_BUCKET}_1h", timedelta(hours=1), "1h", timedelta(minutes=2), 400),
+    RollupTier("1d", f"{INFLUXDB_BUCKET}_1d", timedelta(days=1), "1d", timedelta(minutes=10), 0),
+]
+
+# Fungsi agregasi yang dapat dijawab dari rollup: fungsi -> (tag agg, fungsi penggabung)
+# Mean tidak boleh dirata-ratakan langsung karena jumlah titik mentah per interval berbeda
+ROLLUP_FUNCTIONS = {
+    "mean": ("mean", WEIGHTED_MEAN),
+    "min": ("min", "min"),
+    "max": ("max", "max"),
+    "count": ("count", "sum"),
+}
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Awal data yang tercakup tiap tier; tier tanpa entri tidak digunakan planner
+_coverage: Dict[str, datetime] = {}
+# Tier yang bucket dan task-nya sudah berhasil disiapkan sejak proses dimulai
+_provisioned: Set[str] = set()
+
+
+class QueryPlan(NamedTuple):
+    """Hasil perencanaan: tier rollup (None = data mentah) dan batas rollup/mentah"""
+    tier: Optional[RollupTier]
+    start: datetime
+    rollup_start: Optional[datetime]  # Awal bagian rollup: start dibulatkan ke atas ke kelipatan window
+    boundary: Optional[datetime]
+    stop: datetime
+    window: str
+    fn: str
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Mengubah durasi Flux sederhana (cth: "10m", "1h", "30d") menjadi timedelta
+
+    Args:
+        value: Durasi dengan satu satuan (s, m, h, d, w)
+
+    Returns:
+        timedelta: Durasi
+
+    Raises:
+        ValueError: Jika format durasi tidak didukung
+    """
+    unit = value[-1:]
+    if unit not in _DURATION_UNITS or not value[:-1].isdigit():
+        raise ValueError(f"Durasi tidak didukung: {value}")
+    return timedelta(seconds=int(value[:-1]) * _DURATION_UNITS[unit])
+
+
+def _format_flux_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _floor_time(value: datetime, step: timedelta) -> datetime:
+    """
+    Membulatkan waktu ke bawah ke kelipatan `step` sejak epoch, sama seperti
+    penyelarasan jendela aggregateWindow di InfluxDB
+    """
+    step_seconds = int(step.total_seconds())
+    epoch_seconds = int(value.timestamp())
+    return datetime.fromtimestamp(epoch_seconds - epoch_seconds % step_seconds, tz=timezone.utc)
+
+
+def _ceil_time(value: datetime, step: timedelta) -> datetime:
+    """
+    Membulatkan waktu ke atas ke kelipatan `step` sejak epoch
+    """
+    floored = _floor_time(value, step)
+    return floored if floored >= value else floored + step
+
+
+def plan_aggregate_query(start: datetime, stop: datetime, window: str, fn: str = "mean",
+                         now: Optional[datetime] = None) -> QueryPlan:
+    """
+    Memilih rollup paling kasar yang mampu menjawab agregasi `fn` per `window` pada rentang waktu
+
+    Sebuah tier dapat dipakai jika resolusinya membagi habis jendela, datanya mencakup awal
+    rentang, dan masih dalam masa retensi. Jendela lengkap dari `rollup_start` hingga `boundary`
+    dibaca dari rollup; jendela pertama yang terpotong `start` (titik rollup di-timestamp pada
+    awal interval sehingga tidak dapat dipotong) dan sisa rentang yang belum difinalkan task
+    dibaca dari data mentah.
+    Jika beberapa tier memenuhi syarat, dipilih yang estimasi titik terpindainya paling sedikit
+    (misalnya tepat setelah tengah malam, sebelum task 1d berjalan, rollup 1h lebih murah).
+
+    Args:
+        start: Awal rentang
+        stop: Akhir rentang
+        window: Jendela agregasi dalam durasi Flux (cth: "1h", "1d")
+        fn: Fungsi agregasi
+        now: Waktu saat ini (untuk pengujian)
+
+    Returns:
+        QueryPlan: Rencana query
+    """
+    now = now or datetime.now(timezone.utc)
+    raw_plan = QueryPlan(None, start, None, None, stop, window, fn)
+
+    if not ROLLUPS_ENABLED or fn not in ROLLUP_FUNCTIONS:
+        return raw_plan
+    try:
+        window_delta = parse_duration(window)
+    except ValueError:
+        return raw_plan
+
+    best_plan = raw_plan
+    best_cost = (stop - start) / RAW_SAMPLE_INTERVAL
+    rollup_start = _ceil_time(start, window_delta)
+    for tier in sorted(ROLLUP_TIERS, key=lambda t: t.resolution, reverse=True):
+        coverage = _coverage.get(tier.name)
+        if coverage is None or coverage > rollup_start:
+            continue
+        if window_delta < tier.resolution or window_delta % tier.resolution:
+            continue
+        if tier.retention_days and rollup_start < now - timedelta(days=tier.retention_days):
+            continue
+
+        # Akhir interval rollup terakhir yang sudah pasti ditulis task
+        finalized = _floor_time(now - tier.offset - ROLLUP_SETTLE_MARGIN, tier.resolution)
+        boundary = _floor_time(min(stop, finalized), window_delta)
+        if boundary <= rollup_start:
+            continue
+
+        # Estimasi titik per seri: baris rollup ditambah kepala dan ekor data mentah
+        cost = ((boundary - rollup_start) / tier.resolution
+                + ((rollup_start - start) + (stop - boundary)) / RAW_SAMPLE_INTERVAL)
+        if cost < best_cost:
+            best_plan = QueryPlan(tier, start, rollup_start, boundary, stop, window, fn)
+            best_cost = cost
+
+    return best_plan
+
+
+def build_aggregated_query(parameter: Union[str, Sequence[str]], location_filter: str,
+                           start: datetime, stop: datetime, window: str, fn: str = "mean",
+                           now: Optional[datetime] = None,
+                           group_columns: Optional[Sequence[str]] = None,
+                           yield_prefix: str = "") -> str:
+    """
+    Menyusun query Flux agregasi per jendela sesuai rencana dari planner
+
+    Args:
+        parameter: Parameter sensor ('temperature' atau 'humidity') atau daftar parameter
+        location_filter: Filter lokasi tambahan
+        start: Awal rentang
+        stop: Akhir rentang
+        window: Jendela agregasi (cth: "1h", "1d")
+        fn: Fungsi agregasi (default mean)
+        now: Waktu saat ini (untuk pengujian)
+        group_columns: Kolom pengelompokan sebelum agregasi (opsional, cth: ["location", "_field"])
+        yield_prefix: Prefix nama yield agar beberapa query dapat digabung dalam satu script
+
+    Returns:
+        str: Query Flux
+    """
+    parameters = [parameter] if isinstance(parameter, str) else list(parameter)
+    plan = plan_aggregate_query(start, stop, window, fn, now)
+
+    if plan.tier is None:
+        return get_raw_aggregated_query(
+            INFLUXDB_BUCKET, parameters, location_filter,
+            _format_flux_time(start), _format_flux_time(stop), window, fn,
+            group_columns, yield_prefix
+        )
+
+    agg, rollup_fn = ROLLUP_FUNCTIONS[fn]
+    logger.debug(f"Query {fn}/{window} {parameters} memakai rollup {plan.tier.name} hingga {plan.boundary}")
+    return get_rollup_aggregated_query(
+        plan.tier.bucket, INFLUXDB_BUCKET, parameters, location_filter,
+        _format_flux_time(start), _format_flux_time(plan.rollup_start), _format_flux_time(plan.boundary),
+        _format_flux_time(stop),
+        window, agg, rollup_fn, fn, group_columns, yield_prefix
+    )
+
+
+def _provision_tier(tier: RollupTier) -> bool:
+    """
+    Memastikan bucket dan task untuk satu tier ada dan up to date (blocking)
+
+    Returns:
+        bool: True jika bucket baru dibuat (perlu backfill)
+    """
+    client = influxdb_pool.get_client()
+    org = influxdb_pool.INFLUXDB_ORG
+
+    created = False
+    buckets_api = client.buckets_api()
+    if buckets_api.find_bucket_by_name(tier.bucket) is None:
+        retention_rules = []
+        if tier.retention_days:
+            retention_rules = [BucketRetentionRules(type="expire", every_seconds=tier.retention_days * 86400)]
+        buckets_api.create_bucket(bucket_name=tier.bucket, retention_rules=retention_rules, org=org)
+        created = True
+        logger.info(f"Bucket rollup {tier.bucket} dibuat")
+
+    flux = get_rollup_task_query(
+        INFLUXDB_BUCKET, tier.bucket, org, tier.task_name, tier.every,
+        f"{int(tier.offset.total_seconds())}s"
+    )
+    tasks_api = client.tasks_api()
+    existing = tasks_api.find_tasks(name=tier.task_name)
+    if existing:
+        task = existing[0]
+        if task.flux != flux:
+            task.flux = flux
+            tasks_api.update_task(task)
+            logger.info(f"Task rollup {tier.task_name} diperbarui")
+    else:
+        tasks_api.create_task(task_create_request=TaskCreateRequest(
+            org=org, flux=flux, status="active",
+            description=f"Rollup {tier.name} mean/min/max/count untuk {INFLUXDB_BUCKET}"
+        ))
+        logger.info(f"Task rollup {tier.task_name} dibuat")
+
+    return created
+
+
+async def _load_coverage(tier: RollupTier) -> Optional[datetime]:
+    """
+    Mendapatkan timestamp titik rollup paling awal dari bucket sebuah tier
+    """
+    tables = await query_gateway.query(get_rollup_coverage_query(tier.bucket), f"coverage rollup {tier.name}")
+    for table in tables:
+        for record in table.records:
+            return record.get_time()
+    return None
+
+
+async def _setup_tier(tier: RollupTier) -> None:
+    """
+    Menyiapkan bucket dan task satu tier, lalu mengisi (backfill) bucket yang baru dibuat
+    """
+    created = await query_gateway.run_blocking(
+        partial(_provision_tier, tier), f"provisioning rollup {tier.name}",
+        timeout=ROLLUP_PROVISION_TIMEOUT_SECONDS
+    )
+    if created:
+        backfill_days = ROLLUP_BACKFILL_DAYS
+        if tier.retention_days:
+            backfill_days = min(backfill_days, tier.retention_days)
+        await query_gateway.query(
+            get_rollup_backfill_query(INFLUXDB_BUCKET, tier.bucket, influxdb_pool.INFLUXDB_ORG,
+                                      tier.every, f"-{backfill_days}d"),
+            f"backfill rollup {tier.name}",
+            timeout=ROLLUP_PROVISION_TIMEOUT_SECONDS
+        )
+        logger.info(f"Backfill rollup {tier.name} selesai ({backfill_days} hari)")
+
+
+async def ensure_rollup_tasks() -> Dict[str, Any]:
+    """
+    Menyiapkan bucket dan task rollup yang belum siap (termasuk backfill bucket yang baru
+    dibuat), lalu memuat ulang cakupan tiap tier. Kegagalan hanya membuat planner tetap
+    memakai data mentah untuk tier tersebut; pemanggilan berikutnya mencoba lagi.
+
+    Returns:
+        Dict[str, Any]: Status rollup per tier
+    """
+    if not ROLLUPS_ENABLED:
+        logger.info("Rollup InfluxDB dinonaktifkan (INFLUXDB_ROLLUPS_ENABLED=false)")
+        return get_rollup_status()
+
+    for tier in ROLLUP_TIERS:
+        try:
+            if tier.name not in _provisioned:
+                await _setup_tier(tier)
+                _provisioned.add(tier.name)
+
+            coverage = await _load_coverage(tier)
+            if coverage is not None:
+                _coverage[tier.name] = coverage
+            else:
+                _coverage.pop(tier.name, None)
+        except Exception as e:
+            _coverage.pop(tier.name, None)
+            logger.warning(f"Rollup {tier.name} tidak tersedia, query tetap memakai data mentah: {e}")
+
+    return get_rollup_status()
+
+
+async def run_rollup_maintenance(interval: float = ROLLUP_COVERAGE_REFRESH_SECONDS) -> None:
+    """
+    Menjalankan ensure_rollup_tasks saat startup lalu berkala, sehingga tier yang task
+    pertamanya baru berjalan atau yang sebelumnya gagal disiapkan ikut dipakai planner.
+    Berjalan sampai task dibatalkan.
+
+    Args:
+        interval: Jarak antar pemuatan ulang dalam detik
+    """
+    if not ROLLUPS_ENABLED:
+        await ensure_rollup_tasks()
+        return
+    scheduler = TickScheduler(interval)
+    while True:
+        await ensure_rollup_tasks()
+        await scheduler.wait_next_tick()
+
+
+def get_rollup_status() -> Dict[str, Any]:
+    """
+    Mendapatkan status rollup per tier
+
+    Returns:
+        Dict[str, Any]: Status aktif dan cakupan tiap tier
+    """
+    return {
+        "enabled": ROLLUPS_ENABLED,
+        "tiers": {
+            tier.name: {
+                "bucket": tier.bucket,
+                "task": tier.task_name,
+                "coverage_start": _coverage[tier.name].isoformat() if tier.name in _coverage else None
+            }
+            for tier in ROLLUP_TIERS
+        }
+    }
@@ -1,17 +1,35 @@
 """
 Service untuk mengelola data ruangan dalam aplikasi Digital Twin.
-Versi sementara yang menggunakan data simulasi bervariasi per room.
+Kondisi terkini, rata-rata 24 jam, dan persentase waktu di rentang optimal untuk semua
+ruangan diambil dengan satu query Flux terkelompok per (location, _field). Hasilnya
+di-cache per tick refresh sehingga /rooms/ dan /rooms/{id} hanya membaca snapshot bersama.
 """
 
 import logging
-import math
-from datetime import datetime, timedelta
-import pandas as pd
+import os
 from typing import Dict, List, Optional, Any
 
+import pandas as pd
+
+from services import optimal_range_service, query_gateway
+from services.result_cache import AsyncResultCache, cached
+from flux_queries.room_data import get_room_snapshot_query
+
 # Konfigurasi logging
 logger = logging.getLogger(__name__)
 
+# Konstanta
+INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
+ROOM_SNAPSHOT_TTL_SECONDS = float(os.getenv("ROOM_SNAPSHOT_TTL_SECONDS", "10"))  # Selaras interval polling Telegraf
+ROOM_STATISTICS_WINDOW = "-24h"
+# Rentang optimal default otomasi (target ± toleransi), untuk statistik cadangan dari query snapshot
+OPTIMAL_TEMPERATURE_RANGE = optimal_range_service.DEFAULT_OPTIMAL_RANGES["temperature"]
+OPTIMAL_HUMIDITY_RANGE = optimal_range_service.DEFAULT_OPTIMAL_RANGES["humidity"]
+OPTIMAL_RANGE_WINDOW_HOURS = 24
+ROOM_SNAPSHOT_COLUMNS = ["location", "_field", "count", "sum", "in_range", "last", "last_time"]
+
+room_snapshot_cache = AsyncResultCache("room_snapshot", ttl_seconds=ROOM_SNAPSHOT_TTL_SECONDS)
+
 # Konstanta untuk room metadata
 ROOM_METADATA = {
     "F2": {"name": "Ruang F2", "floor": "F", "area": 25},
@@ -28,109 +46,103 @@ ROOM_METADATA = {
     "G8": {"name": "Ruang G8", "floor": "G", "area": 40},
 }
 
-async def get_room_details(room_id: str) -> Dict[str, Any]:
+def _room_base(room_id: str) -> Dict[str, Any]:
+    """Metadata dasar ruangan (ruangan di luar ROOM_METADATA memakai nilai default)"""
+    metadata = ROOM_METADATA.get(room_id, {"name": f"Ruang {room_id}", "floor": room_id[:1], "area": None})
+    return {"id": room_id, "name": metadata["name"], "floor": metadata["floor"], "area": metadata["area"]}
+
+def _build_room_conditions(fields: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Mengambil data detail ruangan dengan data simulasi yang bervariasi per room.
+    Menyusun kondisi dan statistik ruangan dari akumulator per field
+
+    Args:
+        fields: Map nama field -> akumulator (count, sum, in_range, last, last_time)
+
+    Returns:
+        Dict[str, Any]: currentConditions dan statistics dalam format frontend
+    """
+    current, daily_avg, optimal = {}, {}, {}
+    last_times = []
+    for field in ("temperature", "humidity"):
+        acc = fields.get(field)
+        if not acc or not acc["count"]:
+            current[field] = daily_avg[field] = optimal[field] = None
+            continue
+        current[field] = round(float(acc["last"]), 1)
+        daily_avg[field] = round(float(acc["sum"]) / acc["count"], 1)
+        optimal[field] = int(round(float(acc["in_range"]) / acc["count"] * 100))
+        last_times.append(acc["last_time"])
+
+    current["lastUpdated"] = max(last_times).isoformat() if last_times else None
+    return {
+        "currentConditions": current,  # Frontend expects currentConditions (camelCase)
+        "statistics": {
+            "dailyAvg": daily_avg,
+            "timeInOptimalRange": optimal
+        }
+    }
+
+@cached(room_snapshot_cache)
+async def load_room_snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    Memuat kondisi semua ruangan dengan satu query Flux
+
+    Hasil di-cache per time-bucket ROOM_SNAPSHOT_TTL_SECONDS dan dibagikan ke semua
+    pemanggil bersamaan (single-flight).
+
+    Returns:
+        Dict[str, Dict[str, Any]]: room_id -> currentConditions dan statistics
+
+    Raises:
+        HTTPException: Jika query ke InfluxDB timeout atau koneksi belum siap
+    """
+    flux_query = get_room_snapshot_query(
+        INFLUXDB_BUCKET, OPTIMAL_TEMPERATURE_RANGE, OPTIMAL_HUMIDITY_RANGE, ROOM_STATISTICS_WINDOW
+    )
+    frame = await query_gateway.query_columns(flux_query, "query snapshot ruangan", columns=ROOM_SNAPSHOT_COLUMNS)
+
+    accumulators: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for location, field, count, total, in_range, last, last_time in zip(
+            *(frame[column] for column in ROOM_SNAPSHOT_COLUMNS)):
+        if pd.isna(location) or pd.isna(count):
+            continue
+        accumulators.setdefault(location, {})[field] = {
+            "count": int(count), "sum": total, "in_range": in_range, "last": last, "last_time": last_time
+        }
+    return {room_id: _build_room_conditions(fields) for room_id, fields in accumulators.items()}
+
+async def get_room_details(room_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Mengambil data detail ruangan dari snapshot kondisi semua ruangan.
     
     Args:
         room_id (str): ID ruangan (contoh: F2, G3, dsb)
         
     Returns:
-        Dict[str, Any]: Data ruangan dengan format JSON
+        Optional[Dict[str, Any]]: Data ruangan dengan format JSON, atau None jika ruangan tidak dikenal
     """
-    logger.info(f"Mengambil detail ruangan untuk {room_id} (mode simulasi)")
-    
-    # Ambil metadata dasar ruangan
-    if room_id not in ROOM_METADATA:
-        logger.error(f"Room ID {room_id} tidak ditemukan dalam metadata")
-        return None
-        
-    room_data = {
-        "id": room_id,
-        "name": ROOM_METADATA[room_id]["name"],
-        "floor": ROOM_METADATA[room_id]["floor"],
-        "area": ROOM_METADATA[room_id]["area"]
-    }
-    
     try:
-        # Generate data simulasi yang bervariasi per room
-        current_conditions = generate_room_conditions(room_id)
-        daily_avg = generate_daily_averages(room_id, current_conditions)
-        time_in_optimal_range = generate_optimal_time_percentages(room_id)
-        devices = await get_room_devices(room_id)
-        
-        # Buat struktur data lengkap yang sesuai dengan ekspektasi frontend
-        room_data.update({
-            "currentConditions": current_conditions,  # Frontend expects currentConditions (camelCase)
-            "statistics": {
-                "dailyAvg": daily_avg,
-                "timeInOptimalRange": time_in_optimal_range
-            },
-            "devices": devices
-        })
-        
-        return room_data
-        
+        snapshot = await load_room_snapshot()
     except Exception as e:
-        logger.error(f"Error saat mengambil data ruangan {room_id}: {str(e)}")
-        # Return data dasar saja jika terjadi error
-        return room_data
+        logger.error(f"Error saat mengambil snapshot ruangan untuk {room_id}: {str(e)}")
+        snapshot = None
 
-def generate_room_conditions(room_id: str) -> Dict[str, Any]:
-    """Generate kondisi lingkungan yang bervariasi per room"""
-    
-    # Variasi suhu berdasarkan lokasi room dan floor
-    base_temp = 22.0
-    temp_variation = 0.0
-    
-    # Floor variation (lantai atas lebih hangat)
-    floor_num = int(room_id[1]) if room_id[1].isdigit() else 2
-    temp_variation += (floor_num - 2) * 0.5  # +0.5°C per lantai
-    
-    # Building variation (gedung G sedikit lebih dingin karena struktur)
-    if room_id.startswith('G'):
-        temp_variation -= 0.3
-    
-    # Room specific micro-variations
-    room_hash = hash(room_id) % 20
-    temp_variation += (room_hash - 10) * 0.1  # ±1°C variation
-    
-    # Humidity variation
-    base_humidity = 50.0
-    humidity_variation = (room_hash % 15) - 7  # ±7% variation
-    
-    # Time-based variation (simulate daily cycle)
-    hour = datetime.now().hour
-    daily_temp_cycle = 2 * math.sin((hour - 6) * math.pi / 12)  # Peak at 2 PM
-    
-    # Small random variation for realism
-    import random
-    random.seed(room_id + str(hour))  # Consistent but varying seed
-    temp_noise = random.uniform(-0.2, 0.2)
-    humidity_noise = random.uniform(-2, 2)
-    
-    return {
-        "temperature": round(base_temp + temp_variation + daily_temp_cycle + temp_noise, 1),
-        "humidity": round(base_humidity + humidity_variation + humidity_noise, 1),
-        "co2": 400 + (room_hash % 100),  # 400-500 ppm
-        "light": 350 + (room_hash % 150),  # 350-500 lux
-        "air_quality": 85 + (room_hash % 15)  # 85-100 AQI
-    }
+    if room_id not in ROOM_METADATA and (snapshot is None or room_id not in snapshot):
+        logger.error(f"Room ID {room_id} tidak ditemukan dalam metadata maupun data sensor")
+        return None
 
-def generate_daily_averages(room_id: str, current_conditions: Dict) -> Dict[str, float]:
-    """Generate rata-rata harian berdasarkan kondisi saat ini"""
-    return {
-        "temperature": round(current_conditions["temperature"] - 0.5, 1),
-        "humidity": round(current_conditions["humidity"] + 2.0, 1)
-    }
+    room_data = _room_base(room_id)
+    if snapshot is None:
+        # Return data dasar saja jika snapshot tidak dapat dimuat
+        return room_data
 
-def generate_optimal_time_percentages(room_id: str) -> Dict[str, int]:
-    """Generate persentase waktu dalam rentang optimal"""
-    room_hash = hash(room_id) % 100
-    return {
-        "temperature": 75 + (room_hash % 20),  # 75-95%
-        "humidity": 65 + (room_hash % 25)      # 65-90%
-    }
+    room_data.update(snapshot.get(room_id) or _build_room_conditions({}))
+    # Persentase berbasis durasi dari akumulator per jam lebih akurat daripada hitungan sampel snapshot
+    tracked = optimal_range_service.optimal_range_tracker.percentages(room_id, OPTIMAL_RANGE_WINDOW_HOURS)
+    if any(value is not None for value in tracked.values()):
+        room_data["statistics"] = {**room_data["statistics"], "timeInOptimalRange": tracked}
+    room_data["devices"] = await get_room_devices(room_id)
+    return room_data
 
 async def get_room_devices(room_id: str) -> List[Dict[str, Any]]:
     """
@@ -0,0 +1,230 @@
+"""
+Store snapshot kondisi ruangan di dalam proses
+Kondisi semua ruangan dimuat langsung dari room_service di background secara berkala dan
+disimpan sebagai snapshot, sehingga rekomendasi membaca kondisi ruangan tanpa request HTTP
+loopback ke API sendiri dan tanpa memblokir event loop.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from services import room_service
+from utils.tick_scheduler import TickScheduler
+
+# Konstanta
+ROOM_STATE_REFRESH_SECONDS = float(os.getenv("ROOM_STATE_REFRESH_SECONDS", "30"))
+# Snapshot yang lebih tua dari ini dimuat ulang langsung saat dibaca (cth: task background mati)
+ROOM_STATE_MAX_AGE_SECONDS = 2 * ROOM_STATE_REFRESH_SECONDS
+# Ruangan yang dianalisis oleh rekomendasi proaktif
+RECOMMENDATION_ROOM_IDS = ["F2", "F3", "F4", "G2", "G3", "G4"]
+
+logger = logging.getLogger(__name__)
+
+
+class RoomSnapshot(NamedTuple):
+    """
+    Kondisi semua ruangan pada satu waktu (immutable, aman dibaca bersamaan)
+    """
+    refreshed_at: datetime
+    monotonic_time: float
+    rooms: Dict[str, Dict[str, Any]]   # room_id -> data ruangan (format room_service.get_room_details)
+
+
+async def load_rooms_from_service(room_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Memuat detail beberapa ruangan secara bersamaan langsung dari room_service
+
+    Args:
+        room_ids: ID ruangan
+
+    Returns:
+        Dict[str, Dict[str, Any]]: room_id -> data ruangan; ruangan yang gagal dimuat atau belum
+            memiliki data sensor tidak disertakan
+    """
+    results = await asyncio.gather(
+        *(room_service.get_room_details(room_id) for room_id in room_ids), return_exceptions=True
+    )
+    rooms = {}
+    for room_id, result in zip(room_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"Gagal memuat kondisi ruangan {room_id}: {result}")
+        elif result and (result.get("currentConditions") or {}).get("temperature") is not None:
+            rooms[room_id] = result
+    return rooms
+
+
+def _trend(current: float, average: float, threshold: float) -> str:
+    if current > average + threshold:
+        return "increasing"
+    if current < average - threshold:
+        return "decreasing"
+    return "stable"
+
+
+def to_recommendation_room(room_data: Dict[str, Any], data_source: str = "room_store") -> Dict[str, Any]:
+    """
+    Mengubah data ruangan menjadi format yang dipakai analisis rekomendasi
+
+    Tren ditentukan dari selisih kondisi saat ini terhadap rata-rata harian.
+
+    Args:
+        room_data: Data ruangan dari room_service.get_room_details
+        data_source: Penanda asal data
+
+    Returns:
+        Dict[str, Any]: Data ruangan untuk rekomendasi
+    """
+    current_conditions = room_data.get("currentConditions", {})
+    daily_avg = room_data.get("statistics", {}).get("dailyAvg", {})
+    current_temp = current_conditions.get("temperature", 0)
+    current_humidity = current_conditions.get("humidity", 0)
+    temp_trend = _trend(current_temp, daily_avg.get("temperature", current_temp), 0.5)
+    humidity_trend = _trend(current_humidity, daily_avg.get("humidity", current_humidity), 2)
+
+    return {
+        "id": room_data["id"],
+        "name": room_data["name"],
+        "floor": room_data["floor"],
+        "area": room_data["area"],
+        "currentConditions": {
+            "temperature": current_temp,
+            "humidity": current_humidity,
+            "trend": temp_trend,  # Overall trend
+            "temp_trend": temp_trend,
+            "humidity_trend": humidity_trend,
+            "co2": current_conditions.get("co2", 400),
+            "air_quality": current_conditions.get("air_quality", 85),
+            "data_source": data_source
+        },
+        "statistics": room_data.get("statistics", {}),
+        "devices": room_data.get("devices", [])
+    }
+
+
+def fallback_room(room_id: str, data_source: str = "fallback") -> Dict[str, Any]:
+    """
+    Data ruangan default jika kondisi ruangan belum pernah berhasil dimuat
+    """
+    return {
+        "id": room_id,
+        "name": f"Ruang {room_id}",
+        "floor": room_id[0],
+        "area": 25,
+        "currentConditions": {
+            "temperature": 24.0,
+            "humidity": 55.0,
+            "trend": "stable",
+            "temp_trend": "stable",
+            "humidity_trend": "stable",
+            "data_source": data_source
+        }
+    }
+
+
+class RoomStateStore:
+    """
+    Menyimpan snapshot kondisi ruangan dan memperbaruinya di background
+
+    Args:
+        room_ids: Ruangan yang dipantau (default: semua ruangan di room_service.ROOM_METADATA)
+        loader: Fungsi asinkron yang memuat data beberapa ruangan sekaligus
+        interval: Jarak antar refresh dalam detik
+    """
+
+    def __init__(self, room_ids: Optional[Sequence[str]] = None,
+                 loader: Callable[[Sequence[str]], Awaitable[Dict[str, Dict[str, Any]]]] = load_rooms_from_service,
+                 interval: float = ROOM_STATE_REFRESH_SECONDS):
+        self.room_ids = list(room_ids or room_service.ROOM_METADATA)
+        self._loader = loader
+        self.interval = interval
+        self._snapshot: Optional[RoomSnapshot] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Optional[RoomSnapshot]:
+        """
+        Snapshot terakhir (None jika belum pernah dimuat)
+        """
+        return self._snapshot
+
+    async def refresh(self) -> RoomSnapshot:
+        """
+        Memuat ulang kondisi semua ruangan dan menerbitkan snapshot baru
+
+        Ruangan yang gagal dimuat tetap memakai kondisi dari snapshot sebelumnya. Pemanggilan
+        bersamaan berbagi satu proses muat.
+
+        Returns:
+            RoomSnapshot: Snapshot terbaru
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return self._snapshot
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            rooms = dict(self._snapshot.rooms) if self._snapshot else {}
+            try:
+                rooms.update(await self._loader(self.room_ids))
+            except Exception as e:
+                logger.error(f"Gagal memuat kondisi ruangan: {e}", exc_info=True)
+            self._snapshot = RoomSnapshot(datetime.now(), time.monotonic(), rooms)
+            logger.debug(f"Snapshot ruangan diperbarui dalam {(time.perf_counter() - started) * 1000:.0f} ms "
+                         f"({len(rooms)}/{len(self.room_ids)} ruangan)")
+            return self._snapshot
+
+    async def get_snapshot(self) -> RoomSnapshot:
+        """
+        Snapshot yang masih segar; dimuat langsung hanya jika belum ada atau sudah kedaluwarsa
+        """
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - snapshot.monotonic_time > ROOM_STATE_MAX_AGE_SECONDS:
+            snapshot = await self.refresh()
+        return snapshot
+
+    async def get_rooms(self, room_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Kondisi ruangan dalam format rekomendasi
+
+        Args:
+            room_ids: Ruangan yang diminta, sesuai urutan (default: semua ruangan yang dipantau)
+
+        Returns:
+            List[Dict[str, Any]]: Data ruangan; ruangan tanpa data memakai nilai fallback
+        """
+        snapshot = await self.get_snapshot()
+        rooms = []
+        for room_id in room_ids or self.room_ids:
+            room_data = snapshot.rooms.get(room_id)
+            rooms.append(to_recommendation_room(room_data) if room_data else fallback_room(room_id))
+        return rooms
+
+    async def _run(self) -> None:
+        scheduler = TickScheduler(self.interval)
+        while True:
+            await self.refresh()
+            await scheduler.wait_next_tick()
+
+    def start(self) -> None:
+        """
+        Memulai refresh berkala di background (harus dipanggil di dalam event loop)
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+            logger.info(f"Store kondisi ruangan dimulai (interval {self.interval} detik, {len(self.room_ids)} ruangan)")
+
+    def stop(self) -> None:
+        """
+        Menghentikan refresh berkala
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+room_store = RoomStateStore()
@@ -3,19 +3,21 @@ Implementasi service layer untuk API Digital Twin
 Berisi fungsi-fungsi untuk mengakses dan memproses data dari InfluxDB
 """
 
+import asyncio
 import logging
+import math
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import os
 
 from fastapi import HTTPException
 from influxdb_client.client.exceptions import InfluxDBError
-from influxdb_client import InfluxDBClient
+
+from services import query_gateway
+from services.result_cache import cached, stats_cache
+from utils import influxdb_pool
 
 # Import konfigurasi dari environment
-INFLUXDB_URL = os.getenv("INFLUXDB_URL", "http://localhost:8086")
-INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "th1s_1s_a_v3ry_s3cur3_4nd_l0ng_4dm1n_t0k3n_f0r_d3v")
-INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "iot_project_alpha")
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
 
 # Import queries yang sudah dimodularisasi
@@ -23,6 +25,7 @@ from flux_queries import (
     get_temperature_stats_query,
     get_humidity_stats_query,
     get_environmental_stats_query,
+    get_stats_bundle_query,
     get_average_temperature_last_hour_query,
     get_min_temperature_last_hour_query,
     get_max_temperature_last_hour_query,
@@ -36,27 +39,19 @@ from flux_queries import (
 
 logger = logging.getLogger(__name__)
 
-# InfluxDB client singleton
-_influx_client = None
-_query_api = None
-
+# InfluxDB client diambil dari pool bersama (utils/influxdb_pool.py)
 def get_influx_client():
     """
-    Mendapatkan instance InfluxDB client (singleton pattern)
+    Mendapatkan instance InfluxDB client dari pool bersama
     
     Returns:
         InfluxDBClient: Instance InfluxDB client
     """
-    global _influx_client
-    
-    if _influx_client is None:
-        try:
-            _influx_client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-        except Exception as e:
-            logger.error(f"Error saat inisialisasi koneksi InfluxDB: {e}", exc_info=True)
-            raise HTTPException(status_code=503, detail="Gagal terhubung ke InfluxDB")
-    
-    return _influx_client
+    try:
+        return influxdb_pool.get_client()
+    except Exception as e:
+        logger.error(f"Error saat inisialisasi koneksi InfluxDB: {e}", exc_info=True)
+        raise HTTPException(status_code=503, detail="Gagal terhubung ke InfluxDB")
 
 def get_query_api():
     """
@@ -65,15 +60,11 @@ def get_query_api():
     Returns:
         InfluxDBClient.query_api: Query API dari InfluxDB client
     """
-    global _query_api
-    
-    if _query_api is None:
-        client = get_influx_client()
-        _query_api = client.query_api()
-    
-    return _query_api
+    get_influx_client()
+    return influxdb_pool.get_query_api()
 
 
+@cached(stats_cache)
 async def get_average_temperature_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan suhu rata-rata dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -84,14 +75,12 @@ async def get_average_temperature_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_average_temperature_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk suhu rata-rata 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -137,8 +126,6 @@ async def get_temperature_stats(start_time: Optional[datetime], end_time: Option
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-
     # Bangun string filter waktu
     range_filter_str = f'start: {start_time.isoformat() if start_time else "-24h"}'
     if end_time:
@@ -155,7 +142,7 @@ async def get_temperature_stats(start_time: Optional[datetime], end_time: Option
     
     try:
         logger.info(f"Menjalankan Flux query untuk statistik suhu: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result:
             # Tidak ada data yang ditemukan
@@ -206,8 +193,6 @@ async def get_humidity_stats(start_time: Optional[datetime], end_time: Optional[
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-
     # Bangun string filter waktu
     range_filter_str = f'start: {start_time.isoformat() if start_time else "-24h"}'
     if end_time:
@@ -224,7 +209,7 @@ async def get_humidity_stats(start_time: Optional[datetime], end_time: Optional[
     
     try:
         logger.info(f"Menjalankan Flux query untuk statistik kelembaban: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result:
             # Tidak ada data yang ditemukan
@@ -275,8 +260,6 @@ async def get_environmental_stats(start_time: Optional[datetime], end_time: Opti
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-
     # Bangun string filter waktu
     range_filter_str = f'start: {start_time.isoformat() if start_time else "-24h"}'
     if end_time:
@@ -293,7 +276,7 @@ async def get_environmental_stats(start_time: Optional[datetime], end_time: Opti
     
     try:
         logger.info(f"Menjalankan Flux query untuk statistik lingkungan: {flux_query}")
-        results = q_api.query(query=flux_query)
+        results = await query_gateway.query(flux_query)
         
         stats = {
             "temperature": {
@@ -341,6 +324,7 @@ async def get_environmental_stats(start_time: Optional[datetime], end_time: Opti
         raise HTTPException(status_code=500, detail=detail_msg)
 
 
+@cached(stats_cache)
 async def get_average_humidity_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan kelembaban rata-rata dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -351,14 +335,12 @@ async def get_average_humidity_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_average_humidity_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk kelembaban rata-rata 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -388,6 +370,7 @@ async def get_average_humidity_last_hour() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=detail_msg)
 
 
+@cached(stats_cache)
 async def get_min_humidity_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan kelembaban minimum dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -398,14 +381,12 @@ async def get_min_humidity_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_min_humidity_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk kelembaban minimum 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -435,6 +416,7 @@ async def get_min_humidity_last_hour() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=detail_msg)
 
 
+@cached(stats_cache)
 async def get_max_humidity_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan kelembaban maksimum dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -445,14 +427,12 @@ async def get_max_humidity_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_max_humidity_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk kelembaban maksimum 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -494,9 +474,11 @@ async def get_humidity_stats_last_hour() -> Dict[str, Any]:
     """
     try:
         # Mendapatkan semua data secara parallel
-        avg_data = await get_average_humidity_last_hour()
-        min_data = await get_min_humidity_last_hour()
-        max_data = await get_max_humidity_last_hour()
+        avg_data, min_data, max_data = await asyncio.gather(
+            get_average_humidity_last_hour(),
+            get_min_humidity_last_hour(),
+            get_max_humidity_last_hour()
+        )
         
         # Gabungkan hasil
         return {
@@ -512,6 +494,7 @@ async def get_humidity_stats_last_hour() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail="Gagal mengambil statistik kelembaban: Terjadi kesalahan internal server.")
 
 
+@cached(stats_cache)
 async def get_min_temperature_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan suhu minimum dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -522,14 +505,12 @@ async def get_min_temperature_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_min_temperature_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk suhu minimum 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -559,6 +540,7 @@ async def get_min_temperature_last_hour() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=detail_msg)
 
 
+@cached(stats_cache)
 async def get_max_temperature_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan suhu maksimum dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -569,14 +551,12 @@ async def get_max_temperature_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_max_temperature_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk suhu maksimum 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -606,6 +586,7 @@ async def get_max_temperature_last_hour() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=detail_msg)
 
 
+@cached(stats_cache)
 async def get_temperature_stats_last_hour() -> Dict[str, Any]:
     """
     Mendapatkan statistik suhu (rata-rata, min, max) dari seluruh perangkat dalam rentang 1 jam terakhir
@@ -616,14 +597,12 @@ async def get_temperature_stats_last_hour() -> Dict[str, Any]:
     Raises:
         HTTPException: Jika terjadi error saat query
     """
-    q_api = get_query_api()
-    
     # Dapatkan query dari modul flux_queries
     flux_query = get_temperature_stats_last_hour_query(INFLUXDB_BUCKET)
     
     try:
         logger.info(f"Menjalankan Flux query untuk statistik suhu 1 jam terakhir: {flux_query}")
-        result = q_api.query(query=flux_query)
+        result = await query_gateway.query(flux_query)
         
         if not result or len(result) == 0 or len(result[0].records) == 0:
             return {
@@ -654,3 +633,109 @@ async def get_temperature_stats_last_hour() -> Dict[str, Any]:
         if isinstance(e, ValueError) or isinstance(e, TypeError):
             detail_msg = f"Gagal query statistik suhu dari InfluxDB: {str(e)}"
         raise HTTPException(status_code=500, detail=detail_msg)
+
+
+# Jumlah desimal per parameter, konsisten dengan endpoint statistik lainnya
+BUNDLE_FIELD_DECIMALS = {"temperature": 1, "humidity": 0}
+
+
+def _summarize_partials(partials: List[Dict[str, Any]], decimals: int) -> Dict[str, Any]:
+    """
+    Menggabungkan akumulator parsial (count, sum, sum_sq, min, max, last) menjadi statistik
+    
+    Args:
+        partials: Daftar akumulator parsial hasil reduce per lokasi
+        decimals: Jumlah desimal pembulatan nilai
+        
+    Returns:
+        Dict[str, Any]: mean, min, max, count, stddev (sampel), last, dan last_time
+    """
+    count = sum(p["count"] for p in partials)
+    if not count:
+        return {"mean": None, "min": None, "max": None, "count": 0, "stddev": None, "last": None, "last_time": None}
+    
+    total = sum(p["sum"] for p in partials)
+    total_sq = sum(p["sum_sq"] for p in partials)
+    mean = total / count
+    # Varians sampel dari jumlah dan jumlah kuadrat; clamp ke 0 untuk galat floating point
+    variance = max((total_sq - total * mean) / (count - 1), 0.0) if count > 1 else 0.0
+    latest = max(partials, key=lambda p: p["last_time"])
+    
+    return {
+        "mean": round(mean, decimals),
+        "min": round(min(p["min"] for p in partials), decimals),
+        "max": round(max(p["max"] for p in partials), decimals),
+        "count": int(count),
+        "stddev": round(math.sqrt(variance), 2),
+        "last": round(latest["last"], decimals),
+        "last_time": latest["last_time"].isoformat() if latest["last_time"] else None
+    }
+
+
+@cached(stats_cache)
+async def get_stats_bundle_last_hour() -> Dict[str, Any]:
+    """
+    Mendapatkan bundel statistik suhu dan kelembaban 1 jam terakhir (keseluruhan dan per lokasi)
+    dengan satu query InfluxDB, menggantikan enam panggilan avg/min/max terpisah
+    
+    Returns:
+        Dict[str, Any]: Statistik mean/min/max/count/stddev/last per parameter dan per lokasi
+    
+    Raises:
+        HTTPException: Jika terjadi error saat query
+    """
+    flux_query = get_stats_bundle_query(INFLUXDB_BUCKET, "start: -1h")
+    
+    try:
+        logger.info(f"Menjalankan Flux query untuk bundel statistik 1 jam terakhir: {flux_query}")
+        result = await query_gateway.query(flux_query)
+        
+        # Kelompokkan akumulator parsial per parameter dan per lokasi
+        partials_by_field: Dict[str, List[Dict[str, Any]]] = {field: [] for field in BUNDLE_FIELD_DECIMALS}
+        partials_by_location: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for table in result or []:
+            for record in table.records:
+                field = record.values.get("_field")
+                if field not in partials_by_field:
+                    continue
+                partial = {
+                    "count": record.values.get("count") or 0.0,
+                    "sum": record.values.get("sum") or 0.0,
+                    "sum_sq": record.values.get("sum_sq") or 0.0,
+                    "min": record.values.get("min"),
+                    "max": record.values.get("max"),
+                    "last": record.values.get("last"),
+                    "last_time": record.values.get("last_time")
+                }
+                if not partial["count"]:
+                    continue
+                partials_by_field[field].append(partial)
+                location = record.values.get("location") or "unknown"
+                partials_by_location.setdefault(location, {})[field] = partial
+        
+        bundle = {
+            field: _summarize_partials(partials, BUNDLE_FIELD_DECIMALS[field])
+            for field, partials in partials_by_field.items()
+        }
+        bundle["locations"] = {
+            location: {
+                field: _summarize_partials([partial], BUNDLE_FIELD_DECIMALS[field])
+                for field, partial in fields.items()
+            }
+            for location, fields in sorted(partials_by_location.items())
+        }
+        bundle["timestamp"] = datetime.now().isoformat()
+        
+        return bundle
+
+    except InfluxDBError as e:
+        logger.error(f"InfluxDBError saat query bundel statistik: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Gagal query data dari InfluxDB: {e.message}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error saat query bundel statistik dari InfluxDB: {e}", exc_info=True)
+        detail_msg = "Gagal query bundel statistik dari InfluxDB: Terjadi kesalahan internal server."
+        if isinstance(e, ValueError) or isinstance(e, TypeError):
+            detail_msg = f"Gagal query bundel statistik dari InfluxDB: {str(e)}"
+        raise HTTPException(status_code=500, detail=detail_msg)
@@ -0,0 +1,196 @@
+"""
+Analitik tren tervektorisasi untuk banyak seri sekaligus
+Menghitung slope, korelasi, moving average, volatilitas, kuantil, dan anomali z-score
+untuk matriks (ruangan × waktu) dalam satu lintasan NumPy. Seri dengan panjang berbeda
+diisi NaN di bagian akhir.
+"""
+
+import logging
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+# Konstanta analisis (sama dengan perilaku trend_service sebelumnya)
+STABLE_SLOPE_THRESHOLD = 0.01
+ANOMALY_Z_THRESHOLD = 2.0
+MOVING_AVERAGE_WINDOWS = {"hourly": 3}
+DEFAULT_MOVING_AVERAGE_WINDOW = 7
+
+
+def to_padded_matrix(series: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Menyusun beberapa seri dengan panjang berbeda menjadi matriks yang diisi NaN di akhir
+
+    Args:
+        series: Daftar seri nilai (satu per ruangan/lokasi)
+
+    Returns:
+        np.ndarray: Matriks float berukuran (jumlah seri × panjang seri terpanjang)
+    """
+    width = max((len(s) for s in series), default=0)
+    matrix = np.full((len(series), width), np.nan)
+    for row, values in enumerate(series):
+        matrix[row, :len(values)] = values
+    return matrix
+
+
+def _insufficient_data() -> Dict[str, Any]:
+    return {
+        "trend_direction": "insufficient_data",
+        "slope": 0,
+        "correlation": 0,
+        "moving_averages": [],
+        "volatility": 0,
+        "anomalies": []
+    }
+
+
+def analyze_trends(values: np.ndarray, period: str) -> List[Dict[str, Any]]:
+    """
+    Menghitung analisis tren untuk setiap baris matriks (ruangan × waktu) sekaligus
+
+    Args:
+        values: Matriks 2-D nilai; NaN hanya boleh berada di akhir baris (padding)
+        period: Periode data ("hourly", "daily", "monthly"), menentukan jendela moving average
+
+    Returns:
+        List[Dict[str, Any]]: Satu hasil analisis per baris dengan format yang sama seperti
+        `trend_service._calculate_trend_analysis`
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    rows, width = values.shape
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=1)
+    enough = n >= 2
+    if not enough.any():
+        return [_insufficient_data() for _ in range(rows)]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        safe_n = np.maximum(n, 1)
+        filled = np.where(valid, values, 0.0)
+
+        # Momen pertama dan kedua (populasi, ddof=0) untuk nilai dan indeks waktu
+        mean = filled.sum(axis=1) / safe_n
+        deviation = np.where(valid, values - mean[:, None], 0.0)
+        std = np.sqrt((deviation ** 2).sum(axis=1) / safe_n)
+
+        x = np.arange(width, dtype=float)
+        x_centered = np.where(valid, x[None, :] - ((n - 1) / 2.0)[:, None], 0.0)
+        sxx = (x_centered ** 2).sum(axis=1)
+        sxy = (x_centered * deviation).sum(axis=1)
+
+        # Regresi linear orde 1 (setara np.polyfit(x, y, 1)[0]) dan korelasi Pearson
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        correlation = sxy / np.sqrt(sxx * (deviation ** 2).sum(axis=1))
+        correlation = np.where(np.isfinite(correlation), correlation, 0.0)
+
+        # Anomali: |z| > ANOMALY_Z_THRESHOLD
+        anomaly_mask = valid & (np.abs(deviation) > ANOMALY_Z_THRESHOLD * std[:, None])
+
+        # Moving average per jendela; baris dengan ukuran jendela sama dihitung bersama
+        base_window = MOVING_AVERAGE_WINDOWS.get(period, DEFAULT_MOVING_AVERAGE_WINDOW)
+        window = np.minimum(base_window, n - 1)
+        ma_count = np.maximum(n - window + 1, 0)
+        moving_avg = np.full((rows, width), np.nan)
+        for size in np.unique(window[window > 0]):
+            selected = window == size
+            moving_avg[selected, :width - size + 1] = sliding_window_view(
+                filled[selected], size, axis=1
+            ).mean(axis=2)
+
+        # Statistik deskriptif dari satu kali sort per baris (NaN padding berada di akhir);
+        # kuantil memakai interpolasi linear seperti np.percentile
+        ordered = np.sort(np.where(valid, values, np.nan), axis=1)
+        last_idx = np.maximum(n - 1, 0)
+        positions = np.array([0.25, 0.5, 0.75])[None, :] * last_idx[:, None]
+        lower = np.floor(positions).astype(int)
+        upper = np.ceil(positions).astype(int)
+        lower_values = np.take_along_axis(ordered, lower, axis=1)
+        upper_values = np.take_along_axis(ordered, upper, axis=1)
+        quantiles = lower_values + (upper_values - lower_values) * (positions - lower)
+        minimum = ordered[:, 0]
+        maximum = np.take_along_axis(ordered, last_idx[:, None], axis=1)[:, 0]
+        rounded_moving_avg = np.round(moving_avg, 1)
+
+    results: List[Dict[str, Any]] = []
+    for row in range(rows):
+        if not enough[row]:
+            results.append(_insufficient_data())
+            continue
+
+        row_slope = float(slope[row])
+        if abs(row_slope) < STABLE_SLOPE_THRESHOLD:
+            trend_direction = "stable"
+        elif row_slope > 0:
+            trend_direction = "increasing"
+        else:
+            trend_direction = "decreasing"
+
+        anomaly_idx = np.flatnonzero(anomaly_mask[row])
+        row_mean = float(mean[row])
+        row_std = float(std[row])
+        q25, median, q75 = (float(q) for q in quantiles[row])
+
+        results.append({
+            "trend_direction": trend_direction,
+            "slope": round(row_slope, 4),
+            "correlation": round(float(correlation[row]), 3),
+            "moving_averages": rounded_moving_avg[row, :ma_count[row]].tolist() if window[row] > 0 else [],
+            "volatility": round(row_std, 2),
+            "anomalies": [
+                {
+                    "index": int(i),
+                    "value": round(float(values[row, i]), 1),
+                    "deviation": round(abs(float(deviation[row, i])), 1)
+                }
+                for i in anomaly_idx
+            ],
+            "statistics": {
+                "mean": round(row_mean, 1),
+                "median": round(median, 1),
+                "std": round(row_std, 2),
+                "min": round(float(minimum[row]), 1),
+                "max": round(float(maximum[row]), 1),
+                "q25": round(q25, 1),
+                "q75": round(q75, 1)
+            }
+        })
+
+    return results
+
+
+def analyze_trend(values: Sequence[float], period: str) -> Dict[str, Any]:
+    """
+    Menghitung analisis tren untuk satu seri
+
+    Args:
+        values: Nilai seri
+        period: Periode data ("hourly", "daily", "monthly")
+
+    Returns:
+        Dict[str, Any]: Hasil analisis tren
+    """
+    if values is None or len(values) < 2:
+        return _insufficient_data()
+    return analyze_trends(np.asarray(values, dtype=float)[None, :], period)[0]
+
+
+def analyze_trends_by_key(series: Dict[str, Sequence[float]], period: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Menghitung analisis tren untuk banyak seri bernama (cth: per ruangan) dalam satu lintasan
+
+    Args:
+        series: Mapping nama seri -> nilai
+        period: Periode data ("hourly", "daily", "monthly")
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Mapping nama seri -> hasil analisis tren
+    """
+    keys = list(series.keys())
+    if not keys:
+        return {}
+    results = analyze_trends(to_padded_matrix([series[k] for k in keys]), period)
+    return dict(zip(keys, results))
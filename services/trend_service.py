@@ -3,21 +3,19 @@ Service untuk analisis tren data sensor
 Berisi fungsi-fungsi untuk menganalisis pola temporal data
 """
 
+import asyncio
 import logging
-import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from datetime import datetime, timedelta, timezone
 import os
 
 from fastapi import HTTPException
 from influxdb_client.client.exceptions import InfluxDBError
-from .stats_service import get_influx_client, get_query_api
+from . import query_gateway, result_decoder, rollup_service, trend_analytics
 
 # Import query functions dari trend_analysis
 from flux_queries.trend_analysis import (
-    get_hourly_aggregated_query,
-    get_daily_aggregated_query,
     get_statistical_summary_query,
     get_moving_average_query,
     get_anomaly_detection_query,
@@ -30,6 +28,18 @@ logger = logging.getLogger(__name__)
 # Konfigurasi
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET_PRIMARY", "sensor_data_primary")
 
+# Parameter dan periode untuk analisis tren batch
+TREND_PARAMETERS = ("temperature", "humidity")
+ALL_LOCATIONS = "all"
+# periode -> (rentang, jendela agregasi, jenis periode analisis, format timestamp)
+TREND_PERIODS = {
+    "day": (timedelta(hours=24), "1h", "hourly", "%H:%M"),
+    "week": (timedelta(days=7), "1d", "daily", "%Y-%m-%d"),
+    "month": (timedelta(days=30), "1d", "monthly", "%m-%d"),
+}
+# Kolom hasil query yang dibutuhkan analisis tren
+SERIES_COLUMNS = ["result", "_time", "_value", "_field", "location"]
+
 async def get_hourly_trend_data(
     parameter: str = "temperature",
     location: Optional[str] = None,
@@ -46,53 +56,38 @@ async def get_hourly_trend_data(
     Returns:
         Dict berisi data tren per jam dengan analisis statistik
     """
-    q_api = get_query_api()
-    
     # Build location filter
     location_filter = ""
     if location and location != "all":
         location_filter = f'|> filter(fn: (r) => r["location"] == "{location}")'
     
-    # Query untuk data per jam menggunakan function dari trend_analysis
-    flux_query = get_hourly_aggregated_query(INFLUXDB_BUCKET, parameter, location_filter, hours)
+    # Query per jam; planner memakai rollup bila tersedia, selain itu data mentah
+    now = datetime.now(timezone.utc)
+    flux_query = rollup_service.build_aggregated_query(
+        parameter, location_filter, now - timedelta(hours=hours), now, "1h"
+    )
     
     try:
         logger.info(f"Fetching hourly trend for {parameter}")
         logger.info(f"Using query: {flux_query}")
-        result = q_api.query(query=flux_query)
+        frame = await query_gateway.query_columns(flux_query, "query tren per jam", columns=SERIES_COLUMNS)
+        timestamps, values = _sorted_series(frame)
         
-        if not result or len(result) == 0:
+        if len(values) == 0:
             return _generate_empty_trend_response(hours, "hourly", parameter, location or "all")
         
-        # Process data
-        timestamps = []
-        values = []
-        
-        for table in result:
-            for record in table.records:
-                timestamps.append(record.get_time())
-                values.append(record.get_value())
-        
-        if not values:
-            return _generate_empty_trend_response(hours, "hourly", parameter, location or "all")
-        
-        # Sort by timestamp
-        data_pairs = list(zip(timestamps, values))
-        data_pairs.sort(key=lambda x: x[0])
-        timestamps, values = zip(*data_pairs)
-        
         # Calculate trend analysis
         trend_analysis = _calculate_trend_analysis(values, "hourly")
         
         # Format timestamps for display
-        formatted_timestamps = [ts.strftime("%H:%M") for ts in timestamps]
+        formatted_timestamps = result_decoder.format_times(timestamps, "%H:%M")
         
         return {
             "period": "hourly",
             "parameter": parameter,
             "location": location or "all",
             "timestamps": formatted_timestamps,
-            "values": [round(v, 1) for v in values],
+            "values": np.round(values, 1).tolist(),
             "analysis": trend_analysis,
             "data_points": len(values),
             "last_updated": datetime.now().isoformat()
@@ -101,6 +96,8 @@ async def get_hourly_trend_data(
     except InfluxDBError as e:
         logger.error(f"InfluxDB error in hourly trend: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in hourly trend analysis: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -122,52 +119,37 @@ async def get_daily_trend_data(
     Returns:
         Dict berisi data tren harian dengan analisis statistik
     """
-    q_api = get_query_api()
-    
     # Build location filter
     location_filter = ""
     if location and location != "all":
         location_filter = f'|> filter(fn: (r) => r["location"] == "{location}")'
     
-    # Query untuk data per hari menggunakan function dari trend_analysis
-    flux_query = get_daily_aggregated_query(INFLUXDB_BUCKET, parameter, location_filter, days)
+    # Query per hari; planner memakai rollup bila tersedia, selain itu data mentah
+    now = datetime.now(timezone.utc)
+    flux_query = rollup_service.build_aggregated_query(
+        parameter, location_filter, now - timedelta(days=days), now, "1d"
+    )
     
     try:
         logger.info(f"Fetching daily trend for {parameter}")
-        result = q_api.query(query=flux_query)
-        
-        if not result or len(result) == 0:
-            return _generate_empty_trend_response(days, "daily", parameter, location or "all")
-        
-        # Process data
-        timestamps = []
-        values = []
-        
-        for table in result:
-            for record in table.records:
-                timestamps.append(record.get_time())
-                values.append(record.get_value())
+        frame = await query_gateway.query_columns(flux_query, "query tren harian", columns=SERIES_COLUMNS)
+        timestamps, values = _sorted_series(frame)
         
-        if not values:
+        if len(values) == 0:
             return _generate_empty_trend_response(days, "daily", parameter, location or "all")
         
-        # Sort by timestamp
-        data_pairs = list(zip(timestamps, values))
-        data_pairs.sort(key=lambda x: x[0])
-        timestamps, values = zip(*data_pairs)
-        
         # Calculate trend analysis
         trend_analysis = _calculate_trend_analysis(values, "daily")
         
         # Format timestamps for display
-        formatted_timestamps = [ts.strftime("%Y-%m-%d") for ts in timestamps]
+        formatted_timestamps = result_decoder.format_times(timestamps, "%Y-%m-%d")
         
         return {
             "period": "daily",
             "parameter": parameter,
             "location": location or "all",
             "timestamps": formatted_timestamps,
-            "values": [round(v, 1) for v in values],
+            "values": np.round(values, 1).tolist(),
             "analysis": trend_analysis,
             "data_points": len(values),
             "last_updated": datetime.now().isoformat()
@@ -176,6 +158,8 @@ async def get_daily_trend_data(
     except InfluxDBError as e:
         logger.error(f"InfluxDB error in daily trend: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in daily trend analysis: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -197,52 +181,37 @@ async def get_monthly_trend_data(
     Returns:
         Dict berisi data tren bulanan dengan analisis statistik
     """
-    q_api = get_query_api()
-    
     # Build location filter
     location_filter = ""
     if location and location != "all":
         location_filter = f'|> filter(fn: (r) => r["location"] == "{location}")'
     
-    # Query untuk data per hari (untuk analisis bulanan) menggunakan function dari trend_analysis
-    flux_query = get_daily_aggregated_query(INFLUXDB_BUCKET, parameter, location_filter, days)
+    # Query per hari (untuk analisis bulanan); planner memakai rollup bila tersedia
+    now = datetime.now(timezone.utc)
+    flux_query = rollup_service.build_aggregated_query(
+        parameter, location_filter, now - timedelta(days=days), now, "1d"
+    )
     
     try:
         logger.info(f"Fetching monthly trend for {parameter}")
-        result = q_api.query(query=flux_query)
-        
-        if not result or len(result) == 0:
-            return _generate_empty_trend_response(days, "monthly", parameter, location or "all")
-        
-        # Process data
-        timestamps = []
-        values = []
-        
-        for table in result:
-            for record in table.records:
-                timestamps.append(record.get_time())
-                values.append(record.get_value())
+        frame = await query_gateway.query_columns(flux_query, "query tren bulanan", columns=SERIES_COLUMNS)
+        timestamps, values = _sorted_series(frame)
         
-        if not values:
+        if len(values) == 0:
             return _generate_empty_trend_response(days, "monthly", parameter, location or "all")
         
-        # Sort by timestamp
-        data_pairs = list(zip(timestamps, values))
-        data_pairs.sort(key=lambda x: x[0])
-        timestamps, values = zip(*data_pairs)
-        
         # Calculate trend analysis
         trend_analysis = _calculate_trend_analysis(values, "monthly")
         
         # Format timestamps for display
-        formatted_timestamps = [ts.strftime("%m-%d") for ts in timestamps]
+        formatted_timestamps = result_decoder.format_times(timestamps, "%m-%d")
         
         return {
             "period": "monthly",
             "parameter": parameter,
             "location": location or "all",
             "timestamps": formatted_timestamps,
-            "values": [round(v, 1) for v in values],
+            "values": np.round(values, 1).tolist(),
             "analysis": trend_analysis,
             "data_points": len(values),
             "last_updated": datetime.now().isoformat()
@@ -251,11 +220,135 @@ async def get_monthly_trend_data(
     except InfluxDBError as e:
         logger.error(f"InfluxDB error in monthly trend: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in monthly trend analysis: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def get_batch_trend_data(
+    parameters: List[str],
+    locations: Optional[List[str]] = None,
+    period: str = "week"
+) -> Dict[str, Any]:
+    """
+    Mendapatkan data tren untuk banyak lokasi dan parameter dengan satu query ke InfluxDB
+
+    Data dikelompokkan per (location, _field) di InfluxDB, dipisah per seri di memori, lalu
+    seluruh seri dianalisis bersama secara tervektorisasi. Lokasi "all" menghasilkan seri
+    gabungan seluruh gedung per parameter.
+
+    Args:
+        parameters: Daftar parameter ('temperature', 'humidity')
+        locations: Daftar lokasi; None atau ["all"] untuk gabungan seluruh lokasi
+        period: Periode analisis: 'day', 'week', atau 'month'
+
+    Returns:
+        Dict berisi data tren per lokasi dan parameter, dengan format tiap seri sama
+        seperti `get_daily_trend_data`
+
+    Raises:
+        HTTPException: Jika parameter/periode tidak valid atau query gagal
+    """
+    if period not in TREND_PERIODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Period '{period}' tidak didukung. Gunakan 'day', 'week', atau 'month'"
+        )
+    invalid = [p for p in parameters if p not in TREND_PARAMETERS]
+    if not parameters or invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parameter tidak valid: {', '.join(invalid) or '-'}. Gunakan: {', '.join(TREND_PARAMETERS)}"
+        )
+
+    span, window, period_type, timestamp_format = TREND_PERIODS[period]
+    locations = list(dict.fromkeys(locations or [ALL_LOCATIONS]))
+    specific_locations = [loc for loc in locations if loc != ALL_LOCATIONS]
+    now = datetime.now(timezone.utc)
+    start = now - span
+
+    # Satu script Flux: seri per lokasi dan (opsional) seri gabungan, dibedakan dari nama yield
+    queries = []
+    if specific_locations:
+        location_filter = "|> filter(fn: (r) => " + " or ".join(
+            f'r["location"] == "{loc}"' for loc in specific_locations
+        ) + ")"
+        queries.append(rollup_service.build_aggregated_query(
+            parameters, location_filter, start, now, window,
+            group_columns=["location", "_field"], yield_prefix="location_"
+        ))
+    if ALL_LOCATIONS in locations:
+        queries.append(rollup_service.build_aggregated_query(
+            parameters, "", start, now, window,
+            group_columns=["_field"], yield_prefix="all_"
+        ))
+
+    try:
+        logger.info(f"Fetching batch trend for {parameters} di {len(locations)} lokasi ({period})")
+        frame = await query_gateway.query_columns("\n".join(queries), "query tren batch", columns=SERIES_COLUMNS)
+    except InfluxDBError as e:
+        logger.error(f"InfluxDB error in batch trend: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {e.message}")
+
+    # Seri gabungan dikenali dari nama yield; seluruh seri disusun menjadi satu matriks
+    # (lokasi, parameter) × waktu, terurut waktu karena rollup dan data mentah terpisah
+    if not frame.empty:
+        is_all = frame["result"].str.startswith("all_", na=False)
+        frame = frame.assign(location=frame["location"].where(~is_all, ALL_LOCATIONS))
+        frame = frame[frame["location"].isin(locations)]
+    matrix = result_decoder.to_series_matrix(frame, ["location", "_field"])
+    analyses = trend_analytics.analyze_trends(matrix.values, period_type) if matrix.keys else []
+    row_by_key = {key: row for row, key in enumerate(matrix.keys)}
+
+    period_count = int(span / rollup_service.parse_duration(window))
+    last_updated = datetime.now().isoformat()
+    by_location: Dict[str, Dict[str, Any]] = {}
+    for location in locations:
+        by_location[location] = {}
+        for parameter in parameters:
+            row = row_by_key.get((location, parameter))
+            if row is None:
+                by_location[location][parameter] = _generate_empty_trend_response(
+                    period_count, period_type, parameter, location
+                )
+                continue
+            count = int(matrix.counts[row])
+            by_location[location][parameter] = {
+                "period": period_type,
+                "parameter": parameter,
+                "location": location,
+                "timestamps": result_decoder.format_times(matrix.times[row, :count], timestamp_format),
+                "values": np.round(matrix.values[row, :count], 1).tolist(),
+                "analysis": analyses[row],
+                "data_points": count,
+                "last_updated": last_updated
+            }
+
+    return {
+        "period": period,
+        "parameters": parameters,
+        "locations": by_location,
+        "series_count": len(locations) * len(parameters),
+        "last_updated": last_updated
+    }
+
+
+def _sorted_series(frame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mengambil satu seri (waktu, nilai) terurut waktu dari hasil `query_gateway.query_columns`
+
+    Bagian rollup dan data mentah dikembalikan sebagai tabel terpisah, sehingga hasil
+    gabungan diurutkan kembali berdasarkan waktu.
+    """
+    if frame.empty:
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0)
+    frame = frame.dropna(subset=["_value"]).sort_values("_time", kind="stable")
+    times = frame["_time"].dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+    return times, frame["_value"].to_numpy(dtype=float)
+
+
 def _calculate_trend_analysis(values: List[float], period: str) -> Dict[str, Any]:
     """
     Menghitung analisis statistik untuk data tren
@@ -267,74 +360,9 @@ def _calculate_trend_analysis(values: List[float], period: str) -> Dict[str, Any
     Returns:
         Dict berisi analisis statistik
     """
-    if not values or len(values) < 2:
-        return {
-            "trend_direction": "insufficient_data",
-            "slope": 0,
-            "correlation": 0,
-            "moving_averages": [],
-            "volatility": 0,
-            "anomalies": []
-        }
-    
     try:
-        values_array = np.array(values)
-        x = np.arange(len(values))
-        
-        # Simple linear trend analysis using numpy
-        slope = float(np.polyfit(x, values_array, 1)[0])
-        correlation = float(np.corrcoef(x, values_array)[0, 1]) if len(values) > 1 else 0
-        
-        # Determine trend direction
-        if abs(slope) < 0.01:
-            trend_direction = "stable"
-        elif slope > 0:
-            trend_direction = "increasing"
-        else:
-            trend_direction = "decreasing"
-        
-        # Calculate moving averages
-        window_size = min(3, len(values) - 1) if period == "hourly" else min(7, len(values) - 1)
-        if window_size > 0:
-            moving_avg = pd.Series(values).rolling(window=window_size).mean().dropna().tolist()
-            moving_avg = [round(v, 1) for v in moving_avg]
-        else:
-            moving_avg = []
-        
-        # Calculate volatility (standard deviation)
-        volatility = float(np.std(values_array))
-        
-        # Simple anomaly detection (values beyond 2 standard deviations)
-        mean_val = np.mean(values_array)
-        std_val = np.std(values_array)
-        anomaly_threshold = 2 * std_val
-        
-        anomalies = []
-        for i, val in enumerate(values):
-            if abs(val - mean_val) > anomaly_threshold:
-                anomalies.append({
-                    "index": i,
-                    "value": round(val, 1),
-                    "deviation": round(abs(val - mean_val), 1)
-                })
-        
-        return {
-            "trend_direction": trend_direction,
-            "slope": round(slope, 4),
-            "correlation": round(correlation, 3),
-            "moving_averages": moving_avg,
-            "volatility": round(volatility, 2),
-            "anomalies": anomalies,
-            "statistics": {
-                "mean": round(float(np.mean(values_array)), 1),
-                "median": round(float(np.median(values_array)), 1),
-                "std": round(float(np.std(values_array)), 2),
-                "min": round(float(np.min(values_array)), 1),
-                "max": round(float(np.max(values_array)), 1),
-                "q25": round(float(np.percentile(values_array, 25)), 1),
-                "q75": round(float(np.percentile(values_array, 75)), 1)
-            }
-        }
+        # Perhitungan tervektorisasi; lihat services/trend_analytics.py
+        return trend_analytics.analyze_trend(values, period)
         
     except Exception as e:
         logger.error(f"Error in trend analysis calculation: {e}")
@@ -392,93 +420,70 @@ async def get_comparative_trend_analysis(
     Returns:
         Dict berisi perbandingan tren
     """
-    q_api = get_query_api()
-    
     location_filter = ""
     if location and location != "all":
         location_filter = f'|> filter(fn: (r) => r["location"] == "{location}")'
     
-    # Query untuk periode saat ini
-    current_query = f'''
-    from(bucket: "{INFLUXDB_BUCKET}")
-        |> range(start: -{current_period})
-        |> filter(fn: (r) => r["_measurement"] == "sensor_data")
-        |> filter(fn: (r) => r["_field"] == "{parameter}")
-        {location_filter}
-        |> aggregateWindow(every: 1d, fn: mean, createEmpty: false)
-        |> yield(name: "current_period")
-    '''
-    
-    # Query untuk periode pembanding (periode sebelumnya)
-    if current_period == "7d":
-        comparison_start = "-14d"
-        comparison_stop = "-7d"
-    elif current_period == "30d":
-        comparison_start = "-60d"
-        comparison_stop = "-30d"
-    else:
-        comparison_start = f"-{int(current_period[:-1]) * 2}d"
-        comparison_stop = f"-{current_period}"
-    
-    comparison_query = f'''
-    from(bucket: "{INFLUXDB_BUCKET}")
-        |> range(start: {comparison_start}, stop: {comparison_stop})
-        |> filter(fn: (r) => r["_measurement"] == "sensor_data")
-        |> filter(fn: (r) => r["_field"] == "{parameter}")
-        {location_filter}
-        |> aggregateWindow(every: 1d, fn: mean, createEmpty: false)
-        |> yield(name: "comparison_period")
-    '''
+    # Periode pembanding adalah periode dengan panjang yang sama tepat sebelum periode saat ini
+    current_days = int(current_period[:-1])
+    now = datetime.now(timezone.utc)
+    current_start = now - timedelta(days=current_days)
+    comparison_start = now - timedelta(days=current_days * 2)
+
+    # Agregasi harian; planner memakai rollup bila tersedia, selain itu data mentah
+    current_query = rollup_service.build_aggregated_query(
+        parameter, location_filter, current_start, now, "1d"
+    )
+    comparison_query = rollup_service.build_aggregated_query(
+        parameter, location_filter, comparison_start, current_start, "1d"
+    )
     
     try:
         # Execute both queries
-        current_result = q_api.query(query=current_query)
-        comparison_result = q_api.query(query=comparison_query)
-        
-        # Process current period data
-        current_values = []
-        if current_result:
-            for table in current_result:
-                for record in table.records:
-                    current_values.append(record.get_value())
-        
-        # Process comparison period data
-        comparison_values = []
-        if comparison_result:
-            for table in comparison_result:
-                for record in table.records:
-                    comparison_values.append(record.get_value())
+        current_frame, comparison_frame = await asyncio.gather(
+            query_gateway.query_columns(current_query, "query periode saat ini", columns=SERIES_COLUMNS),
+            query_gateway.query_columns(comparison_query, "query periode pembanding", columns=SERIES_COLUMNS)
+        )
+        _, current_values = _sorted_series(current_frame)
+        _, comparison_values = _sorted_series(comparison_frame)
         
         # Calculate comparison metrics
         comparison_analysis = _calculate_period_comparison(current_values, comparison_values)
         
+        # Analisis tren kedua periode dihitung bersama dalam satu matriks
+        current_trend, comparison_trend = trend_analytics.analyze_trends(
+            trend_analytics.to_padded_matrix([current_values, comparison_values]), "daily"
+        )
+        
         return {
             "parameter": parameter,
             "location": location or "all",
             "current_period": {
                 "period": current_period,
                 "data_points": len(current_values),
-                "analysis": _calculate_trend_analysis(current_values, "daily") if current_values else {}
+                "analysis": current_trend if len(current_values) else {}
             },
             "comparison_period": {
                 "period": comparison_period,
                 "data_points": len(comparison_values),
-                "analysis": _calculate_trend_analysis(comparison_values, "daily") if comparison_values else {}
+                "analysis": comparison_trend if len(comparison_values) else {}
             },
             "comparison": comparison_analysis,
             "last_updated": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in comparative trend analysis: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-def _calculate_period_comparison(current_values: List[float], comparison_values: List[float]) -> Dict[str, Any]:
+def _calculate_period_comparison(current_values: Sequence[float], comparison_values: Sequence[float]) -> Dict[str, Any]:
     """
     Menghitung perbandingan antara dua periode
     """
-    if not current_values or not comparison_values:
+    if len(current_values) == 0 or len(comparison_values) == 0:
         return {
             "change_percentage": 0,
             "change_direction": "insufficient_data",
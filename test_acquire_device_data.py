@@ -0,0 +1,117 @@
+"""
+Test untuk loop akuisisi asinkron (acquire_device_data.py)
+Tidak memerlukan perangkat maupun InfluxDB: HTTP perangkat diganti httpx.MockTransport.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import httpx
+
+import acquire_device_data as acquisition
+from utils.write_buffer import SegmentedWriteBuffer
+
+DEVICES = [
+    {"id_logger": "L1", "lokasi": "F2", "ip_address": "10.6.0.1", "url": "http://10.6.0.1/"},
+    {"id_logger": "L2", "lokasi": "F3", "ip_address": "10.6.0.2", "url": "http://10.6.0.2/"},
+    {"id_logger": "L3", "lokasi": "F4", "ip_address": "10.6.0.3", "url": "http://10.6.0.3/"},
+]
+
+
+def _handler(request):
+    host = request.url.host
+    if host == "10.6.0.1":
+        return httpx.Response(200, text="46#22.20#2D303D")
+    if host == "10.6.0.2":
+        return httpx.Response(200, text="<meta charset='utf-8'><body>51.5#24.10#2D3041</body>")
+    return httpx.Response(500, text="error")
+
+
+def test_cycle_is_written_as_one_batch_and_failing_device_backs_off():
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.host)
+        return _handler(request)
+
+    backoff = acquisition.DeviceBackoff(base_seconds=10, max_seconds=300)
+    write_api = MagicMock()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            cycles = []
+            for _ in range(3):
+                points, _ = await acquisition.poll_cycle(http_client, DEVICES, backoff)
+                await acquisition.write_points(write_api, points, "bucket", "org")
+                cycles.append(points)
+            return cycles
+
+    cycles = asyncio.run(scenario())
+
+    # Satu write per siklus berisi semua pembacaan yang berhasil
+    assert write_api.write.call_count == 3
+    first_batch = write_api.write.call_args_list[0].kwargs["record"]
+    assert len(first_batch) == 2
+    line = first_batch[1]
+    assert line.startswith("device_readings,device_ip=10.6.0.2,id_logger=L2,lokasi=F3")
+    assert "humidity=51.5,status_hex=\"2D3041\",temperature=24.1" in line
+
+    # Kegagalan pertama dicoba lagi di siklus berikutnya, kegagalan kedua masuk backoff
+    assert requested.count("10.6.0.3") == 2
+    assert all(len(points) == 2 for points in cycles)
+
+
+def test_backoff_doubles_and_resets_on_success():
+    backoff = acquisition.DeviceBackoff(base_seconds=10, max_seconds=30)
+
+    delays = [backoff.record_failure("ip", now=0.0) for _ in range(5)]
+    assert delays == [0.0, 10, 20, 30, 30]
+    assert not backoff.ready("ip", now=29.0)
+
+    backoff.record_success("ip")
+    assert backoff.ready("ip", now=0.0)
+
+
+def test_device_overrunning_tick_deadline_is_skipped_without_delaying_cycle():
+    async def handler(request):
+        if request.url.host == "10.6.0.3":
+            await asyncio.sleep(5)
+        return httpx.Response(200, text="46#22.20#2D303D")
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            started = time.monotonic()
+            points, summary = await acquisition.poll_cycle(
+                http_client, DEVICES, acquisition.DeviceBackoff(),
+                spread_seconds=0.06, deadline=started + 0.2
+            )
+            return points, summary, time.monotonic() - started
+
+    points, summary, elapsed = asyncio.run(scenario())
+
+    assert len(points) == 2
+    assert summary == {"ok": 2, "failed": 0, "overrun": 1, "backoff": 0}
+    assert elapsed < 1.0
+
+
+def test_failed_write_is_buffered_and_replayed_in_order(tmp_path):
+    buffer = SegmentedWriteBuffer(str(tmp_path))
+    write_api = MagicMock()
+    write_api.write.side_effect = [ConnectionError("influx down"), None]
+    point = acquisition.build_point(DEVICES[0], {"humidity": 46.0, "temperature": 22.2,
+                                                 "hex_value": "2D303D", "timestamp_ns": 1})
+
+    async def scenario():
+        await acquisition.write_points(write_api, [point], "bucket", "org", buffer)
+        # Selama buffer berisi data, batch baru ikut masuk buffer agar urutan terjaga
+        await acquisition.write_points(write_api, [point.time(2)], "bucket", "org", buffer)
+
+    asyncio.run(scenario())
+    assert write_api.write.call_count == 1
+    assert buffer.has_pending()
+
+    assert acquisition.replay_buffer(write_api, buffer, "bucket", "org") == 2
+    replayed = write_api.write.call_args.kwargs["record"].splitlines()
+    assert [line.rsplit(" ", 1)[1] for line in replayed] == ["1", "2"]
+    assert not buffer.has_pending()
@@ -1,7 +1,7 @@
 import os
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import pandas as pd
 from datetime import datetime, timezone
 
@@ -90,31 +90,24 @@ def test_endpoint_auth_no_keys_configured(client): # client di sini adalah fixtu
 
 # --- Test untuk endpoint /devices/ ---
 
-@patch('api.query_api') # Patch objek query_api di dalam modul api.py
-def test_list_devices_success(mock_q_api, client):
-    # Mock data untuk schema.tagValues (mendapatkan device_id unik)
-    mock_device_ids_table = create_mock_influx_table([
-        create_mock_influx_record({"_value": "dev001"}),
-        create_mock_influx_record({"_value": "dev002"}),
-        create_mock_influx_record({"_value": "dev003_no_loc"}),
-    ])
-
-    # Mock data untuk query lokasi per device_id
-    mock_loc_dev001_table = create_mock_influx_table([
-        create_mock_influx_record({"location": "Room A", "_time": datetime.now(timezone.utc)})
-    ])
-    mock_loc_dev002_table = create_mock_influx_table([
-        create_mock_influx_record({"location": "Room B", "_time": datetime.now(timezone.utc)})
-    ])
-    mock_loc_dev003_table = create_mock_influx_table([]) # Tidak ada record lokasi
-
-    # Atur side_effect untuk mock_q_api.query agar mengembalikan data yang berbeda per panggilan
-    mock_q_api.query.side_effect = [
-        mock_device_ids_table,    # Panggilan pertama (untuk device_id)
-        mock_loc_dev001_table,    # Panggilan kedua (lokasi dev001)
-        mock_loc_dev002_table,    # Panggilan ketiga (lokasi dev002)
-        mock_loc_dev003_table,    # Panggilan keempat (lokasi dev003)
-    ]
+@patch('services.device_registry_service.query_gateway.query', new_callable=AsyncMock)
+def test_list_devices_success(mock_query, client):
+    from services.device_registry_service import reset_device_registry
+    reset_device_registry()
+
+    now = datetime.now(timezone.utc)
+    # Satu query last() yang dikelompokkan per device_id (satu baris per seri)
+    mock_query.return_value = (
+        create_mock_influx_table([
+            create_mock_influx_record({"device_id": "dev001", "location": "Room A", "_time": now}),
+        ])
+        + create_mock_influx_table([
+            create_mock_influx_record({"device_id": "dev002", "location": "Room B", "_time": now}),
+        ])
+        + create_mock_influx_table([
+            create_mock_influx_record({"device_id": "dev003_no_loc", "_time": now}),  # Tidak ada tag lokasi
+        ])
+    )
 
     response = client.get("/devices/", headers={"X-API-Key": TEST_API_KEY})
     
@@ -124,12 +117,15 @@ def test_list_devices_success(mock_q_api, client):
     assert {"device_id": "dev001", "location": "Room A"} in data
     assert {"device_id": "dev002", "location": "Room B"} in data
     assert {"device_id": "dev003_no_loc", "location": "N/A"} in data # Default untuk lokasi tidak ditemukan
-    assert mock_q_api.query.call_count == 4 # 1 untuk IDs + 3 untuk lokasi
+    assert mock_query.await_count == 1 # Tidak ada lagi query lokasi per device
+    reset_device_registry()
 
-@patch('api.query_api')
-def test_list_devices_influxdb_error(mock_q_api, client):
+@patch('services.device_registry_service.query_gateway.query', new_callable=AsyncMock)
+def test_list_devices_influxdb_error(mock_query, client):
     from influxdb_client.client.exceptions import InfluxDBError
-    mock_q_api.query.side_effect = InfluxDBError(response=MagicMock(status=500, reason="DB Error", data="details"))
+    from services.device_registry_service import reset_device_registry
+    reset_device_registry()
+    mock_query.side_effect = InfluxDBError(response=MagicMock(status=500, reason="DB Error", data="details"))
 
     response = client.get("/devices/", headers={"X-API-Key": TEST_API_KEY})
     assert response.status_code == 500
@@ -137,13 +133,13 @@ def test_list_devices_influxdb_error(mock_q_api, client):
 
 # --- Test untuk endpoint /data/ ---
 
-@patch('api.query_api')
-def test_get_sensor_data_success_no_aggregation(mock_q_api, client):
+@patch('services.data_service.query_gateway.query_columns', new_callable=AsyncMock)
+def test_get_sensor_data_success_no_aggregation(mock_query, client):
     mock_df = pd.DataFrame([
         {"_time": datetime(2023, 1, 1, 10, 0, 0, tzinfo=timezone.utc), "device_id": "dev001", "temperature": 22.5, "humidity": 45.0},
         {"_time": datetime(2023, 1, 1, 10, 5, 0, tzinfo=timezone.utc), "device_id": "dev001", "temperature": 22.6, "humidity": 45.1},
     ])
-    mock_q_api.query_data_frame.return_value = mock_df
+    mock_query.return_value = mock_df
 
     response = client.get(
         "/data/?device_ids=dev001&fields=temperature&fields=humidity", 
@@ -155,20 +151,20 @@ def test_get_sensor_data_success_no_aggregation(mock_q_api, client):
     # Perhatikan bahwa Pandas NaT/NaN akan menjadi None, dan datetime menjadi string ISO
     assert data[0]["temperature"] == 22.5
     assert data[0]["_time"] == "2023-01-01T10:00:00Z" # FastAPI akan format ke ISO string
-    mock_q_api.query_data_frame.assert_called_once()
-    called_query = mock_q_api.query_data_frame.call_args[1]['query']
+    mock_query.assert_awaited_once()
+    called_query = mock_query.await_args.args[0]
     assert 'r.device_id == "dev001"' in called_query
     assert '(r._field == "temperature" or r._field == "humidity")' in called_query # Default jika fields tidak spesifik, atau dari parameter
     assert "aggregateWindow" not in called_query
 
-@patch('api.query_api')
-def test_get_sensor_data_success_with_aggregation(mock_q_api, client):
+@patch('services.data_service.query_gateway.query_columns', new_callable=AsyncMock)
+def test_get_sensor_data_success_with_aggregation(mock_query, client):
     mock_aggregated_df = pd.DataFrame([
         {"_time": datetime(2023, 1, 1, 10, 0, 0, tzinfo=timezone.utc), "device_id": "dev001", "temperature_mean": 22.55},
     ])
     # Nama kolom setelah pivot dan agregasi mungkin perlu disesuaikan berdasarkan implementasi pivot Anda
     # Untuk contoh ini, kita asumsikan pivot menghasilkan kolom seperti 'temperature_mean' jika fn='mean'
-    mock_q_api.query_data_frame.return_value = mock_aggregated_df
+    mock_query.return_value = mock_aggregated_df
 
     response = client.get(
         "/data/?device_ids=dev001&fields=temperature&aggregate_window=1h&aggregate_function=mean",
@@ -179,7 +175,7 @@ def test_get_sensor_data_success_with_aggregation(mock_q_api, client):
     assert len(data) == 1
     assert data[0]["temperature_mean"] == 22.55 # Sesuaikan dengan output pivot Anda
     
-    called_query = mock_q_api.query_data_frame.call_args[1]['query']
+    called_query = mock_query.await_args.args[0]
     assert 'aggregateWindow(every: 1h, fn: mean, createEmpty: false)' in called_query
 
 def test_get_sensor_data_invalid_aggregation_function(client):
@@ -204,10 +200,10 @@ def test_get_sensor_data_partial_aggregation_params(client):
     assert response_only_function.status_code == 400
     assert "aggregate_window dan aggregate_function harus digunakan bersamaan" in response_only_function.json()["detail"]
 
-@patch('api.query_api')
-def test_get_sensor_data_influxdb_error(mock_q_api, client):
+@patch('services.data_service.query_gateway.query_columns', new_callable=AsyncMock)
+def test_get_sensor_data_influxdb_error(mock_query, client):
     from influxdb_client.client.exceptions import InfluxDBError
-    mock_q_api.query_data_frame.side_effect = InfluxDBError(response=MagicMock(status=500))
+    mock_query.side_effect = InfluxDBError(response=MagicMock(status=500))
 
     response = client.get("/data/", headers={"X-API-Key": TEST_API_KEY})
     assert response.status_code == 500
@@ -221,11 +217,38 @@ def test_get_sensor_data_limit_validation(client):
     assert response_high.status_code == 422
 
     # Untuk test limit yang valid, kita perlu mock agar tidak error karena InfluxDB tidak terpanggil
-    with patch('api.query_api') as mock_q_api_valid:
-        mock_q_api_valid.query_data_frame.return_value = pd.DataFrame() # Cukup kembalikan DataFrame kosong
+    with patch('services.data_service.query_gateway.query_columns', new_callable=AsyncMock) as mock_query_valid:
+        mock_query_valid.return_value = pd.DataFrame() # Cukup kembalikan DataFrame kosong
         response_valid = client.get("/data/?limit=50", headers={"X-API-Key": TEST_API_KEY})
         assert response_valid.status_code == 200
 
+@patch('services.query_gateway._get_query_api')
+def test_get_sensor_data_streaming_export(mock_get_query_api, client):
+    from influxdb_client.client.flux_table import FluxRecord
+    records = [
+        FluxRecord(table=0, values={"result": "_result", "table": 0, "_time": datetime(2023, 1, 1, 10, 0, i * 10, tzinfo=timezone.utc),
+                                    "device_id": "dev001", "temperature": 22.5 + i, "humidity": None})
+        for i in range(3)
+    ]
+    mock_get_query_api.return_value.query_stream.side_effect = lambda query: iter(records)
+
+    response = client.get("/data/?format=ndjson&limit=1", headers={"X-API-Key": TEST_API_KEY})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    # Ekspor tidak dibatasi `limit`, dan query tidak memuat limit()
+    assert len(lines) == 3
+    assert '"temperature": 23.5' in lines[1] and '"result"' not in lines[1]
+    assert "limit(" not in mock_get_query_api.return_value.query_stream.call_args[1]['query']
+
+    response_csv = client.get("/data/?format=csv", headers={"X-API-Key": TEST_API_KEY})
+    assert response_csv.status_code == 200
+    assert response_csv.text.splitlines()[0] == "_time,device_id,temperature,humidity"
+    assert response_csv.text.splitlines()[1] == "2023-01-01T10:00:00+00:00,dev001,22.5,"
+
+    response_invalid = client.get("/data/?format=xml", headers={"X-API-Key": TEST_API_KEY})
+    assert response_invalid.status_code == 400
+
 
 # --- Test untuk Startup Event ---
 # Menguji startup event secara langsung dengan TestClient bisa rumit.
@@ -251,9 +274,9 @@ def test_startup_influx_ping_fails(MockInfluxDBClient, client):
     MockInfluxDBClient.assert_called_once() # Pastikan client diinisialisasi
     mock_influx_instance.ping.assert_called_once() # Pastikan ping dipanggil
 
-@patch('api.InfluxDBClient')
-def test_startup_influx_connection_exception(MockInfluxDBClient, client):
-    MockInfluxDBClient.side_effect = Exception("Koneksi ditolak") # Simulasi exception saat koneksi
+@patch('utils.influxdb_pool.get_client') # Startup memakai client dari pool bersama
+def test_startup_influx_connection_exception(mock_get_client, client):
+    mock_get_client.side_effect = Exception("Koneksi ditolak") # Simulasi exception saat koneksi
 
     with patch('api.influx_client', new=None), patch('api.query_api', new=None):
         # Perubahan di sini: app adalah argumen posisional pertama untuk TestClient
@@ -261,7 +284,7 @@ def test_startup_influx_connection_exception(MockInfluxDBClient, client):
             response = new_client.get("/devices/", headers={"X-API-Key": TEST_API_KEY})
             assert response.status_code == 503
             assert "Koneksi ke InfluxDB belum siap atau gagal" in response.json()["detail"]
-    MockInfluxDBClient.assert_called_once()
+    mock_get_client.assert_called_once()
 
 # Untuk menjalankan test:
 # 1. Pastikan Anda berada di direktori root proyek Anda (digitalTwin).
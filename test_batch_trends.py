@@ -0,0 +1,83 @@
+"""
+Test untuk analisis tren batch multi-lokasi (services/trend_service.get_batch_trend_data)
+Tidak memerlukan InfluxDB: hasil query gateway diganti dengan tabel tiruan.
+"""
+
+import asyncio
+import io
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+import urllib3
+from fastapi import HTTPException
+
+from services import trend_service
+
+
+def _table(result, field, values, location=None):
+    """
+    Satu tabel annotated CSV seperti respons `query_raw` InfluxDB
+    """
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    tag = ",location" if location is not None else ""
+    lines = [
+        "#datatype,string,long,dateTime:RFC3339,double,string" + (",string" if tag else ""),
+        "#group,false,false,false,false,true" + (",true" if tag else ""),
+        f"#default,{result},,,," + ("," if tag else ""),
+        ",result,table,_time,_value,_field" + tag,
+    ]
+    for day, value in enumerate(values):
+        timestamp = (start + timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        lines.append(f",,0,{timestamp},{value},{field}" + (f",{location}" if tag else ""))
+    return "\r\n".join(lines) + "\r\n\r\n"
+
+
+def _query_api(*tables):
+    body = "".join(tables).encode("utf-8")
+    q_api = MagicMock()
+    q_api.query_raw.side_effect = lambda query: urllib3.HTTPResponse(
+        body=io.BytesIO(body), preload_content=False
+    )
+    return q_api
+
+
+def test_rooms_and_parameters_share_one_query():
+    q_api = _query_api(
+        _table("location_raw", "temperature", [21.0, 21.5, 22.0, 22.5, 23.0, 23.5, 24.0], "F2"),
+        _table("location_raw", "humidity", [50.0, 50.0, 50.0, 50.0, 50.0, 50.0, 50.0], "F2"),
+        _table("location_raw", "temperature", [22.0, 22.0], "F3"),
+        _table("all_raw", "temperature", [21.5, 21.75, 22.0]),
+    )
+
+    with patch.object(trend_service.query_gateway, "_get_query_api", return_value=q_api):
+        batch = asyncio.run(trend_service.get_batch_trend_data(
+            ["temperature", "humidity"], ["F2", "F3", "all"], "week"
+        ))
+
+    assert q_api.query_raw.call_count == 1
+    flux_query = q_api.query_raw.call_args.kwargs["query"]
+    assert 'group(columns: ["location", "_field"])' in flux_query
+    assert 'group(columns: ["_field"])' in flux_query
+    assert 'r["location"] == "F2" or r["location"] == "F3"' in flux_query
+
+    f2 = batch["locations"]["F2"]
+    assert f2["temperature"]["analysis"]["trend_direction"] == "increasing"
+    assert f2["temperature"]["data_points"] == 7
+    assert f2["temperature"]["timestamps"][:2] == ["2024-03-01", "2024-03-02"]
+    assert f2["humidity"]["analysis"]["trend_direction"] == "stable"
+    assert batch["locations"]["F3"]["temperature"]["values"] == [22.0, 22.0]
+    # Seri tanpa data tetap dilaporkan dengan respons kosong
+    assert batch["locations"]["F3"]["humidity"]["analysis"]["trend_direction"] == "no_data"
+    assert batch["locations"]["all"]["temperature"]["data_points"] == 3
+    assert batch["series_count"] == 6
+
+
+def test_invalid_parameter_or_period_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(trend_service.get_batch_trend_data(["pressure"], ["F2"], "week"))
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(trend_service.get_batch_trend_data(["temperature"], ["F2"], "year"))
+    assert exc.value.status_code == 400
@@ -0,0 +1,71 @@
+"""
+Test untuk materialized view ringkasan gedung (services/building_overview.py)
+"""
+
+import asyncio
+
+from services.building_overview import BuildingOverview, BuildingOverviewStore
+
+
+def _room(room_id, temperature, humidity, score, status, active=2, total=3):
+    return {"id": room_id,
+            "currentConditions": {"temperature": temperature, "humidity": humidity},
+            "deviceCount": {"total": total, "active": active},
+            "sensorStatus": "active",
+            "healthScore": {"overallScore": score, "status": status},
+            "lastUpdate": "2026-10-18T08:00:00"}
+
+
+def test_aggregates_follow_room_updates_incrementally():
+    overview = BuildingOverview()
+    overview.update_room(_room("F2", 22.0, 50.0, 95.0, "optimal"))
+    overview.update_room(_room("F3", 24.0, 60.0, 70.0, "warning"))
+    overview.update_room(_room("G2", 26.0, 40.0, 50.0, "critical", active=3))
+
+    document = overview.document()
+    assert overview.document() is document  # Dokumen dipakai ulang selama tidak ada perubahan
+    assert document["buildingStats"]["avgTemperature"] == 24.0
+    assert document["buildingStats"]["temperatureRange"] == {"min": 22.0, "max": 26.0}
+    assert document["floorStats"]["F"] == {"avgTemp": 23.0, "avgHumidity": 55.0, "activeDevices": 4,
+                                           "totalDevices": 6, "deviceEfficiency": 66.7}
+    assert document["alertSummary"]["criticalRooms"] == ["G2"]
+    assert document["alertSummary"]["warningRooms"] == ["F3"]
+
+    # Perubahan hanya pada lastUpdate tidak membangun ulang dokumen
+    assert not overview.update_room({**_room("F2", 22.0, 50.0, 95.0, "optimal"), "lastUpdate": "later"})
+    assert overview.document() is document
+
+    assert overview.update_room(_room("F3", 23.0, 55.0, 92.0, "optimal"))
+    updated = overview.document()
+    assert updated is not document
+    assert updated["floorStats"]["F"]["avgTemp"] == 22.5
+    assert updated["alertSummary"]["warning"] == 0
+    assert updated["alertSummary"]["optimal"] == 2
+    assert updated["buildingStats"]["avgHealthScore"] == 79.0
+
+    overview.remove_room("G2")
+    assert overview.document()["floorStats"]["G"] == {"avgTemp": 0, "avgHumidity": 0,
+                                                      "activeDevices": 0, "totalDevices": 0}
+
+
+def test_store_loads_once_and_serves_precomputed_documents():
+    calls = []
+
+    async def loader(room_ids):
+        calls.append(list(room_ids))
+        return [_room(room_id, 23.0, 55.0, 95.0, "optimal") for room_id in room_ids]
+
+    store = BuildingOverviewStore(["F2", "G2"], loader=loader)
+
+    async def scenario():
+        first = await store.get_document()
+        second = await store.get_document()
+        rooms = await store.get_rooms_document()
+        return first, second, rooms
+
+    first, second, rooms = asyncio.run(scenario())
+
+    assert calls == [["F2", "G2"]]
+    assert first is second
+    assert rooms["totalRooms"] == 2
+    assert first["rooms"] == rooms["rooms"]
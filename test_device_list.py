@@ -0,0 +1,67 @@
+"""
+Test untuk registry perangkat device_list.csv (utils/device_registry.py)
+"""
+
+import os
+
+from utils import device_registry
+from utils.device_registry import (
+    DeviceRegistry,
+    render_telegraf_inputs,
+    replace_telegraf_inputs,
+)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_csv_is_indexed_and_invalid_or_duplicate_rows_are_skipped(tmp_path):
+    csv_path = tmp_path / "device_list.csv"
+    csv_path.write_text(
+        "No,ID LOGGER,LOKASI,IP ADDRESS,MAC ADDRESS\n"
+        "1,2D3032,F2,10.6.0.2,DE:AD:BE:EF:FE:32\n"
+        "2,2D303B,F2,10.6.0.3,DE:AD:BE:EF:FE:33\n"
+        "3,,F4,10.6.0.4,\n"
+        "4,2D3032,F5,10.6.0.5,\n",
+        encoding="utf-8",
+    )
+
+    registry = DeviceRegistry.from_csv(str(csv_path))
+
+    assert len(registry) == 2
+    assert registry.get_by_ip("10.6.0.3").id_logger == "2D303B"
+    assert registry.get_by_id("2D3032").mac_address == "DE:AD:BE:EF:FE:32"
+    assert [d.ip_address for d in registry.at_location("F2")] == ["10.6.0.2", "10.6.0.3"]
+    assert registry.poller_devices()[0] == {
+        "id_logger": "2D3032", "lokasi": "F2", "ip_address": "10.6.0.2", "url": "http://10.6.0.2/"
+    }
+
+
+def test_missing_columns_yield_empty_registry(tmp_path):
+    csv_path = tmp_path / "device_list.csv"
+    csv_path.write_text("No,ID LOGGER\n1,2D3032\n", encoding="utf-8")
+    assert len(DeviceRegistry.from_csv(str(csv_path))) == 0
+
+
+def test_telegraf_conf_is_in_sync_with_device_list():
+    # telegraf.conf harus dibangkitkan ulang setiap kali device_list.csv berubah
+    registry = DeviceRegistry.from_csv(os.path.join(ROOT, "device_list.csv"))
+    with open(os.path.join(ROOT, "telegraf.conf"), encoding="utf-8") as handle:
+        config = handle.read()
+
+    inputs = render_telegraf_inputs(registry)
+    assert replace_telegraf_inputs(config, inputs) == config
+    assert inputs.count("[[inputs.http]]") == len(registry)
+
+
+def test_registry_is_reloaded_only_when_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(device_registry, "DEVICE_LIST_CHECK_SECONDS", 0)
+    csv_path = tmp_path / "device_list.csv"
+    csv_path.write_text("ID LOGGER,LOKASI,IP ADDRESS\n2D3032,F2,10.6.0.2\n", encoding="utf-8")
+
+    first = device_registry.load_registry(str(csv_path))
+    assert device_registry.load_registry(str(csv_path)) is first
+
+    csv_path.write_text("ID LOGGER,LOKASI,IP ADDRESS\n2D3032,F2,10.6.0.2\n2D303B,F3,10.6.0.3\n", encoding="utf-8")
+    reloaded = device_registry.load_registry(str(csv_path))
+    assert reloaded is not first
+    assert reloaded.ip_addresses() == ["10.6.0.2", "10.6.0.3"]
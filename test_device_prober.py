@@ -0,0 +1,57 @@
+"""
+Test untuk prober keterjangkauan perangkat (services/device_prober.py)
+Tidak memerlukan perangkat: pemeriksaan diganti fungsi tiruan atau server TCP lokal.
+"""
+
+import asyncio
+import socket
+
+from services.device_prober import DeviceProber, probe_tcp
+
+
+def test_refresh_bounds_concurrency_and_tracks_flaps():
+    ips = [f"10.6.0.{i}" for i in range(1, 21)]
+    down = {"10.6.0.3"}
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_probe(ip):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return None if ip in down else 1.5
+
+    prober = DeviceProber(lambda: ips, concurrency=4, probe=fake_probe)
+
+    async def scenario():
+        first = await prober.refresh()
+        down.clear()
+        down.add("10.6.0.5")
+        second = await prober.refresh()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert in_flight["max"] == 4
+    assert (first.active_count, first.total_count) == (19, 20)
+    assert prober.snapshot() is second
+    devices = {device["ip_address"]: device for device in second.devices}
+    assert devices["10.6.0.3"]["is_active"] and devices["10.6.0.3"]["flaps_last_hour"] == 1
+    assert devices["10.6.0.5"]["rtt_ms"] == 1.5 and devices["10.6.0.5"]["consecutive_failures"] == 1
+    assert devices["10.6.0.5"]["last_seen"] == first.devices[4]["last_checked"]
+
+
+def test_probe_tcp_measures_rtt_and_treats_refused_as_reachable():
+    async def scenario():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        open_port = server.sockets[0].getsockname()[1]
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        async with server:
+            return (await probe_tcp("127.0.0.1", port=open_port, timeout=1),
+                    await probe_tcp("127.0.0.1", port=closed_port, timeout=1))
+
+    open_rtt, refused_rtt = asyncio.run(scenario())
+    assert open_rtt is not None and open_rtt >= 0
+    assert refused_rtt is not None
@@ -0,0 +1,78 @@
+"""
+Test untuk registry perangkat inkremental (services/device_registry_service.py)
+Tidak memerlukan InfluxDB: hasil query gateway diganti dengan tabel tiruan.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services import device_registry_service
+from services.device_registry_service import (
+    list_devices_with_location,
+    registry_cache,
+    reset_device_registry,
+)
+
+
+def _table(*rows):
+    table = MagicMock()
+    table.records = []
+    for values in rows:
+        record = MagicMock()
+        record.values = values
+        table.records.append(record)
+    return table
+
+
+def test_refresh_is_incremental_from_watermark():
+    t1 = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+    t2 = datetime(2024, 1, 1, 10, 10, tzinfo=timezone.utc)
+    first = [
+        _table({"device_id": "ESP-01", "location": "F2", "_time": t1}),
+        _table({"device_id": "ESP-02", "_time": t1}),
+    ]
+    second = [
+        _table({"device_id": "ESP-02", "location": "F3", "_time": t2}),
+        _table({"device_id": "ESP-03", "location": "F4", "_time": t2}),
+    ]
+
+    reset_device_registry()
+    with patch.object(device_registry_service.query_gateway, "query",
+                      new=AsyncMock(side_effect=[first, second])) as mock_query:
+        initial = asyncio.run(list_devices_with_location())
+        registry_cache.invalidate()
+        refreshed = asyncio.run(list_devices_with_location())
+
+    assert initial == [
+        {"device_id": "ESP-01", "location": "F2"},
+        {"device_id": "ESP-02", "location": "N/A"},
+    ]
+    # Perangkat lama tetap ada, lokasi diperbarui, perangkat baru ditambahkan
+    assert refreshed == [
+        {"device_id": "ESP-01", "location": "F2"},
+        {"device_id": "ESP-02", "location": "F3"},
+        {"device_id": "ESP-03", "location": "F4"},
+    ]
+    first_query = mock_query.await_args_list[0].args[0]
+    second_query = mock_query.await_args_list[1].args[0]
+    assert "range(start: -90d)" in first_query
+    assert "range(start: 2024-01-01T09:55:00.000000Z)" in second_query
+    reset_device_registry()
+
+
+def test_requests_within_refresh_interval_share_one_query():
+    rows = [_table({"device_id": "ESP-01", "location": "F2",
+                    "_time": datetime(2024, 1, 1, tzinfo=timezone.utc)})]
+
+    async def scenario():
+        return await asyncio.gather(*[list_devices_with_location() for _ in range(10)])
+
+    reset_device_registry()
+    with patch.object(device_registry_service.query_gateway, "query",
+                      new=AsyncMock(return_value=rows)) as mock_query:
+        results = asyncio.run(scenario())
+
+    assert mock_query.await_count == 1
+    assert all(r == [{"device_id": "ESP-01", "location": "F2"}] for r in results)
+    reset_device_registry()
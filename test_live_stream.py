@@ -0,0 +1,141 @@
+"""
+Test untuk stream langsung kondisi ruangan (services/live_stream.py, routes/stream_routes.py)
+Tidak memerlukan InfluxDB: state diberikan langsung ke broadcaster.
+"""
+
+import asyncio
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from routes import stream_routes
+from services import live_stream
+from services.live_stream import LiveBroadcaster
+
+
+def _room(room_id, temperature):
+    return {"type": "room", "room_id": room_id,
+            "data": {"currentConditions": {"temperature": temperature, "humidity": 55.0}}}
+
+
+def _device(ip_address, room_id, is_active):
+    return {"type": "device", "room_id": room_id,
+            "data": {"ip_address": ip_address, "device_id": "d1", "is_active": is_active}}
+
+
+def test_only_changes_are_published_and_filtered_per_room():
+    state = [_room("F2", 24.0), _room("G3", 25.0), _device("10.6.0.2", "F2", True)]
+
+    async def collect():
+        return list(state)
+
+    broadcaster = LiveBroadcaster(collect=collect)
+
+    async def scenario():
+        assert await broadcaster.refresh() == 3
+        f2 = broadcaster.subscribe(["F2"])
+        everything = broadcaster.subscribe()
+        initial = await f2.next_events(timeout=0.1), await everything.next_events(timeout=0.1)
+
+        assert await broadcaster.refresh() == 0  # Tidak ada perubahan, tidak ada event
+        idle = await f2.next_events(timeout=0.05)
+
+        state[1] = _room("G3", 26.0)
+        state[2] = _device("10.6.0.2", "F2", False)
+        await broadcaster.refresh()
+        return initial, idle, await f2.next_events(timeout=0.1), await everything.next_events(timeout=0.1)
+
+    (f2_initial, all_initial), idle, f2_changes, all_changes = asyncio.run(scenario())
+
+    assert [event["type"] for event in f2_initial] == ["room", "device"]
+    assert len(all_initial) == 3
+    assert idle == []
+    assert f2_changes == [_device("10.6.0.2", "F2", False)]
+    assert [event.get("room_id") for event in all_changes] == ["G3", "F2"]
+
+
+def test_slow_subscriber_receives_latest_state_per_topic():
+    broadcaster = LiveBroadcaster(collect=None, max_subscribers=1)
+
+    async def scenario():
+        subscription = broadcaster.subscribe()
+        for temperature in (24.0, 24.5, 25.0):
+            broadcaster.publish([_room("F2", temperature)])
+        try:
+            broadcaster.subscribe()
+        except RuntimeError:
+            rejected = True
+        else:
+            rejected = False
+        return subscription, await subscription.next_events(timeout=0.1), rejected
+
+    subscription, events, rejected = asyncio.run(scenario())
+
+    assert events == [_room("F2", 25.0)]
+    assert subscription.coalesced == 2
+    assert rejected
+
+
+def test_websocket_requires_api_key_and_sends_current_state(monkeypatch):
+    monkeypatch.setenv("VALID_API_KEYS", "stream_key")
+    monkeypatch.delenv("SKIP_API_KEY_CHECK_FOR_DEV", raising=False)
+    broadcaster = LiveBroadcaster(collect=None)
+    broadcaster.publish([_room("F2", 24.0), _room("G3", 25.0)])
+    monkeypatch.setattr(stream_routes, "broadcaster", broadcaster)
+
+    app = FastAPI()
+    app.include_router(stream_routes.router)
+    client = TestClient(app)
+
+    with client.websocket_connect("/stream/ws?rooms=G3&api_key=stream_key") as websocket:
+        assert websocket.receive_json() == _room("G3", 25.0)
+    assert broadcaster.subscriber_count == 0
+
+    try:
+        with client.websocket_connect("/stream/ws") as websocket:
+            websocket.receive_json()
+    except Exception as e:
+        assert getattr(e, "code", None) == 1008
+    else:
+        raise AssertionError("Koneksi tanpa API key seharusnya ditolak")
+
+
+def test_sse_subscription_exists_only_while_stream_is_consumed(monkeypatch):
+    broadcaster = LiveBroadcaster(collect=None, max_subscribers=1)
+    broadcaster.publish([_room("F2", 24.0)])
+    monkeypatch.setattr(stream_routes, "broadcaster", broadcaster)
+
+    class DisconnectAfterFirstCheck:
+        def __init__(self):
+            self.checks = 0
+
+        async def is_disconnected(self):
+            self.checks += 1
+            return self.checks > 1
+
+    async def scenario():
+        # Klien terputus sebelum body dikirim: generator tidak pernah diiterasi
+        abandoned = await stream_routes.stream_rooms_sse(DisconnectAfterFirstCheck(), rooms="F2", api_key="k")
+        after_abandoned = broadcaster.subscriber_count
+
+        response = await stream_routes.stream_rooms_sse(DisconnectAfterFirstCheck(), rooms="F2", api_key="k")
+        chunks = [await response.body_iterator.__anext__(), await response.body_iterator.__anext__()]
+        while_streaming = broadcaster.subscriber_count
+        try:
+            await stream_routes.stream_rooms_sse(DisconnectAfterFirstCheck(), rooms=None, api_key="k")
+        except HTTPException as e:
+            rejected = e.status_code
+        else:
+            rejected = None
+        rest = [chunk async for chunk in response.body_iterator]
+        assert abandoned.body_iterator is not None
+        return after_abandoned, chunks + rest, while_streaming, rejected
+
+    after_abandoned, chunks, while_streaming, rejected = asyncio.run(scenario())
+
+    assert after_abandoned == 0
+    assert while_streaming == 1
+    assert rejected == 503
+    assert chunks[0] == "retry: 5000\n\n"
+    assert chunks[1].startswith("event: room\n")
+    assert broadcaster.subscriber_count == 0
@@ -0,0 +1,35 @@
+"""
+Test untuk liveness perangkat berbasis kesegaran data (services/liveness_service.py)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from services.liveness_service import build_snapshot
+from utils.device_registry import Device, DeviceRegistry
+
+NOW = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_configured_devices_are_active_stale_or_missing():
+    configured = DeviceRegistry([
+        Device("2D3032", "F2", "10.6.0.2"),
+        Device("2D303B", "F3", "10.6.0.3"),
+        Device("2D3031", "F4", "10.6.0.4"),
+    ])
+    last_writes = {
+        "2D3032": {"last_write_time": NOW - timedelta(seconds=20), "location": "F2"},
+        "2D303B": {"last_write_time": NOW - timedelta(hours=2), "location": None},
+        "unknown": {"last_write_time": NOW - timedelta(seconds=5), "location": "X1"},
+    }
+
+    snapshot = build_snapshot(last_writes, configured, NOW)
+
+    states = {device["device_id"]: device["state"] for device in snapshot.devices}
+    assert states == {"2D3032": "active", "2D303B": "stale", "2D3031": "missing", "unknown": "active"}
+    assert snapshot.counts == {"active": 2, "stale": 1, "missing": 1}
+
+    by_id = {device["device_id"]: device for device in snapshot.devices}
+    assert by_id["2D303B"]["location"] == "F3"  # Lokasi dari device_list.csv jika tag tidak ada
+    assert by_id["2D303B"]["age_seconds"] == 7200.0
+    assert by_id["unknown"]["configured"] is False and by_id["unknown"]["ip_address"] is None
+    assert by_id["2D3031"]["last_write_time"] is None
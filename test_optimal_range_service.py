@@ -0,0 +1,82 @@
+"""
+Test untuk akumulator waktu di rentang optimal (services/optimal_range_service.py)
+Tidak memerlukan InfluxDB: pembacaan diberikan sebagai DataFrame tiruan.
+"""
+
+import asyncio
+
+import pandas as pd
+
+from services.optimal_range_service import OPTIMAL_RANGE_LOOKBACK_SECONDS, OptimalRangeAccumulator, OptimalRangeTracker
+
+RANGES = {"temperature": (22.0, 26.0), "humidity": (50.0, 70.0)}
+HOUR = 1_800_000_000 // 3600 * 3600  # Awal jam sembarang (epoch detik)
+
+
+def test_durations_are_split_at_hour_boundaries_and_gaps_are_skipped():
+    accumulator = OptimalRangeAccumulator(max_gap_seconds=300)
+    add = lambda offset, value, device="d1": accumulator.add("F2", device, "temperature", HOUR + offset, value,
+                                                            RANGES["temperature"])
+    add(3500, 24.0)   # Di rentang
+    add(3700, 28.0)   # 100 dtk di jam pertama + 100 dtk di jam kedua dikreditkan "di rentang"
+    add(3760, 24.0)   # 60 dtk di luar rentang
+    add(3750, 20.0)   # Lebih lama dari pembacaan terakhir: diabaikan
+    add(4700, 24.0)   # Jeda 940 dtk > max_gap: tidak dihitung
+    add(3500, 27.0, device="d2")
+    add(3600, 27.0, device="d2")  # Perangkat kedua: 100 dtk di luar rentang
+
+    assert accumulator.hours[("F2", "temperature")] == {HOUR: [100.0, 100.0], HOUR + 3600: [100.0, 60.0]}
+    assert accumulator.durations("F2", "temperature", HOUR + 3600, HOUR + 7200) == (100.0, 60.0)
+    assert accumulator.durations("F2", "temperature", HOUR, HOUR + 7200) == (200.0, 160.0)
+    assert accumulator.durations("F2", "humidity", HOUR, HOUR + 7200) is None
+
+    accumulator.prune(HOUR + 3600 + accumulator.retention_hours * 3600)
+    assert list(accumulator.hours[("F2", "temperature")]) == [HOUR + 3600]
+
+
+def _frame(rows):
+    return pd.DataFrame({
+        "_time": pd.to_datetime([HOUR + offset for offset, *_ in rows], unit="s", utc=True),
+        "_value": [value for _, value, _, _ in rows],
+        "_field": [field for _, _, field, _ in rows],
+        "location": [room for _, _, _, room in rows],
+        "device_id": ["d1"] * len(rows),
+    })
+
+
+def test_tracker_processes_only_new_readings_and_persists_counters(tmp_path):
+    batches = [
+        _frame([(0, 24.0, "temperature", "F2"), (0, 80.0, "humidity", "F2"),
+                (60, 25.0, "temperature", "F2"), (60, 60.0, "humidity", "F2")]),
+        # G3 terlambat ditulis: lebih lama dari watermark tetapi masih di dalam jendela mundur
+        _frame([(30, 24.0, "temperature", "G3"), (60, 25.0, "temperature", "F2"), (120, 30.0, "temperature", "F2")]),
+    ]
+    starts = []
+
+    async def loader(start_time):
+        starts.append(start_time)
+        return batches[len(starts) - 1]
+
+    async def ranges_loader():
+        return RANGES
+
+    state_path = str(tmp_path / "optimal_range_state.json")
+    tracker = OptimalRangeTracker(state_path=state_path, loader=loader, ranges_loader=ranges_loader)
+
+    async def scenario():
+        return await tracker.refresh(), await tracker.refresh()
+
+    assert asyncio.run(scenario()) == (4, 3)
+    assert starts[0] == "-24h"
+    # Pembaruan berikutnya mundur dari watermark agar pembacaan yang terlambat ditulis tetap terambil
+    assert starts[1] == pd.Timestamp(HOUR + 60 - OPTIMAL_RANGE_LOOKBACK_SECONDS, unit="s", tz="UTC").isoformat()
+
+    now = HOUR + 600
+    assert tracker.percentages("F2", hours=1, now=now) == {"temperature": 100, "humidity": 0}
+
+    reloaded = OptimalRangeTracker(state_path=state_path, loader=loader, ranges_loader=ranges_loader)
+    assert reloaded.summary("F2", hours=1, now=now)["temperature"] == {
+        "in_range_seconds": 120, "out_of_range_seconds": 0, "percentage": 100
+    }
+    assert reloaded.accumulator.watermark == HOUR + 120
+    assert reloaded.accumulator.last[("G3", "d1", "temperature")] == (HOUR + 30, True)
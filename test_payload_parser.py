@@ -0,0 +1,36 @@
+"""
+Test untuk parser payload logger (utils/payload_parser.py)
+"""
+
+import pytest
+
+from utils.payload_parser import PayloadParseError, parse_payload
+
+
+@pytest.mark.parametrize("raw", [
+    b"46#22.20#2D303D",
+    b"  46#22.20#2D303D\r\n",
+    b"<meta charset='utf-8'><body>46#22.20#2D303D</body>",
+    b"<html><body>\n 46#22.20#2D303D \n</body></html>",
+    bytearray(b"46#22.20#2D303D"),
+])
+def test_plain_and_html_wrapped_payloads(raw):
+    assert parse_payload(raw) == {"humidity": 46.0, "temperature": 22.2, "hex_value": "2D303D"}
+
+
+@pytest.mark.parametrize("raw, reason, field", [
+    (b"", "empty", None),
+    (b"<body>  </body>", "empty", None),
+    (b"46#22.20", "field_count", None),
+    (b"46#22.20#2D#30", "field_count", None),
+    (b"nan#22.20#2D303D", "invalid_number", "humidity"),
+    (b"<body>46#2,5#2D303D</body>", "invalid_number", "temperature"),
+    (b"46#22.20#2D 303D", "invalid_hex", "hex_value"),
+])
+def test_parse_errors_are_structured(raw, reason, field):
+    with pytest.raises(PayloadParseError) as exc:
+        parse_payload(raw)
+    assert exc.value.reason == reason
+    assert exc.value.field == field
+    # Tetap ValueError agar penanganan kesalahan lama tidak berubah
+    assert isinstance(exc.value, ValueError)
@@ -0,0 +1,86 @@
+"""
+Test untuk prakiraan ruangan dari model tersimpan (services/prediction_service.py)
+Tidak memerlukan InfluxDB: model kecil dilatih dari data sintetis dan jendela diberikan sebagai DataFrame tiruan.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+
+from services import prediction_service
+from services.ml_model_trainer import ModelTrainer
+from services.prediction_service import DEFAULT_FEATURE_COLUMNS, RoomForecaster, find_best_model, load_model
+
+
+def _train_and_save(model_dir, model_name="linear_regression"):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(25, 3, size=(200, len(DEFAULT_FEATURE_COLUMNS))), columns=DEFAULT_FEATURE_COLUMNS)
+    # Target sederhana: kondisi 1 jam lagi mendekati kondisi saat ini
+    y = pd.DataFrame({"temp_target": X["temperature"] * 0.9 + 2.0, "humidity_target": X["humidity"] * 0.9 + 5.0})
+    trainer = ModelTrainer(model_storage_path=str(model_dir))
+    trainer.train_model(model_name, X.iloc[:150], y.iloc[:150], X.iloc[150:], y.iloc[150:])
+    return trainer.save_model(model_name)
+
+
+def _window_frame(rooms, end=pd.Timestamp("2026-10-18T08:00:00Z")):
+    times = pd.date_range(end=end, periods=prediction_service.WINDOW_SAMPLES, freq="10min")
+    rows = []
+    for room_id, temperature in rooms.items():
+        for time_value in times:
+            rows.append((time_value, temperature, "temperature", room_id))
+            rows.append((time_value, 55.0, "humidity", room_id))
+    return pd.DataFrame(rows, columns=prediction_service.WINDOW_COLUMNS)
+
+
+def test_best_saved_model_is_selected_by_validation_rmse(tmp_path):
+    first = _train_and_save(tmp_path)
+    second = _train_and_save(tmp_path, "ridge_regression")
+    for path, rmse in ((first, 0.5), (second, 0.9)):
+        metadata_path = path.replace(".joblib", "_metadata.json")
+        with open(metadata_path) as handle:
+            metadata = json.load(handle)
+        metadata["training_history"][-1]["val_metrics"]["rmse"] = rmse
+        with open(metadata_path, "w") as handle:
+            json.dump(metadata, handle)
+
+    assert find_best_model(str(tmp_path)) == first
+    assert load_model(first).feature_names == DEFAULT_FEATURE_COLUMNS
+    assert find_best_model(str(tmp_path / "missing")) is None
+
+
+def test_all_rooms_are_forecast_with_one_batched_predict_per_hour(tmp_path):
+    _train_and_save(tmp_path)
+    starts = []
+
+    async def loader(start_time):
+        starts.append(start_time)
+        return _window_frame({"F2": 24.0, "G3": 28.0}) if len(starts) == 1 else _window_frame({})[:0]
+
+    forecaster = RoomForecaster(model_dir=str(tmp_path), loader=loader)
+    batch_sizes = []
+
+    async def scenario():
+        await forecaster._ensure_model()
+        model = forecaster._model.model
+        original_predict = model.predict
+        model.predict = lambda features: batch_sizes.append(len(features)) or original_predict(features)
+        await forecaster.refresh()
+        first = await forecaster.get_forecast("F2", 3)
+        await forecaster.refresh()
+        return first, await forecaster.get_forecast("G3", 24), await forecaster.get_forecast("F9", 1)
+
+    f2, g3, missing = asyncio.run(scenario())
+
+    assert batch_sizes == [2] * prediction_service.PREDICTION_MAX_HOURS * 2
+    assert starts[0] == prediction_service.WINDOW_BACKFILL
+    assert starts[1] == "2026-10-18T08:00:00+00:00"  # Pembaruan berikutnya hanya memuat jendela terakhir
+    assert [p["hoursAhead"] for p in f2["predictions"]] == [1, 2, 3]
+    assert f2["currentConditions"]["temperature"] == 24.0
+    # 24 * 0.9 + 2 = 23.6 untuk jam pertama
+    assert abs(f2["predictions"][0]["temperature"] - 23.6) < 0.3
+    assert len(g3["predictions"]) == 24
+    assert g3["predictions"][0]["temperature"] > f2["predictions"][0]["temperature"]
+    assert f2["model"]["name"] == "linear_regression"
+    assert missing is None
@@ -0,0 +1,115 @@
+"""
+Test untuk gateway query asinkron InfluxDB (services/query_gateway.py)
+Tidak memerlukan InfluxDB yang berjalan: query API diganti dengan objek tiruan.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from services import query_gateway
+
+
+class SlowQueryApi:
+    """Query API tiruan yang memblokir thread selama `delay` detik"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def query(self, query):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return [query]
+
+
+def test_query_does_not_block_event_loop():
+    fake_api = SlowQueryApi(delay=0.2)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        result, _ = await asyncio.gather(query_gateway.query("q1"), ticker())
+        return result, ticks
+
+    with patch.object(query_gateway, "_get_query_api", return_value=fake_api):
+        result, ticks = asyncio.run(scenario())
+
+    assert result == ["q1"]
+    # Event loop tetap berjalan selama query blocking dieksekusi di thread pool
+    assert ticks == 10
+
+
+def test_query_respects_concurrency_cap():
+    fake_api = SlowQueryApi(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[query_gateway.query(f"q{i}") for i in range(12)])
+
+    with patch.object(query_gateway, "_get_query_api", return_value=fake_api), \
+         patch.object(query_gateway, "QUERY_MAX_CONCURRENCY", 3):
+        query_gateway.shutdown_gateway()
+        results = asyncio.run(scenario())
+        query_gateway.shutdown_gateway()
+
+    assert len(results) == 12
+    assert fake_api.max_in_flight <= 3
+
+
+def test_query_timeout_raises_504():
+    fake_api = SlowQueryApi(delay=0.5)
+
+    with patch.object(query_gateway, "_get_query_api", return_value=fake_api):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(query_gateway.query("lambat", timeout=0.05))
+
+    assert exc_info.value.status_code == 504
+
+
+def test_query_stream_reads_batches_on_demand_and_closes_stream():
+    produced = []
+    closed = []
+
+    def records():
+        try:
+            for i in range(7):
+                produced.append(i)
+                yield i
+        finally:
+            closed.append(True)
+
+    class StreamingQueryApi:
+        def query_stream(self, query):
+            return records()
+
+    async def scenario():
+        batches = await query_gateway.query_stream("q", batch_size=3)
+        first = await batches.__anext__()
+        # Hanya batch yang diminta yang dibaca dari InfluxDB
+        read_after_first = len(produced)
+        rest = [batch async for batch in batches]
+        return first, read_after_first, rest
+
+    with patch.object(query_gateway, "_get_query_api", return_value=StreamingQueryApi()):
+        first, read_after_first, rest = asyncio.run(scenario())
+
+    assert first == [0, 1, 2]
+    assert read_after_first == 3
+    assert rest == [[3, 4, 5], [6]]
+    assert closed == [True]
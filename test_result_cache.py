@@ -0,0 +1,90 @@
+"""
+Test untuk cache TTL + single-flight (services/result_cache.py)
+Tidak memerlukan InfluxDB: loader diganti dengan coroutine tiruan.
+"""
+
+import asyncio
+
+import pytest
+
+from services.result_cache import AsyncResultCache, cached
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_identical_requests_trigger_one_load():
+    cache = AsyncResultCache("test", ttl_seconds=10, clock=FakeClock())
+    calls = 0
+
+    @cached(cache)
+    async def load_stats():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"avg_temperature": 22.5}
+
+    async def scenario():
+        return await asyncio.gather(*[load_stats() for _ in range(20)])
+
+    results = asyncio.run(scenario())
+
+    assert calls == 1
+    assert all(r == {"avg_temperature": 22.5} for r in results)
+    assert cache.misses == 1
+    assert cache.coalesced == 19
+
+
+def test_entry_expires_at_next_time_bucket():
+    clock = FakeClock(now=1000.0)
+    cache = AsyncResultCache("test", ttl_seconds=10, clock=clock)
+    calls = 0
+
+    @cached(cache)
+    async def load_stats():
+        nonlocal calls
+        calls += 1
+        return {"value": calls}
+
+    async def scenario():
+        first = await load_stats()
+        clock.now = 1009.0
+        same_bucket = await load_stats()
+        clock.now = 1010.0
+        next_bucket = await load_stats()
+        return first, same_bucket, next_bucket
+
+    first, same_bucket, next_bucket = asyncio.run(scenario())
+
+    assert first == same_bucket == {"value": 1}
+    assert next_bucket == {"value": 2}
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_errors_are_shared_but_not_cached():
+    cache = AsyncResultCache("test", ttl_seconds=10, clock=FakeClock())
+    calls = 0
+
+    @cached(cache)
+    async def failing_load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("InfluxDB down")
+
+    async def scenario():
+        return await asyncio.gather(*[failing_load() for _ in range(5)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+
+    with pytest.raises(ValueError):
+        asyncio.run(failing_load())
+    assert calls == 2
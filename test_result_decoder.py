@@ -0,0 +1,66 @@
+"""
+Test untuk decoder kolumnar annotated CSV (services/result_decoder.py)
+Tidak memerlukan InfluxDB: respons query_raw diganti dengan CSV contoh.
+"""
+
+import numpy as np
+import pytest
+from influxdb_client.client.exceptions import InfluxDBError
+
+from services.result_decoder import _iter_blocks, decode_annotated_csv, to_series_matrix
+
+# Dua yield dengan skema berbeda (seri per lokasi dan seri gabungan tanpa tag location)
+SAMPLE = (
+    "#datatype,string,long,dateTime:RFC3339,double,string,string\r\n"
+    "#group,false,false,false,false,true,true\r\n"
+    "#default,location_raw,,,,,\r\n"
+    ",result,table,_time,_value,_field,location\r\n"
+    ",,0,2024-03-01T01:00:00Z,21.5,temperature,F2\r\n"
+    ",,0,2024-03-01T00:00:00Z,21.0,temperature,F2\r\n"
+    ",,0,2024-03-01T02:00:00Z,,temperature,F2\r\n"
+    ",,1,2024-03-01T00:00:00Z,55,humidity,F3\r\n"
+    "\r\n"
+    "#datatype,string,long,dateTime:RFC3339,double,string\r\n"
+    "#group,false,false,false,false,true\r\n"
+    "#default,all_raw,,,,\r\n"
+    ",result,table,_time,_value,_field\r\n"
+    ",,2,2024-03-01T00:00:00.5Z,22.25,temperature\r\n"
+    "\r\n"
+)
+
+
+def test_tables_with_different_schemas_are_decoded_into_typed_columns():
+    frame = decode_annotated_csv(SAMPLE.encode("utf-8"))
+
+    assert list(frame["result"]) == ["location_raw"] * 4 + ["all_raw"]
+    assert frame["_value"].dtype == np.float64
+    assert str(frame["_time"].dt.tz) == "UTC"
+    assert frame["location"].isna().tolist() == [False] * 4 + [True]
+    assert np.isnan(frame["_value"].iloc[2])
+
+    # Respons yang datang terpotong-potong menghasilkan blok yang sama
+    data = SAMPLE.encode("utf-8")
+    assert list(_iter_blocks(data[i:i + 7] for i in range(0, len(data), 7))) == list(_iter_blocks([data]))
+
+
+def test_series_matrix_is_sorted_per_series_and_padded():
+    frame = decode_annotated_csv(SAMPLE, columns=["_time", "_value", "_field", "location"])
+    matrix = to_series_matrix(frame, ["location", "_field"])
+
+    assert matrix.keys == [("F2", "temperature"), ("F3", "humidity")]
+    assert matrix.counts.tolist() == [2, 1]
+    assert matrix.values[0].tolist() == [21.0, 21.5]
+    assert np.isnan(matrix.values[1, 1]) and np.isnat(matrix.times[1, 1])
+    assert matrix.times[0, 0] == np.datetime64("2024-03-01T00:00:00")
+
+
+def test_empty_and_error_responses():
+    assert decode_annotated_csv("\r\n", columns=["_time", "_value"]).columns.tolist() == ["_time", "_value"]
+
+    error = (
+        "#datatype,string,string\r\n#group,true,true\r\n#default,,\r\n"
+        ",error,reference\r\n,\"type error: missing argument\",897\r\n"
+    )
+    with pytest.raises(InfluxDBError) as exc:
+        decode_annotated_csv(error)
+    assert exc.value.message == "type error: missing argument"
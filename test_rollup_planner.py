@@ -0,0 +1,121 @@
+"""
+Test untuk planner query rollup (services/rollup_service.py)
+Tidak memerlukan InfluxDB: cakupan rollup diisi langsung dan waktu "sekarang" ditetapkan.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from services import rollup_service
+from services.rollup_service import build_aggregated_query, plan_aggregate_query
+
+NOW = datetime(2024, 3, 31, 12, 0, tzinfo=timezone.utc)
+FULL_COVERAGE = {tier.name: datetime(2024, 1, 1, tzinfo=timezone.utc) for tier in rollup_service.ROLLUP_TIERS}
+
+
+def test_month_of_daily_means_uses_daily_rollup_with_raw_tail():
+    start = NOW - timedelta(days=30)
+    with patch.dict(rollup_service._coverage, FULL_COVERAGE, clear=True):
+        plan = plan_aggregate_query(start, NOW, "1d", now=NOW)
+        query = build_aggregated_query("temperature", "", start, NOW, "1d", now=NOW)
+
+    assert plan.tier.name == "1d"
+    assert plan.rollup_start == datetime(2024, 3, 2, tzinfo=timezone.utc)
+    assert plan.boundary == datetime(2024, 3, 31, tzinfo=timezone.utc)
+    rollup_part, head_part, tail_part = query.split("|> yield(")[:3]
+    assert f'from(bucket: "{rollup_service.INFLUXDB_BUCKET}_1d")' in rollup_part
+    assert 'range(start: 2024-03-02T00:00:00Z, stop: 2024-03-31T00:00:00Z)' in rollup_part
+    assert 'r["agg"] == "mean"' in rollup_part
+    # Mean harian dari rollup dibobot jumlah titik mentah, bukan rata-rata dari rata-rata
+    assert 'columnKey: ["agg"]' in rollup_part
+    assert "_total: accumulator._total + r.mean * r.count" in rollup_part
+    assert "fn: mean" not in rollup_part
+    # Hari pertama yang terpotong `start` dan hari yang belum difinalkan task dibaca dari data mentah
+    assert f'from(bucket: "{rollup_service.INFLUXDB_BUCKET}")' in head_part
+    assert 'range(start: 2024-03-01T12:00:00Z, stop: 2024-03-02T00:00:00Z)' in head_part
+    assert 'range(start: 2024-03-31T00:00:00Z, stop: 2024-03-31T12:00:00Z)' in tail_part
+    # Data mentah hanya dibaca untuk jendela yang belum difinalkan task
+    assert 'range(start: 2024-03-31T00:00:00Z, stop: 2024-03-31T12:00:00Z)' in query
+
+
+def test_planner_picks_coarsest_tier_that_is_finalized_and_fits_window():
+    just_after_midnight = datetime(2024, 3, 31, 0, 5, tzinfo=timezone.utc)
+    with patch.dict(rollup_service._coverage, FULL_COVERAGE, clear=True):
+        # Task 1d belum berjalan (offset 10 menit), sehingga jatuh ke rollup 1h
+        daily = plan_aggregate_query(just_after_midnight - timedelta(days=7), just_after_midnight, "1d",
+                                     now=just_after_midnight)
+        # Jendela 1 jam tidak bisa dijawab rollup 1d
+        hourly = plan_aggregate_query(NOW - timedelta(hours=24), NOW, "1h", now=NOW)
+        # Count digabung dengan sum dari count per rollup
+        count_query = build_aggregated_query("humidity", "", NOW - timedelta(days=7), NOW, "1d", fn="count", now=NOW)
+
+    assert daily.tier.name == "1h"
+    assert daily.rollup_start == datetime(2024, 3, 25, tzinfo=timezone.utc)
+    assert daily.boundary == datetime(2024, 3, 31, tzinfo=timezone.utc)
+    assert hourly.tier.name == "1h"
+    # Awal yang sudah selaras tidak memerlukan bagian mentah di depan
+    assert hourly.rollup_start == hourly.start
+    assert hourly.boundary == datetime(2024, 3, 31, 11, 0, tzinfo=timezone.utc)
+    assert 'r["agg"] == "count"' in count_query
+    assert "fn: sum" in count_query
+
+
+def test_unaligned_start_reads_first_partial_window_from_raw_data():
+    # Seperti trend_service: now - 24h dengan now di tengah jam
+    now = NOW + timedelta(minutes=25)
+    start = now - timedelta(hours=24)
+    with patch.dict(rollup_service._coverage, FULL_COVERAGE, clear=True):
+        plan = plan_aggregate_query(start, now, "1h", now=now)
+        query = build_aggregated_query("temperature", "", start, now, "1h", now=now)
+        # Rentang lebih pendek dari satu jendela utuh tidak dapat memakai rollup
+        short = plan_aggregate_query(now - timedelta(minutes=50), now, "1h", now=now)
+
+    assert plan.tier.name == "1h"
+    assert plan.rollup_start == datetime(2024, 3, 30, 13, 0, tzinfo=timezone.utc)
+    assert 'range(start: 2024-03-30T13:00:00Z, stop: 2024-03-31T12:00:00Z)' in query
+    # Jam pertama (12:25-13:00) tidak hilang: dibaca dari data mentah dengan nama yield tersendiri
+    assert 'range(start: 2024-03-30T12:25:00Z, stop: 2024-03-30T13:00:00Z)' in query
+    assert 'yield(name: "head")' in query
+    assert short.tier is None
+
+
+def test_planner_falls_back_to_raw_data():
+    start = NOW - timedelta(days=30)
+    late_coverage = {name: NOW - timedelta(days=3) for name in FULL_COVERAGE}
+    with patch.dict(rollup_service._coverage, {}, clear=True):
+        no_rollups = plan_aggregate_query(start, NOW, "1d", now=NOW)
+    with patch.dict(rollup_service._coverage, late_coverage, clear=True):
+        not_covered = plan_aggregate_query(start, NOW, "1d", now=NOW)
+    with patch.dict(rollup_service._coverage, FULL_COVERAGE, clear=True):
+        unsupported_fn = plan_aggregate_query(start, NOW, "1d", fn="median", now=NOW)
+        query = build_aggregated_query("temperature", "", start, NOW, "1d", fn="median", now=NOW)
+
+    assert no_rollups.tier is None
+    assert not_covered.tier is None
+    assert unsupported_fn.tier is None
+    assert f'from(bucket: "{rollup_service.INFLUXDB_BUCKET}")' in query
+    assert "aggregateWindow(every: 1d, fn: median, createEmpty: false)" in query
+
+
+def test_coverage_is_reloaded_and_failed_tiers_are_retried():
+    coverage = {"1m": NOW - timedelta(days=2), "1h": None, "1d": None}
+    setup = AsyncMock(side_effect=[None, RuntimeError("InfluxDB tidak dapat dihubungi"), None, None])
+
+    async def load_coverage(tier):
+        return coverage[tier.name]
+
+    with patch.dict(rollup_service._coverage, {}, clear=True), \
+            patch.object(rollup_service, "_provisioned", set()), \
+            patch.object(rollup_service, "_setup_tier", setup), \
+            patch.object(rollup_service, "_load_coverage", load_coverage):
+        first = asyncio.run(rollup_service.ensure_rollup_tasks())
+        # Task 1d baru berjalan pertama kali setelah startup
+        coverage["1d"] = NOW - timedelta(hours=12)
+        second = asyncio.run(rollup_service.ensure_rollup_tasks())
+
+    assert first["tiers"]["1m"]["coverage_start"] is not None
+    assert first["tiers"]["1d"]["coverage_start"] is None
+    assert second["tiers"]["1d"]["coverage_start"] == (NOW - timedelta(hours=12)).isoformat()
+    # 1m tidak disiapkan ulang; 1h yang gagal dicoba lagi
+    assert [call.args[0].name for call in setup.call_args_list] == ["1m", "1h", "1d", "1h"]
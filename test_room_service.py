@@ -0,0 +1,72 @@
+"""
+Test untuk data ruangan dari InfluxDB (services/room_service.py)
+Tidak memerlukan InfluxDB: query gateway diganti dengan DataFrame tiruan.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from services import room_service
+
+
+def _snapshot_frame():
+    last_time = datetime(2026, 10, 18, 8, 0, tzinfo=timezone.utc)
+    return pd.DataFrame({
+        "location": ["F2", "F2", "G3"],
+        "_field": ["temperature", "humidity", "temperature"],
+        "count": [4.0, 4.0, 2.0],
+        "sum": [98.0, 220.0, 55.0],
+        "in_range": [3.0, 4.0, 0.0],
+        "last": [25.04, 58.0, 27.5],
+        "last_time": [last_time, last_time, last_time],
+    })
+
+
+def _patch_query(monkeypatch, frame):
+    calls = []
+
+    async def fake_query_columns(flux_query, description="", timeout=None, columns=None):
+        calls.append(flux_query)
+        return frame
+
+    room_service.room_snapshot_cache.invalidate()
+    monkeypatch.setattr(room_service.query_gateway, "query_columns", fake_query_columns)
+    return calls
+
+
+def test_all_rooms_are_served_from_one_grouped_query(monkeypatch):
+    calls = _patch_query(monkeypatch, _snapshot_frame())
+
+    async def scenario():
+        return await asyncio.gather(*(room_service.get_room_details(room_id) for room_id in ("F2", "G3", "F4")))
+
+    f2, g3, f4 = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert 'group(columns: ["location", "_field"])' in calls[0]
+    assert f2["currentConditions"] == {"temperature": 25.0, "humidity": 58.0,
+                                       "lastUpdated": "2026-10-18T08:00:00+00:00"}
+    assert f2["statistics"]["dailyAvg"] == {"temperature": 24.5, "humidity": 55.0}
+    assert f2["statistics"]["timeInOptimalRange"] == {"temperature": 75, "humidity": 100}
+    assert g3["currentConditions"]["humidity"] is None
+    assert g3["statistics"]["timeInOptimalRange"]["temperature"] == 0
+    # Ruangan tanpa data sensor tetap dilaporkan dengan nilai kosong
+    assert f4["currentConditions"]["temperature"] is None
+    assert len(f2["devices"]) == 3
+
+
+def test_unknown_room_returns_none_and_query_failure_returns_metadata(monkeypatch):
+    _patch_query(monkeypatch, _snapshot_frame())
+    assert asyncio.run(room_service.get_room_details("Z9")) is None
+
+    async def failing_query_columns(*args, **kwargs):
+        raise RuntimeError("InfluxDB tidak tersedia")
+
+    room_service.room_snapshot_cache.invalidate()
+    monkeypatch.setattr(room_service.query_gateway, "query_columns", failing_query_columns)
+
+    room = asyncio.run(room_service.get_room_details("F2"))
+
+    assert room == {"id": "F2", "name": "Ruang F2", "floor": "F", "area": 25}
@@ -0,0 +1,51 @@
+"""
+Test untuk store snapshot kondisi ruangan (services/room_state_store.py)
+"""
+
+import asyncio
+
+from services.room_state_store import RoomStateStore
+
+
+def _room(room_id, temperature, daily_avg):
+    return {"id": room_id, "name": f"Ruang {room_id}", "floor": room_id[0], "area": 30,
+            "currentConditions": {"temperature": temperature, "humidity": 50.0},
+            "statistics": {"dailyAvg": {"temperature": daily_avg, "humidity": 50.0}},
+            "devices": []}
+
+
+def test_rooms_are_served_from_snapshot_and_failed_rooms_keep_last_state():
+    calls = []
+    failing = set()
+
+    async def loader(room_ids):
+        calls.append(list(room_ids))
+        return {room_id: _room(room_id, 25.0 + len(calls), 25.0) for room_id in room_ids if room_id not in failing}
+
+    store = RoomStateStore(room_ids=["F2", "F3"], loader=loader)
+
+    async def scenario():
+        first = await store.get_rooms()
+        again = await store.get_rooms(["F3"])
+        failing.add("F2")
+        await store.refresh()
+        return first, again, await store.get_rooms()
+
+    first, again, after_failure = asyncio.run(scenario())
+
+    assert calls == [["F2", "F3"], ["F2", "F3"]]  # Pembacaan kedua tidak memuat ulang
+    assert first[0]["currentConditions"]["trend"] == "increasing"
+    assert first[0]["currentConditions"]["data_source"] == "room_store"
+    assert again[0]["id"] == "F3"
+    assert after_failure[0]["currentConditions"]["temperature"] == 26.0  # F2 memakai kondisi sebelumnya
+    assert after_failure[1]["currentConditions"]["temperature"] == 27.0
+
+
+def test_room_without_any_data_uses_fallback():
+    async def loader(room_ids):
+        raise ConnectionError("influx down")
+
+    rooms = asyncio.run(RoomStateStore(room_ids=["G2"], loader=loader).get_rooms())
+
+    assert rooms[0]["id"] == "G2"
+    assert rooms[0]["currentConditions"]["data_source"] == "fallback"
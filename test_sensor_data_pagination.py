@@ -0,0 +1,99 @@
+"""
+Test untuk pagination keyset data sensor (services/data_service.get_sensor_data_page)
+Tidak memerlukan InfluxDB: query gateway diganti dengan data tiruan yang menghormati
+range() dan limit() per seri dari query Flux.
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from services import data_service
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+END = START + timedelta(minutes=10)
+
+
+def _dataset():
+    rows = []
+    for device in ("dev003", "dev001", "dev002"):
+        for i in range(10):
+            # Semua perangkat mencatat pada timestamp yang sama (nanodetik) -> urutan ditentukan kunci seri
+            rows.append({"result": "_result", "table": 0,
+                         "_time": pd.Timestamp(START) + pd.Timedelta(seconds=10 * i, nanoseconds=7),
+                         "device_id": device, "location": "F2", "temperature": 20.0 + i})
+    return pd.DataFrame(rows)
+
+
+def _fake_query_columns(dataset, queries):
+    async def query_columns(flux_query, description="", timeout=None, columns=None):
+        queries.append(flux_query)
+        start, stop = re.search(r"range\(start: ([^,]+), stop: ([^)]+)\)", flux_query).groups()
+        limit = int(re.search(r"limit\(n: (\d+)\)", flux_query).group(1))
+        selected = dataset[(dataset["_time"] >= pd.Timestamp(start)) & (dataset["_time"] < pd.Timestamp(stop))]
+        return selected.groupby("device_id", sort=False).head(limit).reset_index(drop=True)
+    return query_columns
+
+
+def _page(cursor=None, page_size=4):
+    return data_service.get_sensor_data_page(
+        START, END, None, None, None, page_size, "sensor_reading", None, None, cursor
+    )
+
+
+def test_paging_returns_every_row_once_in_time_then_series_order():
+    dataset = _dataset()
+    queries = []
+    rows, cursor, pages = [], None, 0
+
+    with patch.object(data_service.query_gateway, "query_columns", new=_fake_query_columns(dataset, queries)):
+        while True:
+            page, cursor = asyncio.run(_page(cursor))
+            rows.extend(page)
+            pages += 1
+            if cursor is None:
+                break
+
+    expected = dataset.sort_values(["_time", "device_id"])
+    assert [(r["_time"], r["device_id"]) for r in rows] == list(zip(expected["_time"], expected["device_id"]))
+    assert pages == 8
+    # Setiap halaman membaca paling banyak page_size + 1 baris per seri dari posisi cursor
+    assert all("limit(n: 5)" in q for q in queries)
+    assert "2024-03-01T00:00:10.000000007Z" in queries[1]
+    assert all(f"stop: {END.isoformat()}" in q for q in queries)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_page("bukan-cursor"))
+    assert exc.value.status_code == 400
+
+
+def test_csv_export_rewrites_header_when_columns_change():
+    class Record:
+        def __init__(self, **values):
+            self.values = {"result": "_result", "table": 0, **values}
+
+    async def batches():
+        yield [Record(_time=START, device_id="dev001", temperature=22.5)]
+        yield [Record(_time=START, device_id="dev001", temperature=23.0),
+               Record(_time=END, device_id="dev002", humidity=55.0)]
+
+    async def collect():
+        return "".join([chunk async for chunk in data_service._encode_csv(batches())])
+
+    lines = asyncio.run(collect()).splitlines()
+
+    assert lines == [
+        "_time,device_id,temperature",
+        "2024-03-01T00:00:00+00:00,dev001,22.5",
+        "2024-03-01T00:00:00+00:00,dev001,23.0",
+        "",
+        "_time,device_id,temperature,humidity",
+        "2024-03-01T00:10:00+00:00,dev002,,55.0",
+    ]
@@ -0,0 +1,71 @@
+"""
+Test untuk bundel statistik 1 jam terakhir (services/stats_service.get_stats_bundle_last_hour)
+Tidak memerlukan InfluxDB: hasil query gateway diganti dengan tabel tiruan.
+"""
+
+import asyncio
+import statistics
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services import stats_service
+from services.result_cache import stats_cache
+
+
+def _partial(location, field, values, last_time):
+    record = MagicMock()
+    record.values = {
+        "location": location,
+        "_field": field,
+        "count": float(len(values)),
+        "sum": float(sum(values)),
+        "sum_sq": float(sum(v * v for v in values)),
+        "min": min(values),
+        "max": max(values),
+        "last": values[-1],
+        "last_time": last_time,
+    }
+    table = MagicMock()
+    table.records = [record]
+    return table
+
+
+def test_bundle_merges_location_partials_in_one_query():
+    t1 = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+    t2 = datetime(2024, 1, 1, 10, 5, tzinfo=timezone.utc)
+    f2_temp = [21.0, 22.0, 23.0]
+    f3_temp = [24.0, 25.0]
+    tables = [
+        _partial("F2", "temperature", f2_temp, t1),
+        _partial("F3", "temperature", f3_temp, t2),
+        _partial("F2", "humidity", [50.0, 52.0], t1),
+    ]
+
+    stats_cache.invalidate()
+    with patch.object(stats_service.query_gateway, "query", new=AsyncMock(return_value=tables)) as mock_query:
+        bundle = asyncio.run(stats_service.get_stats_bundle_last_hour())
+
+    assert mock_query.await_count == 1
+    all_temp = f2_temp + f3_temp
+    assert bundle["temperature"]["count"] == 5
+    assert bundle["temperature"]["mean"] == round(statistics.mean(all_temp), 1)
+    assert bundle["temperature"]["stddev"] == round(statistics.stdev(all_temp), 2)
+    assert bundle["temperature"]["min"] == 21.0
+    assert bundle["temperature"]["max"] == 25.0
+    # Nilai terakhir diambil dari lokasi dengan timestamp paling baru
+    assert bundle["temperature"]["last"] == 25.0
+    assert bundle["humidity"]["mean"] == 51
+    assert set(bundle["locations"]) == {"F2", "F3"}
+    assert bundle["locations"]["F3"]["temperature"]["count"] == 2
+    stats_cache.invalidate()
+
+
+def test_bundle_without_data_returns_empty_stats():
+    stats_cache.invalidate()
+    with patch.object(stats_service.query_gateway, "query", new=AsyncMock(return_value=[])):
+        bundle = asyncio.run(stats_service.get_stats_bundle_last_hour())
+
+    assert bundle["temperature"]["count"] == 0
+    assert bundle["temperature"]["mean"] is None
+    assert bundle["locations"] == {}
+    stats_cache.invalidate()
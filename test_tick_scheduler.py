@@ -0,0 +1,77 @@
+"""
+Test untuk penjadwal tick tanpa drift (utils/tick_scheduler.py)
+Memakai jam tiruan: sleep memajukan waktu tanpa benar-benar menunggu.
+"""
+
+import asyncio
+
+from utils.tick_scheduler import TickScheduler, spread_offsets
+
+
+class FakeClock:
+    """Jam monotonic dan jam dinding tiruan yang bergerak bersama"""
+
+    def __init__(self, wall_start, oversleep=0.0):
+        self.monotonic = 1000.0
+        self.wall_offset = wall_start - self.monotonic
+        self.oversleep = oversleep
+
+    def wall(self):
+        return self.monotonic + self.wall_offset
+
+    def advance(self, seconds):
+        self.monotonic += seconds
+
+    async def sleep(self, seconds):
+        # Event loop nyata sering bangun sedikit terlambat
+        self.advance(seconds + self.oversleep)
+
+
+def _scheduler(clock, interval=10):
+    return TickScheduler(interval, clock=lambda: clock.monotonic, wall_clock=clock.wall, sleep=clock.sleep)
+
+
+def test_ticks_align_to_interval_boundaries_without_drift():
+    clock = FakeClock(wall_start=1_700_000_003.7, oversleep=0.002)
+    scheduler = _scheduler(clock)
+
+    async def scenario():
+        ticks = []
+        for _ in range(5):
+            tick = await scheduler.wait_next_tick()
+            ticks.append(tick)
+            clock.advance(4.5)  # Durasi siklus polling tidak menggeser tick berikutnya
+        return ticks
+
+    ticks = asyncio.run(scenario())
+
+    assert [t.wall_time for t in ticks] == [1_700_000_010.0 + 10 * i for i in range(5)]
+    assert all(abs(t.lateness - 0.002) < 1e-6 for t in ticks)
+    stats = scheduler.stats()
+    assert stats["ticks"] == 5 and stats["skipped_ticks"] == 0
+    assert stats["max_lateness_ms"] == 2.0
+
+
+def test_overrunning_cycle_skips_missed_ticks_instead_of_bursting():
+    clock = FakeClock(wall_start=1_700_000_000.0)
+    scheduler = _scheduler(clock)
+
+    async def scenario():
+        first = await scheduler.wait_next_tick()
+        clock.advance(23.0)  # Siklus macet melewati dua tick berikutnya
+        second = await scheduler.wait_next_tick()
+        third = await scheduler.wait_next_tick()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert second.skipped == 1
+    assert second.wall_time == first.wall_time + 20
+    assert abs(second.lateness - 3.0) < 1e-9
+    assert third.wall_time == first.wall_time + 30 and third.lateness == 0.0
+    assert scheduler.stats()["skipped_ticks"] == 1
+
+
+def test_spread_offsets():
+    assert spread_offsets(4, 2.0) == [0.0, 0.5, 1.0, 1.5]
+    assert spread_offsets(0, 2.0) == []
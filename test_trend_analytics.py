@@ -0,0 +1,39 @@
+"""
+Test untuk analitik tren tervektorisasi (services/trend_analytics.py)
+Hasil dibandingkan dengan implementasi lama per seri dari benchmark_trend_analytics.py.
+"""
+
+import numpy as np
+
+from benchmark_trend_analytics import _results_match, generate_series, legacy_calculate_trend_analysis
+from services.trend_analytics import analyze_trend, analyze_trends, analyze_trends_by_key, to_padded_matrix
+
+
+def test_batch_matches_legacy_per_series_analysis():
+    series = generate_series(rooms=6, points=48, seed=7)
+    # Panjang seri berbeda (ruangan dengan data terputus) diisi NaN di akhir matriks
+    series[2] = series[2][:10]
+    series[4] = series[4][:3]
+
+    for period in ("hourly", "daily"):
+        batch = analyze_trends(to_padded_matrix(series), period)
+        for values, result in zip(series, batch):
+            assert _results_match(legacy_calculate_trend_analysis(values, period), result)
+
+
+def test_anomalies_and_statistics_of_single_series():
+    values = [22.0, 22.1, 21.9, 22.0, 30.0, 22.1, 21.9, 22.0, 22.1, 21.9]
+    result = analyze_trend(values, "hourly")
+
+    assert [a["index"] for a in result["anomalies"]] == [4]
+    assert result["statistics"]["median"] == float(np.median(values))
+    assert result["statistics"]["max"] == 30.0
+    assert len(result["moving_averages"]) == len(values) - 2
+
+
+def test_rooms_with_insufficient_data_are_reported_per_room():
+    results = analyze_trends_by_key({"F2": [22.0, 22.5, 23.0], "F3": [21.0], "F4": []}, "daily")
+
+    assert results["F2"]["trend_direction"] == "increasing"
+    assert results["F3"]["trend_direction"] == "insufficient_data"
+    assert results["F4"]["trend_direction"] == "insufficient_data"
@@ -0,0 +1,281 @@
+"""
+Registry perangkat logger dari device_list.csv
+Satu sumber daftar perangkat untuk kedua jalur ingest: poller Python (acquire_device_data.py)
+dan Telegraf. CSV dibaca sekali menjadi struktur bertipe yang terindeks (ID logger, IP, lokasi),
+dan bagian [[inputs.http]] telegraf.conf dibangkitkan dari registry yang sama sehingga
+konfigurasi per perangkat tidak perlu disalin manual.
+
+Penggunaan (membangkitkan ulang bagian input Telegraf):
+    python -m utils.device_registry telegraf --write telegraf.conf
+"""
+
+import argparse
+import csv
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEVICE_LIST_PATH = os.getenv(
+    "DEVICE_LIST_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "device_list.csv")
+)
+DEVICE_LIST_CHECK_SECONDS = float(os.getenv("DEVICE_LIST_CHECK_SECONDS", "5"))  # Jarak minimum pemeriksaan perubahan file
+REQUIRED_COLUMNS = ("IP ADDRESS", "ID LOGGER", "LOKASI")
+
+TELEGRAF_MEASUREMENT = "sensor_reading"
+TELEGRAF_GROK_PATTERN = (
+    "(?:%{GREEDYDATA}<body>)?%{NUMBER:humidity:float}#%{NUMBER:temperature:float}"
+    "#%{NOTSPACE:hex_id_from_data:string}(?:</body>%{GREEDYDATA})?"
+)
+TELEGRAF_BEGIN_MARKER = "# --- BEGIN device_list.csv (dibangkitkan oleh utils/device_registry.py, jangan diedit manual) ---"
+TELEGRAF_END_MARKER = "# --- END device_list.csv ---"
+
+
+class Device(NamedTuple):
+    """
+    Satu perangkat logger dari device_list.csv
+    """
+    id_logger: str
+    location: str
+    ip_address: str
+    mac_address: str = ""
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.ip_address}/"
+
+    def to_poller_dict(self) -> Dict[str, str]:
+        """
+        Bentuk dictionary yang dipakai poller acquire_device_data.py
+        """
+        return {"id_logger": self.id_logger, "lokasi": self.location,
+                "ip_address": self.ip_address, "url": self.url}
+
+
+class DeviceRegistry:
+    """
+    Daftar perangkat immutable dengan indeks berdasarkan ID logger, IP, dan lokasi
+
+    Args:
+        devices: Perangkat dalam urutan CSV
+        source: Asal data (path CSV) untuk keperluan log
+    """
+
+    def __init__(self, devices: List[Device], source: str = ""):
+        self.source = source
+        self.devices: Tuple[Device, ...] = tuple(devices)
+        self._by_id = {device.id_logger: device for device in self.devices}
+        self._by_ip = {device.ip_address: device for device in self.devices}
+        self._by_location: Dict[str, List[Device]] = {}
+        for device in self.devices:
+            self._by_location.setdefault(device.location, []).append(device)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def __iter__(self) -> Iterator[Device]:
+        return iter(self.devices)
+
+    def get_by_id(self, id_logger: str) -> Optional[Device]:
+        return self._by_id.get(id_logger)
+
+    def get_by_ip(self, ip_address: str) -> Optional[Device]:
+        return self._by_ip.get(ip_address)
+
+    def at_location(self, location: str) -> List[Device]:
+        return list(self._by_location.get(location, []))
+
+    def ip_addresses(self) -> List[str]:
+        return [device.ip_address for device in self.devices]
+
+    def locations(self) -> List[str]:
+        return list(self._by_location)
+
+    def poller_devices(self) -> List[Dict[str, str]]:
+        """
+        Daftar perangkat dalam bentuk yang dipakai poller acquire_device_data.py
+        """
+        return [device.to_poller_dict() for device in self.devices]
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> "DeviceRegistry":
+        """
+        Membaca device_list.csv
+
+        Baris tanpa IP, ID logger, atau lokasi dilewati, begitu pula baris dengan ID logger
+        atau IP yang sudah dipakai baris sebelumnya (dengan warning).
+
+        Args:
+            csv_path: Path file CSV
+
+        Returns:
+            DeviceRegistry: Registry perangkat (kosong jika file tidak ada atau tidak valid)
+        """
+        devices: List[Device] = []
+        seen_ids, seen_ips = set(), set()
+        try:
+            with open(csv_path, mode="r", encoding="utf-8", newline="") as csvfile:
+                reader = csv.DictReader(csvfile)
+                fieldnames = reader.fieldnames or []
+                missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+                if missing:
+                    logger.error(f"File CSV '{csv_path}' kekurangan kolom yang dibutuhkan: {', '.join(missing)}. "
+                                 f"Kolom yang terdeteksi: {', '.join(fieldnames)}.")
+                    return cls([], csv_path)
+
+                # Baris 1 adalah header
+                for line_number, row in enumerate(reader, 2):
+                    ip_address = (row.get("IP ADDRESS") or "").strip()
+                    id_logger = (row.get("ID LOGGER") or "").strip()
+                    location = (row.get("LOKASI") or "").strip()
+                    if not (ip_address and id_logger and location):
+                        if ip_address or id_logger:
+                            logger.warning(f"Baris {line_number} di '{csv_path}' kekurangan IP, ID Logger, atau Lokasi. Baris dilewati.")
+                        continue
+                    if id_logger in seen_ids or ip_address in seen_ips:
+                        logger.warning(f"Baris {line_number} di '{csv_path}' duplikat (ID {id_logger}, IP {ip_address}). Baris dilewati.")
+                        continue
+                    seen_ids.add(id_logger)
+                    seen_ips.add(ip_address)
+                    devices.append(Device(id_logger, location, ip_address, (row.get("MAC ADDRESS") or "").strip()))
+        except FileNotFoundError:
+            logger.error(f"File CSV perangkat tidak ditemukan di '{csv_path}'")
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            logger.error(f"Error saat membaca file CSV perangkat '{csv_path}': {e}")
+            devices = []
+
+        if not devices:
+            logger.warning(f"Tidak ada perangkat yang dimuat dari '{csv_path}'.")
+        return cls(devices, csv_path)
+
+
+# path -> (registry, (mtime_ns, size) file saat dimuat, waktu monotonic pemeriksaan terakhir)
+_registries: Dict[str, Tuple[DeviceRegistry, Optional[Tuple[int, int]], float]] = {}
+_registries_lock = threading.Lock()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_registry(csv_path: Optional[str] = None) -> DeviceRegistry:
+    """
+    Registry bersama untuk satu path CSV
+
+    File dibaca sekali lalu hanya dibaca ulang jika mtime atau ukurannya berubah. Metadata
+    file diperiksa paling sering sekali per DEVICE_LIST_CHECK_SECONDS, sehingga pemanggilan
+    di jalur request umumnya tidak menyentuh disk sama sekali.
+
+    Args:
+        csv_path: Path device_list.csv (default: DEVICE_LIST_PATH)
+
+    Returns:
+        DeviceRegistry: Registry perangkat
+    """
+    path = os.path.abspath(csv_path or DEVICE_LIST_PATH)
+    now = time.monotonic()
+    entry = _registries.get(path)
+    if entry is not None and now - entry[2] < DEVICE_LIST_CHECK_SECONDS:
+        return entry[0]
+
+    with _registries_lock:
+        entry = _registries.get(path)
+        if entry is not None and now - entry[2] < DEVICE_LIST_CHECK_SECONDS:
+            return entry[0]
+        signature = _file_signature(path)
+        if entry is not None and signature == entry[1]:
+            registry = entry[0]
+        else:
+            registry = DeviceRegistry.from_csv(path)
+            if entry is None:
+                logger.info(f"Registry perangkat dimuat: {len(registry)} perangkat dari {path}")
+            else:
+                logger.info(f"{path} berubah, registry perangkat dimuat ulang: {len(registry)} perangkat")
+        _registries[path] = (registry, signature, now)
+    return registry
+
+
+def _toml_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def render_telegraf_inputs(registry: DeviceRegistry, timeout: str = "5s") -> str:
+    """
+    Membangkitkan blok [[inputs.http]] Telegraf untuk setiap perangkat di registry
+
+    Args:
+        registry: Registry perangkat
+        timeout: Timeout permintaan HTTP per perangkat
+
+    Returns:
+        str: Bagian konfigurasi Telegraf di antara penanda BEGIN/END
+    """
+    blocks = [TELEGRAF_BEGIN_MARKER]
+    for number, device in enumerate(registry, 1):
+        blocks.append("\n".join([
+            f"# Perangkat {number}: ID LOGGER:{device.id_logger}, LOKASI:{device.location}, IP ADDRESS:{device.ip_address}",
+            "[[inputs.http]]",
+            f"  urls = [{_toml_string(device.url)}]",
+            f"  name_override = {_toml_string(TELEGRAF_MEASUREMENT)}",
+            '  method = "GET"',
+            f"  timeout = {_toml_string(timeout)}",
+            '  data_format = "grok"',
+            f"  grok_patterns = [{_toml_string(TELEGRAF_GROK_PATTERN)}]",
+            "",
+            "  [inputs.http.tags]",
+            f"    device_id = {_toml_string(device.id_logger)}",
+            f"    location = {_toml_string(device.location)}",
+            f"    source_ip = {_toml_string(device.ip_address)}",
+        ]))
+    blocks.append(TELEGRAF_END_MARKER)
+    return "\n\n".join(blocks) + "\n"
+
+
+def replace_telegraf_inputs(config: str, inputs: str) -> str:
+    """
+    Mengganti bagian di antara penanda BEGIN/END pada isi telegraf.conf
+
+    Raises:
+        ValueError: Jika penanda tidak ditemukan
+    """
+    begin = config.find(TELEGRAF_BEGIN_MARKER)
+    end = config.find(TELEGRAF_END_MARKER, begin)
+    if begin == -1 or end == -1:
+        raise ValueError("Penanda bagian device_list.csv tidak ditemukan di konfigurasi Telegraf")
+    end += len(TELEGRAF_END_MARKER)
+    if config[end:end + 1] == "\n":
+        end += 1
+    return config[:begin] + inputs + config[end:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry perangkat dari device_list.csv")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    telegraf = subparsers.add_parser("telegraf", help="Bangkitkan blok [[inputs.http]] Telegraf")
+    telegraf.add_argument("--csv", default=DEVICE_LIST_PATH, help="Path device_list.csv")
+    telegraf.add_argument("--timeout", default="5s", help="Timeout HTTP per perangkat")
+    telegraf.add_argument("--write", metavar="TELEGRAF_CONF",
+                          help="Tulis ke bagian bertanda di file ini (default: cetak ke stdout)")
+    args = parser.parse_args()
+
+    inputs = render_telegraf_inputs(DeviceRegistry.from_csv(args.csv), timeout=args.timeout)
+    if not args.write:
+        print(inputs, end="")
+        return
+    with open(args.write, encoding="utf-8") as handle:
+        config = handle.read()
+    with open(args.write, "w", encoding="utf-8") as handle:
+        handle.write(replace_telegraf_inputs(config, inputs))
+    print(f"Bagian input Telegraf di {args.write} diperbarui dari {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
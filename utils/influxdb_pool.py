@@ -0,0 +1,145 @@
+"""
+Pool koneksi InfluxDB bersama untuk API dan collector
+Satu InfluxDBClient per proses dengan pool HTTP (urllib3) yang dapat dikonfigurasi,
+keep-alive TCP, serta fungsi lifecycle untuk startup/shutdown aplikasi.
+"""
+
+import logging
+import os
+import socket
+import threading
+from typing import Optional
+
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+# Konfigurasi koneksi dari environment
+INFLUXDB_URL = os.getenv("INFLUXDB_URL", "http://localhost:8086")
+INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "th1s_1s_a_v3ry_s3cur3_4nd_l0ng_4dm1n_t0k3n_f0r_d3v")
+INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "iot_project_alpha")
+
+# Konfigurasi pool
+INFLUXDB_POOL_SIZE = int(os.getenv("INFLUXDB_POOL_SIZE", "20"))  # Koneksi HTTP paralel maksimum ke InfluxDB
+INFLUXDB_TIMEOUT_MS = int(os.getenv("INFLUXDB_TIMEOUT_MS", "30000"))
+INFLUXDB_TCP_KEEPALIVE = os.getenv("INFLUXDB_TCP_KEEPALIVE", "true").lower() == "true"
+INFLUXDB_ENABLE_GZIP = os.getenv("INFLUXDB_ENABLE_GZIP", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[InfluxDBClient] = None
+_query_api = None
+_write_api = None
+_lock = threading.Lock()
+
+
+def _enable_tcp_keepalive(client: InfluxDBClient) -> None:
+    """
+    Mengaktifkan SO_KEEPALIVE pada socket baru di pool urllib3 milik client,
+    agar koneksi idle tidak diputus diam-diam oleh NAT/firewall.
+    """
+    try:
+        from urllib3.connection import HTTPConnection
+
+        pool_manager = client.api_client.rest_client.pool_manager
+        pool_manager.connection_pool_kw["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+    except Exception as e:
+        logger.warning(f"Gagal mengaktifkan TCP keep-alive untuk pool InfluxDB: {e}")
+
+
+def get_client(enable_gzip: Optional[bool] = None) -> InfluxDBClient:
+    """
+    Mendapatkan instance InfluxDB client bersama (singleton pattern, thread-safe)
+
+    Args:
+        enable_gzip: Override INFLUXDB_ENABLE_GZIP, hanya berlaku saat client pertama kali
+            dibuat (cth: collector yang menulis batch besar)
+
+    Returns:
+        InfluxDBClient: Instance InfluxDB client
+    """
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                client = InfluxDBClient(
+                    url=INFLUXDB_URL,
+                    token=INFLUXDB_TOKEN,
+                    org=INFLUXDB_ORG,
+                    timeout=INFLUXDB_TIMEOUT_MS,
+                    enable_gzip=INFLUXDB_ENABLE_GZIP if enable_gzip is None else enable_gzip,
+                    connection_pool_maxsize=INFLUXDB_POOL_SIZE
+                )
+                if INFLUXDB_TCP_KEEPALIVE:
+                    _enable_tcp_keepalive(client)
+                _client = client
+                logger.info(f"Pool InfluxDB diinisialisasi ke {INFLUXDB_URL} (pool_size={INFLUXDB_POOL_SIZE})")
+
+    return _client
+
+
+def get_query_api():
+    """
+    Mendapatkan query API dari client bersama
+
+    Returns:
+        QueryApi: Query API dari InfluxDB client
+    """
+    global _query_api
+
+    if _query_api is None:
+        _query_api = get_client().query_api()
+
+    return _query_api
+
+
+def get_write_api():
+    """
+    Mendapatkan write API sinkron dari client bersama
+
+    Returns:
+        WriteApi: Write API dengan mode SYNCHRONOUS
+    """
+    global _write_api
+
+    if _write_api is None:
+        _write_api = get_client().write_api(write_options=SYNCHRONOUS)
+
+    return _write_api
+
+
+def ping() -> bool:
+    """
+    Memeriksa koneksi ke InfluxDB menggunakan client bersama
+
+    Returns:
+        bool: True jika InfluxDB merespons
+    """
+    try:
+        return get_client().ping()
+    except Exception as e:
+        logger.warning(f"Ping InfluxDB gagal: {e}")
+        return False
+
+
+def close_client() -> None:
+    """
+    Menutup client bersama beserta semua koneksi di pool-nya
+    """
+    global _client, _query_api, _write_api
+
+    with _lock:
+        if _write_api is not None:
+            try:
+                _write_api.close()
+            except Exception as e:
+                logger.warning(f"Gagal menutup write API InfluxDB: {e}")
+        if _client is not None:
+            _client.close()
+            logger.info("Pool koneksi InfluxDB ditutup.")
+        _client = None
+        _query_api = None
+        _write_api = None
+
@@ -0,0 +1,101 @@
+"""
+Parser payload logger suhu/kelembapan: "humidity#temperature#hex"
+Bekerja langsung di atas buffer bytes respons HTTP tanpa decode ke str: jalur normal hanya
+satu split(b"#", 2) dan float() atas bytes ASCII, sedangkan pemeriksaan per field (regex
+terkompilasi) hanya dijalankan untuk menjelaskan payload yang gagal di-parse. Biayanya setara
+parser lama berbasis str (lihat benchmark_payload_parser.py); yang bertambah adalah validasi
+dan kesalahan terstruktur. Mendukung payload polos
+("46#22.20#2D303D") maupun terbungkus HTML ("<meta ...><body>46#22.20#2D303D</body>"),
+setara dengan pola grok di telegraf.conf.
+"""
+
+import math
+import re
+from typing import Any, Dict, Optional
+
+_BODY_START = b"<body>"
+_BODY_END = b"</body>"
+_NUMBER = rb"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+_NUMBER_ONLY = re.compile(rb"\s*" + _NUMBER + rb"\s*")
+
+FIELD_NAMES = ("humidity", "temperature", "hex_value")
+
+
+class PayloadParseError(ValueError):
+    """
+    Payload perangkat tidak dapat di-parse
+
+    Attributes:
+        reason: Kode kesalahan ("empty", "field_count", "invalid_number", "invalid_hex")
+        field: Nama field yang tidak valid (jika ada)
+        payload: Cuplikan payload (maksimal 80 karakter) untuk log
+    """
+
+    def __init__(self, reason: str, payload: bytes, field: Optional[str] = None, detail: str = ""):
+        self.reason = reason
+        self.field = field
+        self.payload = bytes(payload[:80]).decode("utf-8", errors="replace")
+        message = f"Payload tidak valid ({reason}"
+        message += f", field {field})" if field else ")"
+        if detail:
+            message += f": {detail}"
+        super().__init__(f"{message}. Diterima: '{self.payload}'")
+
+
+def _body_bounds(raw: bytes):
+    # Rentang isi <body>...</body> jika ada; selain itu seluruh payload
+    start = raw.find(_BODY_START)
+    if start != -1:
+        start += len(_BODY_START)
+        end = raw.find(_BODY_END, start)
+        if end != -1:
+            return start, end
+    return 0, len(raw)
+
+
+def _diagnose(raw: bytes, start: int, end: int) -> PayloadParseError:
+    # Jalur lambat, hanya dijalankan ketika payload tidak cocok dengan pola
+    segment = raw[start:end].strip()
+    if not segment:
+        return PayloadParseError("empty", raw)
+    parts = segment.split(b"#")
+    if len(parts) != 3:
+        return PayloadParseError("field_count", segment, detail=f"{len(parts)} field, diharapkan 3")
+    for name, part in zip(FIELD_NAMES[:2], parts[:2]):
+        if not _NUMBER_ONLY.fullmatch(part):
+            return PayloadParseError("invalid_number", segment, field=name,
+                                     detail=f"'{part.decode('utf-8', errors='replace')}' bukan angka")
+    return PayloadParseError("invalid_hex", segment, field="hex_value", detail="harus alfanumerik")
+
+
+def parse_payload(raw: bytes) -> Dict[str, Any]:
+    """
+    Mem-parsing payload perangkat dari buffer bytes
+
+    Args:
+        raw: Isi respons HTTP perangkat (bytes atau bytearray)
+
+    Returns:
+        Dict[str, Any]: {"humidity": float, "temperature": float, "hex_value": str}
+
+    Raises:
+        PayloadParseError: Jika payload kosong, jumlah field salah, atau nilai tidak valid
+    """
+    body = raw
+    start = raw.find(_BODY_START)
+    if start != -1:
+        end = raw.find(_BODY_END, start)
+        if end != -1:
+            body = raw[start + len(_BODY_START):end]
+
+    try:
+        # float() menerima bytes ASCII (termasuk spasi di tepi) secara langsung
+        humidity, temperature, hex_value = body.split(b"#", 2)
+        humidity, temperature = float(humidity), float(temperature)
+    except ValueError:
+        raise _diagnose(raw, *_body_bounds(raw)) from None
+    hex_value = hex_value.strip()
+    # Field ke-4 tertinggal di hex_value sehingga gagal isalnum(); nan/inf membuat jumlahnya tidak finite
+    if not hex_value.isalnum() or not math.isfinite(humidity + temperature):
+        raise _diagnose(raw, *_body_bounds(raw))
+    return {"humidity": humidity, "temperature": temperature, "hex_value": hex_value.decode("ascii")}
@@ -0,0 +1,131 @@
+"""
+Penjadwal tick periodik tanpa drift
+Tick dijadwalkan pada kelipatan interval jam dinding (cth: detik :00, :10, :20) dan dihitung
+dengan jam monotonic, sehingga durasi pekerjaan tidak menggeser jadwal. Tick yang terlewat
+karena pekerjaan melebihi interval dilompati, bukan dijalankan beruntun, dan keterlambatan
+setiap tick dicatat sebagai metrik.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Tick(NamedTuple):
+    """
+    Satu tick jadwal
+    """
+    number: int
+    scheduled: float       # Waktu jadwal (jam monotonic)
+    wall_time: float       # Waktu jadwal (epoch detik, kelipatan interval)
+    lateness: float        # Selisih waktu bangun aktual terhadap jadwal (detik)
+    skipped: int           # Jumlah tick yang dilompati sebelum tick ini
+
+
+class TickScheduler:
+    """
+    Menunggu tick berikutnya yang selaras dengan kelipatan interval
+
+    Args:
+        interval: Interval tick dalam detik
+        clock: Jam monotonic (dapat diganti untuk testing)
+        wall_clock: Jam dinding epoch detik (dapat diganti untuk testing)
+        sleep: Fungsi sleep asinkron (dapat diganti untuk testing)
+    """
+
+    def __init__(self, interval: float, clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        if interval <= 0:
+            raise ValueError("interval harus lebih besar dari 0")
+        self.interval = interval
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._next: Optional[float] = None
+        self._next_wall = 0.0
+        self._number = 0
+        self._skipped_total = 0
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+        self._last: Optional[Tick] = None
+
+    def _align(self) -> None:
+        # Tick pertama pada kelipatan interval jam dinding berikutnya, dipetakan ke jam monotonic
+        now, wall = self._clock(), self._wall_clock()
+        self._next_wall = math.floor(wall / self.interval) * self.interval + self.interval
+        self._next = now + (self._next_wall - wall)
+
+    async def wait_next_tick(self) -> Tick:
+        """
+        Menunggu hingga tick berikutnya
+
+        Jika pemanggil terlambat lebih dari satu interval, tick yang terlewat dilompati dan
+        tick terakhir yang sudah jatuh tempo langsung dijalankan.
+
+        Returns:
+            Tick: Informasi tick yang sedang berjalan
+        """
+        if self._next is None:
+            self._align()
+
+        skipped = 0
+        behind = self._clock() - self._next
+        if behind >= self.interval:
+            skipped = int(behind // self.interval)
+            self._next += skipped * self.interval
+            self._next_wall += skipped * self.interval
+
+        delay = self._next - self._clock()
+        if delay > 0:
+            await self._sleep(delay)
+
+        lateness = max(self._clock() - self._next, 0.0)
+        self._number += 1
+        tick = Tick(self._number, self._next, self._next_wall, lateness, skipped)
+
+        self._next += self.interval
+        self._next_wall += self.interval
+        self._skipped_total += skipped
+        self._lateness_total += lateness
+        self._lateness_max = max(self._lateness_max, lateness)
+        self._last = tick
+        if skipped:
+            logger.warning(f"{skipped} tick dilompati karena pekerjaan melebihi interval {self.interval} detik")
+        return tick
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Metrik keterlambatan tick
+
+        Returns:
+            Dict[str, Any]: Jumlah tick, tick yang dilompati, dan keterlambatan (ms)
+        """
+        return {
+            "interval_seconds": self.interval,
+            "ticks": self._number,
+            "skipped_ticks": self._skipped_total,
+            "last_lateness_ms": round(self._last.lateness * 1000, 3) if self._last else None,
+            "mean_lateness_ms": round(self._lateness_total / self._number * 1000, 3) if self._number else None,
+            "max_lateness_ms": round(self._lateness_max * 1000, 3),
+        }
+
+
+def spread_offsets(count: int, window: float) -> List[float]:
+    """
+    Offset mulai yang tersebar rata dalam sebuah jendela waktu
+
+    Args:
+        count: Jumlah pekerjaan (cth: perangkat)
+        window: Lebar jendela dalam detik
+
+    Returns:
+        List[float]: Offset (detik) untuk setiap pekerjaan, dimulai dari 0
+    """
+    if count <= 0:
+        return []
+    return [window * i / count for i in range(count)]
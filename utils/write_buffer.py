@@ -0,0 +1,161 @@
+"""
+Buffer tulis lokal berbasis disk untuk line protocol InfluxDB
+Batch yang gagal ditulis disimpan sebagai file segmen append-only dengan ukuran total
+terbatas, lalu diputar ulang (replay) dalam batch besar ketika InfluxDB kembali tersedia.
+Replay bersifat at-least-once: menulis ulang titik dengan series dan timestamp yang sama
+di InfluxDB menimpa nilai yang sama, sehingga pengiriman ganda tidak menimbulkan duplikat.
+"""
+
+import logging
+import os
+import threading
+from typing import Callable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".lp"
+
+
+class SegmentedWriteBuffer:
+    """
+    Ring buffer line protocol di disk
+
+    Baris ditambahkan ke segmen aktif; segmen ditutup ketika mencapai `segment_max_bytes`.
+    Jika ukuran total melebihi `max_bytes`, segmen tertua dihapus (data tertua dikorbankan
+    agar disk tidak penuh). Aman dipakai dari event loop (append) dan thread pool (replay).
+
+    Args:
+        directory: Direktori penyimpanan segmen (dibuat jika belum ada)
+        max_bytes: Ukuran total maksimum seluruh segmen
+        segment_max_bytes: Ukuran maksimum satu segmen sebelum segmen baru dibuat
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024,
+                 segment_max_bytes: int = 4 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments: List[str] = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        self._sizes = {name: os.path.getsize(self._path(name)) for name in self._segments}
+        self._next_sequence = self._sequence(self._segments[-1]) + 1 if self._segments else 1
+        # Segmen sisa proses sebelumnya dianggap tertutup; append selalu memulai segmen baru
+        self._active: Optional[str] = None
+        if self._segments:
+            logger.info(f"Buffer tulis memuat {len(self._segments)} segmen tertunda ({self.pending_bytes()} bytes)")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _sequence(name: str) -> int:
+        return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+    def pending_bytes(self) -> int:
+        """
+        Ukuran seluruh data yang belum terkirim (bytes)
+        """
+        return sum(self._sizes.values())
+
+    def has_pending(self) -> bool:
+        """
+        True jika masih ada data yang belum terkirim
+        """
+        return bool(self._segments)
+
+    def append(self, lines: Sequence[str]) -> None:
+        """
+        Menambahkan baris line protocol ke buffer dan memastikannya tersimpan di disk
+
+        Args:
+            lines: Baris line protocol (dengan timestamp eksplisit)
+        """
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+
+        with self._lock:
+            if self._active is None or self._sizes[self._active] >= self.segment_max_bytes:
+                self._active = f"{SEGMENT_PREFIX}{self._next_sequence:012d}{SEGMENT_SUFFIX}"
+                self._next_sequence += 1
+                self._segments.append(self._active)
+                self._sizes[self._active] = 0
+
+            with open(self._path(self._active), "ab") as segment:
+                segment.write(data)
+                segment.flush()
+                os.fsync(segment.fileno())
+            self._sizes[self._active] += len(data)
+            self._enforce_limit()
+
+    def _enforce_limit(self) -> None:
+        dropped = 0
+        while self.pending_bytes() > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(0)
+            dropped += self._sizes.pop(oldest)
+            os.remove(self._path(oldest))
+        if dropped:
+            logger.warning(f"Buffer tulis penuh ({self.max_bytes} bytes): {dropped} bytes data tertua dibuang")
+
+    def _read_lines(self, name: str) -> List[str]:
+        with open(self._path(name), "rb") as segment:
+            data = segment.read()
+        # Baris terakhir tanpa newline adalah tulisan yang terputus (cth: proses mati) dan diabaikan
+        complete = data[:data.rfind(b"\n") + 1]
+        return complete.decode("utf-8", errors="replace").splitlines()
+
+    def _oldest_closed_segment(self) -> Optional[str]:
+        with self._lock:
+            if not self._segments:
+                return None
+            if self._segments[0] == self._active:
+                # Tutup segmen aktif agar dapat diputar ulang; append berikutnya membuat segmen baru
+                self._active = None
+            return self._segments[0]
+
+    def _remove_segment(self, name: str) -> None:
+        with self._lock:
+            if name in self._sizes:
+                self._segments.remove(name)
+                self._sizes.pop(name)
+                os.remove(self._path(name))
+
+    def _batches(self, lines: List[str], batch_lines: int) -> Iterator[str]:
+        for start in range(0, len(lines), batch_lines):
+            yield "\n".join(lines[start:start + batch_lines])
+
+    def replay(self, write: Callable[[str], None], batch_lines: int = 5000,
+               max_batches: Optional[int] = None) -> int:
+        """
+        Mengirim ulang data tertunda, segmen tertua lebih dulu
+
+        Segmen dihapus setelah seluruh isinya berhasil ditulis. Jika `write` gagal, exception
+        diteruskan dan segmen tetap disimpan untuk dicoba lagi.
+
+        Args:
+            write: Fungsi yang menulis satu batch line protocol (dipanggil di thread pemanggil)
+            batch_lines: Jumlah baris per batch
+            max_batches: Batas jumlah batch per pemanggilan (opsional)
+
+        Returns:
+            int: Jumlah baris yang berhasil dikirim
+        """
+        sent = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            name = self._oldest_closed_segment()
+            if name is None:
+                break
+            lines = self._read_lines(name)
+            for batch in self._batches(lines, batch_lines):
+                write(batch)
+                batches += 1
+                sent += batch.count("\n") + 1
+            self._remove_segment(name)
+        return sent
@@ -1,35 +1,36 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend } from 'chart.js';
 import { Line } from 'react-chartjs-2';
-import { fetchTrendData } from '../utils/api';
+import { fetchBatchTrendData } from '../utils/api';
 
 // Register Chart.js components
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
 
+const TREND_ROOMS = ['F2', 'F3', 'F4', 'F5', 'F6', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7', 'G8'];
+const TREND_PARAMETERS = ['temperature', 'humidity'];
+
 const TrendAnalysis = () => {
   const [activePeriod, setActivePeriod] = useState('day');
   const [selectedLocation, setSelectedLocation] = useState('all');
   const [selectedParameter, setSelectedParameter] = useState('temperature');
+  const [batchData, setBatchData] = useState(null);
   const [trendData, setTrendData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   
   const chartRef = useRef(null);
   
-  // Fetch trend data when parameters change
+  // Semua ruangan × parameter diambil sekaligus per periode; ganti ruangan/parameter tidak memicu request baru
   useEffect(() => {
     const fetchData = async () => {
       try {
         setLoading(true);
-        const data = await fetchTrendData({
-          period: activePeriod,
-          location: selectedLocation,
-          parameter: selectedParameter
+        const data = await fetchBatchTrendData({
+          parameters: TREND_PARAMETERS,
+          locations: ['all', ...TREND_ROOMS],
+          period: activePeriod
         });
-        
-        // Transform API response to Chart.js format
-        const transformedData = transformApiDataToChartFormat(data, selectedParameter);
-        setTrendData(transformedData);
+        setBatchData(data);
         setError(null);
       } catch (err) {
         // Silent error handling in production, log only in debug mode
@@ -37,15 +38,25 @@ const TrendAnalysis = () => {
           console.error('Error fetching trend data:', err);
         }
         setError('Gagal memuat data tren. Silakan coba lagi.');
-        // Use dummy data if API fails
-        setTrendData(getDummyTrendData(activePeriod, selectedParameter));
+        setBatchData(null);
       } finally {
         setLoading(false);
       }
     };
     
     fetchData();
-  }, [activePeriod, selectedLocation, selectedParameter]);
+  }, [activePeriod]);
+
+  // Pilih seri ruangan/parameter dari hasil batch
+  useEffect(() => {
+    if (!batchData) {
+      // Use dummy data if API fails
+      setTrendData(getDummyTrendData(activePeriod, selectedParameter));
+      return;
+    }
+    const series = batchData.locations?.[selectedLocation]?.[selectedParameter];
+    setTrendData(transformApiDataToChartFormat(series, selectedParameter));
+  }, [batchData, selectedLocation, selectedParameter]);
 
   // Transform API response data to Chart.js format
   const transformApiDataToChartFormat = (apiData, parameter) => {
@@ -197,18 +208,9 @@ const TrendAnalysis = () => {
         <div className="trend-controls">
           <select id="trend-location" value={selectedLocation} onChange={handleLocationChange}>
             <option value="all">Semua Ruangan</option>
-            <option value="F2">Ruang F2</option>
-            <option value="F3">Ruang F3</option>
-            <option value="F4">Ruang F4</option>
-            <option value="F5">Ruang F5</option>
-            <option value="F6">Ruang F6</option>
-            <option value="G2">Ruang G2</option>
-            <option value="G3">Ruang G3</option>
-            <option value="G4">Ruang G4</option>
-            <option value="G5">Ruang G5</option>
-            <option value="G6">Ruang G6</option>
-            <option value="G7">Ruang G7</option>
-            <option value="G8">Ruang G8</option>
+            {TREND_ROOMS.map((room) => (
+              <option key={room} value={room}>Ruang {room}</option>
+            ))}
           </select>
           
           <select id="trend-parameter" value={selectedParameter} onChange={handleParameterChange}>
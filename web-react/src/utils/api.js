@@ -180,35 +180,39 @@ export const fetchLatestEnvironmentalStatus = async () => {
       // Jangan tambahkan api_key di sini karena kita menggunakan header
     };
     
-    // Ambil statistik suhu dalam 1 jam terakhir (rata-rata, min, max)
-    let tempResponse;
+    // Ambil statistik suhu dan kelembapan 1 jam terakhir dalam satu request (satu scan InfluxDB)
+    let tempResponse = { data: null };
+    let humidityResponse = { data: null };
     try {
-      if (DEBUG_API) console.log('Fetching temperature stats...');
-      tempResponse = await api.get('/stats/temperature/last-hour/stats/', urlParams);
-      if (DEBUG_API) console.log('Temperature response:', tempResponse.data);
-    } catch (tempError) {
-      if (DEBUG_API) {
-        console.error('Error fetching temperature data:', tempError.message, tempError.code);
-        console.log('Temperature request failed with config:', tempError.config);
-        console.log('Status:', tempError.response ? tempError.response.status : 'No response');
+      if (DEBUG_API) console.log('Fetching stats bundle...');
+      const bundleResponse = await api.get('/stats/last-hour/bundle/', urlParams);
+      if (DEBUG_API) console.log('Stats bundle response:', bundleResponse.data);
+      const bundle = bundleResponse.data || {};
+      if (bundle.temperature) {
+        tempResponse = {
+          data: {
+            avg_temperature: bundle.temperature.mean,
+            min_temperature: bundle.temperature.min,
+            max_temperature: bundle.temperature.max
+          }
+        };
       }
-      // Tetap lanjutkan untuk mencoba endpoint humidity
-      tempResponse = { data: null };
-    }
-    
-    // Ambil statistik kelembapan dalam 1 jam terakhir (rata-rata, min, max)
-    let humidityResponse;
-    try {
-      if (DEBUG_API) console.log('Fetching humidity stats...');
-      humidityResponse = await api.get('/stats/humidity/last-hour/stats/', urlParams);
-      if (DEBUG_API) console.log('Humidity response:', humidityResponse.data);
-    } catch (humidityError) {
+      if (bundle.humidity) {
+        humidityResponse = {
+          data: {
+            avg_humidity: bundle.humidity.mean,
+            min_humidity: bundle.humidity.min,
+            max_humidity: bundle.humidity.max
+          }
+        };
+      }
+    } catch (bundleError) {
       if (DEBUG_API) {
-        console.error('Error fetching humidity data:', humidityError.message, humidityError.code);
-        console.log('Humidity request failed with config:', humidityError.config);
-        console.log('Status:', humidityError.response ? humidityError.response.status : 'No response');
+        console.error('Error fetching stats bundle:', bundleError.message, bundleError.code);
+        console.log('Stats bundle request failed with config:', bundleError.config);
+        console.log('Status:', bundleError.response ? bundleError.response.status : 'No response');
       }
-      humidityResponse = { data: null };
+      // Nilai fallback di bawah akan digunakan
     }
     
     // Validasi data suhu
@@ -237,7 +241,7 @@ export const fetchLatestEnvironmentalStatus = async () => {
       ? humidityResponse.data.max_humidity
       : 53; // Fallback value
     
-    // Kombinasikan data dari kedua endpoint
+    // Kombinasikan data suhu dan kelembapan
     return {
       temperature: {
         average: tempAvg,
@@ -342,6 +346,21 @@ export const fetchTrendData = async (params = {}) => {
   }
 };
 
+// Tren banyak lokasi × parameter dalam satu request (satu query InfluxDB di backend)
+export const fetchBatchTrendData = async ({ parameters = ['temperature', 'humidity'], locations = ['all'], period = 'week' } = {}) => {
+  try {
+    const params = new URLSearchParams();
+    parameters.forEach((parameter) => params.append('parameters', parameter));
+    locations.forEach((location) => params.append('locations', location));
+    params.append('period', period);
+    const response = await api.get('/data/trends/batch', { params });
+    return response.data;
+  } catch (error) {
+    if (DEBUG_API) console.error('Error fetching batch trend data:', error);
+    throw error;
+  }
+};
+
 export const fetchPredictions = async (params = {}) => {
   try {
     const response = await api.get('/predictions', { params });
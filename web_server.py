@@ -11,26 +11,20 @@ from functools import partial
 import threading
 import time
 from urllib.parse import parse_qs, urlparse
-from influxdb_client import InfluxDBClient
 from influxdb_client.client.exceptions import InfluxDBError
 from datetime import datetime, timedelta
 import pandas as pd
 
+from utils import influxdb_pool
+
 # Configuration
-INFLUXDB_URL = os.getenv("INFLUXDB_URL", "http://localhost:8086")
-INFLUXDB_TOKEN = os.getenv("INFLUXDB_TOKEN", "th1s_1s_a_v3ry_s3cur3_4nd_l0ng_4dm1n_t0k3n_f0r_d3v")
-INFLUXDB_ORG = os.getenv("INFLUXDB_ORG", "iot_project_alpha")
 INFLUXDB_BUCKET = os.getenv("INFLUXDB_BUCKET", "sensor_data_primary")
 
-# Initialize InfluxDB client
+# Initialize InfluxDB client from the shared connection pool
 try:
-    influx_client = InfluxDBClient(
-        url=INFLUXDB_URL,
-        token=INFLUXDB_TOKEN,
-        org=INFLUXDB_ORG
-    )
-    query_api = influx_client.query_api()
-    print(f"Connected to InfluxDB at {INFLUXDB_URL}")
+    influx_client = influxdb_pool.get_client()
+    query_api = influxdb_pool.get_query_api()
+    print(f"Connected to InfluxDB at {influxdb_pool.INFLUXDB_URL}")
 except Exception as e:
     print(f"Error connecting to InfluxDB: {e}")
     influx_client = None
@@ -369,6 +363,8 @@ def start_server(port=8002, directory=None):
     except KeyboardInterrupt:
         print("\nShutting down server")
         server.shutdown()
+    finally:
+        influxdb_pool.close_client()
 
 if __name__ == "__main__":
     # Add math and random for the sample data generation